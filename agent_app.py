@@ -2,14 +2,34 @@ import streamlit as st
 import google.generativeai as genai
 from datetime import datetime
 import json
-import os
 import re
-from typing import Dict, List, Any, Optional, Tuple
-import requests
-from bs4 import BeautifulSoup
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 from dotenv import load_dotenv
+import itertools
 import time
 
+from agent_intent import (
+    SOURCE_LOCAL,
+    IntentParseError,
+    IntentResult,
+    build_intent_generation_config,
+    fallback_intent,
+    intent_parse_stats,
+    parse_intent_response,
+    record_intent_error,
+    record_local_intent,
+    should_run_workflow,
+)
+from agent_workflows import AGENT_WORKFLOWS, required_inputs
+from gemini_client import AsyncGeminiClient
+from intent_classifier import LocalIntentClassifier
+from page_cache import fetch_page_cached
+from rate_limiter import estimate_tokens, get_rate_limiter
+from response_cache import make_cache_key
+from settings import get_secret, secrets_fingerprint
+from singleflight import get_singleflight
+from url_ingest import OK as URL_OK, fetch_urls, find_urls
+
 # Load environment variables
 load_dotenv()
 
@@ -189,11 +209,16 @@ if 'current_workflow' not in st.session_state:
     st.session_state.current_workflow = None
 if 'workflow_step' not in st.session_state:
     st.session_state.workflow_step = 0
+if 'streaming' not in st.session_state:
+    st.session_state.streaming = True
 
-# API setup
-@st.cache_resource
+# ストリーミング表示の再描画間隔
+STREAM_RENDER_INTERVAL = 0.05  # 秒
+STREAM_RENDER_CHARS = 200  # この文字数がたまったら間隔に関係なく描画
+
+# API setup（get_agentのキャッシュ内で1回だけ呼ばれる）
 def setup_gemini():
-    api_key = st.secrets.get("GEMINI_API_KEY", os.getenv("GEMINI_API_KEY"))
+    api_key = get_secret("GEMINI_API_KEY")
     if api_key:
         genai.configure(api_key=api_key)
         return genai.GenerativeModel('gemini-2.0-flash-exp')
@@ -201,311 +226,68 @@ def setup_gemini():
 
 class YouTubeAIAgent:
     def __init__(self):
+        started = time.perf_counter()
         self.model = setup_gemini()
+        self.async_client = AsyncGeminiClient(self._generate_text)
         
-        # 全13種類のワークフロー定義
-        self.workflows = {
-            "channel_concept": {
-                "name": "チャンネルコンセプト設計",
-                "description": "YouTubeチャンネルのコンセプトを設計し、SEOキーワードとペルソナに基づいた戦略を立案",
-                "icon": "🎯",
-                "prompts": {
-                    "step1": """
-                    #TASK_EXECUTION[TYPE=YouTubeチャンネル設計支援]
-                    
-                    Step1: ユーザー入力から販売商品情報を収集する。
-                    商品情報: {product_info}
-                    サービスURL: {service_url}
-                    
-                    Step2: 商品と関連性があり、検索ボリュームが高いYouTube SEOキーワードを30個抽出し、ボリューム順にランキング
-                    """,
-                    "step2": """
-                    Step3: 上位3キーワードに対して、それぞれユーザーペルソナ像を3つずつ抽出
-                    キーワード: {keywords}
-                    """,
-                    "step3": """
-                    Step4: 合計9ペルソナから最も相関性の高い3ペルソナを選定
-                    Step5: 3ペルソナが達成したい未来像（ゴールイメージ）を3つ作成
-                    ペルソナ情報: {personas}
-                    """,
-                    "step4": """
-                    Step6: 3つのゴールイメージとTOP3キーワードに基づいて、チャンネルコンセプト案を30個生成
-                    タイトルは13文字以内、コンセプト名にはYouTube SEOキーワードを入れる
-                    
-                    ゴールイメージ: {goals}
-                    キーワード: {keywords}
-                    """
-                }
-            },
-            "video_marketing": {
-                "name": "動画マーケティング支援",
-                "description": "動画の内容からサムネイル文言とタイトルを生成",
-                "icon": "🎨",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=動画マーケティング支援]
-                    
-                    動画内容: {video_content}
-                    チャンネル情報: {channel_info}
-                    
-                    Step1: 動画の内容を分析し、視聴者の興味を引くポイントを抽出
-                    Step2: ペルソナ別に響くサムネイル文言を10パターン生成
-                    Step3: SEO効果の高いタイトルを10パターン生成
-                    Step4: クリック率を最大化する組み合わせTOP3を提案
-                    """
-                }
-            },
-            "video_planning": {
-                "name": "動画企画生成＆SEO最適化",
-                "description": "SEOキーワードに基づいた動画企画とタイトル案を生成",
-                "icon": "📋",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=動画企画生成]
-                    
-                    キーワード: {keywords}
-                    チャンネルテーマ: {channel_theme}
-                    
-                    Step1: キーワードの検索意図を分析
-                    Step2: 競合動画の分析（想定）
-                    Step3: 差別化できる動画企画を30個生成
-                    Step4: 各企画のSEO効果とバイラル性を評価
-                    Step5: TOP10企画の詳細な構成案を作成
-                    """
-                }
-            },
-            "shorts_planning": {
-                "name": "YouTube Shorts企画生成",
-                "description": "ショート動画向けの企画案を大量生成し、ランキング評価",
-                "icon": "📱",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=Shorts企画生成]
-                    
-                    テーマ: {theme}
-                    ターゲット: {target}
-                    
-                    Step1: Shortsのトレンドを分析
-                    Step2: 60秒以内で完結する企画を50個生成
-                    Step3: 各企画のフック力、完視聴率、バイラル性を評価
-                    Step4: カテゴリー別にTOP企画をランキング
-                    Step5: 制作優先順位と投稿スケジュールを提案
-                    """
-                }
-            },
-            "shorts_script": {
-                "name": "Shorts台本生成",
-                "description": "最新トレンドを踏まえたショート動画台本を作成",
-                "icon": "📝",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=Shorts台本生成]
-                    
-                    企画: {plan}
-                    キーワード: {keywords}
-                    
-                    Step1: 関連キーワードでナレッジを収集
-                    Step2: 最初の3秒のフックを5パターン作成
-                    Step3: 15秒ごとのシーン構成を設計
-                    Step4: オチとCTAを最適化
-                    Step5: 撮影・編集指示を含む完全台本を生成
-                    """
-                }
-            },
-            "content_scoring": {
-                "name": "コンテンツスコアリング",
-                "description": "作成したコンテンツの品質を評価し、改善点をフィードバック",
-                "icon": "📊",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=コンテンツスコアリング]
-                    
-                    タイトル: {title}
-                    サムネイル: {thumbnail}
-                    説明文: {description}
-                    
-                    評価項目:
-                    1. SEO最適化スコア（キーワード配置、密度）
-                    2. クリック率予測（タイトル魅力度、サムネイル効果）
-                    3. 視聴維持率予測（期待値管理、内容の一致度）
-                    4. エンゲージメント予測（コメント誘発度、シェア可能性）
-                    5. 総合スコアと改善提案
-                    """
-                }
-            },
-            "keyword_strategy": {
-                "name": "キーワード戦略シミュレーション",
-                "description": "YouTube運用のためのキーワード戦略を多角的に分析・提案",
-                "icon": "🔍",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=キーワード戦略]
-                    
-                    ビジネス: {business}
-                    目標: {goals}
-                    
-                    Step1: シードキーワードから関連キーワードを収集
-                    Step2: キーワードの価値評価（検索数、競合性、収益性）
-                    Step3: 3ヶ月、6ヶ月、12ヶ月のフェーズ別戦略
-                    Step4: コンテンツカレンダーの作成
-                    Step5: KPI設定と成功指標の定義
-                    """
-                }
-            },
-            "long_script": {
-                "name": "長尺動画台本生成",
-                "description": "10-30分の詳細な動画台本を生成",
-                "icon": "🎬",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=長尺動画台本]
-                    
-                    トピック: {topic}
-                    スタイル: {style}
-                    
-                    Step1: トピックに関するナレッジを体系的に整理
-                    Step2: 視聴者の理解度に応じた構成を設計
-                    Step3: チャプター別の詳細台本を作成
-                    Step4: ビジュアル指示とB-roll提案
-                    Step5: 編集指示を含む完全台本を生成
-                    """
-                }
-            },
-            "competitor_analysis": {
-                "name": "競合チャンネル分析",
-                "description": "競合チャンネルを分析し、差別化戦略を提案",
-                "icon": "🔬",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=競合分析]
-                    
-                    競合チャンネル: {competitors}
-                    自チャンネル: {own_channel}
-                    
-                    Step1: 競合の強み・弱みを分析
-                    Step2: コンテンツギャップを特定
-                    Step3: 差別化ポイントを抽出
-                    Step4: 勝てる領域の特定
-                    Step5: 具体的なアクションプランを提案
-                    """
-                }
-            },
-            "trend_forecast": {
-                "name": "トレンド予測＆早期参入戦略",
-                "description": "今後のトレンドを予測し、早期参入戦略を立案",
-                "icon": "📈",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=トレンド予測]
-                    
-                    ジャンル: {genre}
-                    現在のトレンド: {current_trends}
-                    
-                    Step1: 過去のトレンドパターンを分析
-                    Step2: 新興トレンドの兆候を特定
-                    Step3: 3-6ヶ月後のトレンド予測
-                    Step4: 早期参入のためのコンテンツ戦略
-                    Step5: リスクヘッジプランの策定
-                    """
-                }
-            },
-            "monetization": {
-                "name": "収益化戦略立案",
-                "description": "チャンネルの収益化戦略を多角的に立案",
-                "icon": "💰",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=収益化戦略]
-                    
-                    チャンネル規模: {channel_size}
-                    コンテンツタイプ: {content_type}
-                    
-                    Step1: 現在の収益化ポテンシャルを分析
-                    Step2: 複数の収益源を特定（広告、スポンサー、商品等）
-                    Step3: 各収益源の実装計画
-                    Step4: 収益予測シミュレーション
-                    Step5: 段階的な実行プランを作成
-                    """
-                }
-            },
-            "community_building": {
-                "name": "コミュニティ構築戦略",
-                "description": "熱狂的なファンコミュニティを構築する戦略",
-                "icon": "👥",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=コミュニティ構築]
-                    
-                    チャンネルテーマ: {theme}
-                    現在の規模: {current_size}
-                    
-                    Step1: コアファン層の特定
-                    Step2: エンゲージメント施策の設計
-                    Step3: コミュニティプラットフォームの選定
-                    Step4: ファン参加型コンテンツの企画
-                    Step5: 長期的な関係構築プランの策定
-                    """
-                }
-            },
-            "collaboration": {
-                "name": "コラボレーション戦略",
-                "description": "他のクリエイターとの効果的なコラボ戦略",
-                "icon": "🤝",
-                "prompts": {
-                    "main": """
-                    #TASK_EXECUTION[TYPE=コラボ戦略]
-                    
-                    自チャンネル: {own_channel}
-                    ターゲット層: {target_audience}
-                    
-                    Step1: コラボ候補者のリストアップ
-                    Step2: 相乗効果の高い組み合わせを特定
-                    Step3: アプローチ方法の設計
-                    Step4: コラボ企画の立案
-                    Step5: 実行スケジュールと期待効果の算出
-                    """
-                }
-            }
-        }
+        # 全13種類のワークフロー定義（プロセス内で共有するため変更しないこと）
+        self.workflows = AGENT_WORKFLOWS
+        self.intent_classifier = LocalIntentClassifier(self.workflows)
+        self.build_seconds = time.perf_counter() - started
     
     def extract_url_content(self, url: str) -> str:
         """URLからコンテンツを抽出"""
         try:
-            response = requests.get(url, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            title = soup.find('title').text if soup.find('title') else ''
-            meta_desc = soup.find('meta', {'name': 'description'})
-            description = meta_desc.get('content', '') if meta_desc else ''
-            
-            # 本文の主要部分を抽出
-            main_content = []
-            for tag in soup.find_all(['h1', 'h2', 'h3', 'p', 'li']):
-                text = tag.get_text().strip()
-                if text and len(text) > 20:
-                    main_content.append(text)
-            
-            content_text = '\n'.join(main_content[:50])  # 最初の50要素
-            
-            return f"""
-            ページタイトル: {title}
-            メタ説明: {description}
-            
-            主要コンテンツ:
-            {content_text}
-            """
+            return self._read_url_content(url)
         except Exception as e:
             return f"URLの読み取りエラー: {str(e)}"
     
-    def analyze_intent(self, user_input: str) -> Tuple[str, Dict[str, Any]]:
+    def _read_url_content(self, url: str, timeout: Optional[float] = None) -> str:
+        """URLからコンテンツを抽出（失敗時は例外。timeoutは読み取りの上限秒数）"""
+        # 本文はストリーミングで読み、タイトル・メタ説明・主要な50要素が集まった時点で打ち切る
+        # （同じURLはキャッシュの有効期限内なら通信せず、期限切れでも304なら解析し直さない）
+        page = fetch_page_cached(url, timeout=timeout)
+        
+        return f"""
+        ページタイトル: {page.title}
+        メタ説明: {page.description}
+        
+        主要コンテンツ:
+        {page.main_text(50)}
+        """
+    
+    def analyze_intent(self, user_input: str,
+                       context: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], IntentResult]:
         """ユーザーの意図を分析して適切なワークフローを選択"""
         
-        # URL検出と抽出
-        urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', user_input)
-        url_content = ""
-        if urls:
-            for url in urls:
-                url_content += self.extract_url_content(url)
+        # URL検出と抽出（並列に取得し、締め切りまでに読み込めたものだけを使う）
+        urls = find_urls(user_input)
+        url_results = fetch_urls(urls, self._read_url_content)
+        url_content = "".join(r.content for r in url_results if r.status == URL_OK)
+        url_errors = "\n".join(r.describe() for r in url_results if r.status != URL_OK)
+        
+        # 明らかな依頼（クイックスタートボタン等）はローカル分類器で即決し、LLMを呼ばない
+        local = self.intent_classifier.classify(user_input)
+        if local["workflow"]:
+            record_local_intent()
+            extracted_info = {}
+            if urls:
+                extracted_info["service_url"] = urls[0]
+            if url_content:
+                extracted_info["url_content"] = url_content
+            if url_errors:
+                extracted_info["url_errors"] = url_errors
+            result: IntentResult = {
+                "workflow": local["workflow"],
+                "confidence": local["confidence"],
+                "extracted_info": extracted_info,
+                "missing_info": self.missing_inputs(
+                    local["workflow"], user_input, {**(context or {}), **extracted_info}
+                ),
+                "clarification": "",
+                "source": SOURCE_LOCAL,
+            }
+            return result["workflow"], result
         
         prompt = f"""
         ユーザー入力: {user_input}
@@ -521,76 +303,149 @@ class YouTubeAIAgent:
         {{
             "workflow": "選択されたワークフローのキー",
             "confidence": 0.0-1.0,
-            "extracted_info": {{
-                "必要な情報のキー": "抽出された値"
-            }},
+            "extracted_info": [
+                {{"key": "必要な情報のキー", "value": "抽出された値"}}
+            ],
             "missing_info": ["不足している情報"],
             "clarification": "必要な場合の確認質問"
         }}
         """
         
+        workflow_keys = list(self.workflows.keys())
         try:
-            response = self.model.generate_content(prompt)
-            result = json.loads(response.text)
+            response_text = self._generate_text(
+                prompt, generation_config=build_intent_generation_config(workflow_keys)
+            )
+        except Exception:
+            record_intent_error()
+            return None, fallback_intent()
+        
+        try:
+            result = parse_intent_response(response_text, workflow_keys)
+        except IntentParseError:
+            return None, fallback_intent()
+        
+        if url_content:
+            result["extracted_info"]["url_content"] = url_content
+        if url_errors:
+            result["extracted_info"]["url_errors"] = url_errors
             
-            if url_content:
-                result["extracted_info"]["url_content"] = url_content
-                
-            return result["workflow"], result
-        except:
-            return None, {"confidence": 0, "clarification": "どのようなお手伝いをしましょうか？"}
+        return result["workflow"], result
+    
+    def missing_inputs(self, workflow_key: str, message: str, known: Dict[str, Any]) -> List[str]:
+        """ローカル判定時の不足情報（ワークフローの必要な入力のうち、依頼文にもコンテキストにもないもの）
+        
+        依頼文に定型句以外の内容があれば、それをプロンプトに添える（with_user_request）ので不足とはしない。
+        """
+        if self.intent_classifier.request_details(message, workflow_key):
+            return []
+        return [
+            label for key, label in required_inputs(self.workflows[workflow_key]).items()
+            if not known.get(key)
+        ]
+    
+    def _generate_text(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """Geminiで一括生成（レート制限・リトライ付き、同時に同じプロンプトなら1回にまとめる）"""
+        def call_upstream() -> str:
+            response = get_rate_limiter().call(
+                lambda: self.model.generate_content(prompt, generation_config=generation_config),
+                tokens=estimate_tokens(prompt)
+            )
+            return response.text
+        
+        key = make_cache_key(getattr(self.model, "model_name", ""), generation_config, prompt)
+        return get_singleflight().do(key, call_upstream)
+    
+    def generate_many(self, prompts: List[str], max_concurrency: Optional[int] = None,
+                      timeout: Optional[float] = None) -> List[str]:
+        """独立した複数のプロンプトを並列に生成（結果は入力と同じ順序）"""
+        results = self.async_client.run_many(prompts, max_concurrency=max_concurrency, timeout=timeout)
+        return [
+            f"エラーが発生しました: {str(r) or type(r).__name__}" if isinstance(r, BaseException) else r
+            for r in results
+        ]
+    
+    def generate_chunks(self, prompt: str, stream: bool = True) -> Iterator[str]:
+        """Geminiの応答をチャンク単位で返す（stream=Falseなら一括で1チャンク）"""
+        if not stream:
+            yield self._generate_text(prompt)
+            return
+        
+        responses = get_rate_limiter().call(
+            lambda: self.model.generate_content(prompt, stream=True), tokens=estimate_tokens(prompt)
+        )
+        for chunk in responses:
+            try:
+                text = chunk.text
+            except ValueError:
+                # 安全フィルタなどでテキストを含まないチャンクは読み飛ばす
+                continue
+            if text:
+                yield text
     
     def execute_workflow(self, workflow_key: str, context: Dict[str, Any]) -> str:
         """選択されたワークフローを実行"""
+        return "".join(self.execute_workflow_stream(workflow_key, context, stream=False))
+    
+    def execute_workflow_stream(self, workflow_key: str, context: Dict[str, Any], stream: bool = True) -> Iterator[str]:
+        """選択されたワークフローを実行し、応答をチャンク単位で返す"""
         if workflow_key not in self.workflows:
-            return "申し訳ございません。適切なワークフローが見つかりませんでした。"
+            yield "申し訳ございません。適切なワークフローが見つかりませんでした。"
+            return
         
         workflow = self.workflows[workflow_key]
         prompts = workflow["prompts"]
         
         # ワークフローに応じて適切なプロンプトを実行
         if workflow_key == "channel_concept":
-            return self.execute_channel_concept(prompts, context)
+            yield from self.execute_channel_concept_stream(prompts, context, stream=stream)
         else:
             # その他のワークフローは単一プロンプト実行
             main_prompt = prompts.get("main", "")
-            filled_prompt = self.fill_prompt_template(main_prompt, context)
+            filled_prompt = self.with_user_request(self.fill_prompt_template(main_prompt, context), context)
             
-            response = self.model.generate_content(filled_prompt)
-            return response.text
+            yield from self.generate_chunks(filled_prompt, stream=stream)
     
     def execute_channel_concept(self, prompts: Dict[str, str], context: Dict[str, Any]) -> str:
         """チャンネルコンセプト設計の実行"""
-        results = []
-        
-        # Step 1: 商品情報とキーワード抽出
-        step1_prompt = self.fill_prompt_template(prompts["step1"], context)
-        step1_result = self.model.generate_content(step1_prompt).text
-        results.append("### Step 1: 商品分析とキーワード抽出\n" + step1_result)
-        
-        # キーワードを抽出してコンテキストに追加
-        context["keywords"] = self.extract_keywords_from_text(step1_result)
-        
-        # Step 2: ペルソナ抽出
-        step2_prompt = self.fill_prompt_template(prompts["step2"], context)
-        step2_result = self.model.generate_content(step2_prompt).text
-        results.append("\n### Step 2: ペルソナ分析\n" + step2_result)
-        
-        context["personas"] = step2_result
-        
-        # Step 3: ゴールイメージ作成
-        step3_prompt = self.fill_prompt_template(prompts["step3"], context)
-        step3_result = self.model.generate_content(step3_prompt).text
-        results.append("\n### Step 3: ゴールイメージ設定\n" + step3_result)
-        
-        context["goals"] = step3_result
-        
-        # Step 4: コンセプト生成
-        step4_prompt = self.fill_prompt_template(prompts["step4"], context)
-        step4_result = self.model.generate_content(step4_prompt).text
-        results.append("\n### Step 4: チャンネルコンセプト案\n" + step4_result)
+        return "".join(self.execute_channel_concept_stream(prompts, context, stream=False))
+    
+    def execute_channel_concept_stream(self, prompts: Dict[str, str], context: Dict[str, Any], stream: bool = True) -> Iterator[str]:
+        """チャンネルコンセプト設計の実行（各ステップの結果を順次ストリーミング）"""
+        steps = [
+            ("step1", "### Step 1: 商品分析とキーワード抽出\n", "keywords"),
+            ("step2", "\n### Step 2: ペルソナ分析\n", "personas"),
+            ("step3", "\n### Step 3: ゴールイメージ設定\n", "goals"),
+            ("step4", "\n### Step 4: チャンネルコンセプト案\n", None),
+        ]
         
-        return "\n".join(results)
+        for step_key, header, context_key in steps:
+            step_prompt = self.fill_prompt_template(prompts[step_key], context)
+            if step_key == "step1":
+                step_prompt = self.with_user_request(step_prompt, context)
+            yield header
+            
+            step_chunks = []
+            for chunk in self.generate_chunks(step_prompt, stream=stream):
+                step_chunks.append(chunk)
+                yield chunk
+            step_result = "".join(step_chunks)
+            
+            # 次のステップで使う結果をコンテキストに追加
+            if context_key == "keywords":
+                context["keywords"] = self.extract_keywords_from_text(step_result)
+            elif context_key:
+                context[context_key] = step_result
+            
+            if step_key != "step4":
+                yield "\n"
+    
+    def with_user_request(self, prompt: str, context: Dict[str, Any]) -> str:
+        """ユーザーの元の依頼文をプロンプト末尾に添える（情報抽出をLLMに任せなかった場合の補完）"""
+        user_request = context.get("user_request")
+        if not user_request:
+            return prompt
+        return f"{prompt}\n        ユーザーの依頼: {user_request}\n"
     
     def fill_prompt_template(self, template: str, context: Dict[str, Any]) -> str:
         """プロンプトテンプレートに値を埋め込む"""
@@ -621,41 +476,57 @@ class YouTubeAIAgent:
     
     def process_message(self, message: str, context: Dict[str, Any]) -> str:
         """メッセージを処理してレスポンスを生成"""
+        return "".join(self.process_message_stream(message, context, stream=False))
+    
+    def process_message_stream(self, message: str, context: Dict[str, Any], stream: bool = True) -> Iterator[str]:
+        """メッセージを処理し、レスポンスをチャンク単位で返す"""
         
         # 意図分析
-        workflow_key, intent_result = self.analyze_intent(message)
+        workflow_key, intent_result = self.analyze_intent(message, context)
         
-        if intent_result["confidence"] > 0.7:
-            # 高信頼度でワークフローを実行
+        # 読み込めなかったURLは待たずに除外し、その旨を先に伝える
+        url_errors = intent_result["extracted_info"].get("url_errors")
+        if url_errors:
+            yield f"⚠️ 次のURLは読み込めなかったため、内容を使わずに進めます：\n{url_errors}\n\n"
+        
+        if should_run_workflow(intent_result):
+            # 高信頼度でワークフローを実行（ローカル判定は分類器の閾値で採否を決め済み）
             context.update(intent_result["extracted_info"])
+            context["user_request"] = message
             
             # 不足情報があれば確認
             if intent_result.get("missing_info"):
-                return f"""
+                yield f"""
                 {self.workflows[workflow_key]['name']}を実行します。
                 
                 追加で以下の情報を教えてください：
                 {chr(10).join(['・' + info for info in intent_result['missing_info']])}
                 """
+                return
             
             # ワークフロー実行
-            result = self.execute_workflow(workflow_key, context)
+            result_chunks = []
+            for chunk in self.execute_workflow_stream(workflow_key, context, stream=stream):
+                result_chunks.append(chunk)
+                yield chunk
             
             # コンテキストを保存
             st.session_state.context["last_workflow"] = workflow_key
-            st.session_state.context["last_result"] = result
-            
-            return result
+            st.session_state.context["last_result"] = "".join(result_chunks)
             
         elif intent_result.get("clarification"):
             # 確認が必要
-            return intent_result["clarification"]
+            yield intent_result["clarification"]
         else:
             # 一般的な会話として処理
-            return self.general_conversation(message, context)
+            yield from self.general_conversation_stream(message, context, stream=stream)
     
     def general_conversation(self, message: str, context: Dict[str, Any]) -> str:
         """一般的な会話処理"""
+        return "".join(self.general_conversation_stream(message, context, stream=False))
+    
+    def general_conversation_stream(self, message: str, context: Dict[str, Any], stream: bool = True) -> Iterator[str]:
+        """一般的な会話処理（チャンク単位）"""
         prompt = f"""
         あなたはYouTubeコンテンツ制作の専門AIアシスタントです。
         
@@ -671,8 +542,47 @@ class YouTubeAIAgent:
         フレンドリーで親しみやすいトーンで応答してください。
         """
         
-        response = self.model.generate_content(prompt)
-        return response.text
+        yield from self.generate_chunks(prompt, stream=stream)
+
+def guard_stream(chunks: Iterable[str]) -> Iterator[str]:
+    """チャンクをそのまま流し、途中で例外が出たらエラーの注記を最後のチャンクにして終える
+
+    描画済みの部分的な応答も、注記付きで会話履歴に残せるようにする。
+    """
+    try:
+        yield from chunks
+    except Exception as e:
+        yield f"\n\n⚠️ 応答の生成中にエラーが発生しました: {str(e) or type(e).__name__}"
+
+def render_stream(placeholder, chunks: Iterable[str],
+                  min_interval: float = STREAM_RENDER_INTERVAL,
+                  min_chars: int = STREAM_RENDER_CHARS) -> str:
+    """チャンクを受け取りながらプレースホルダーを間引いて再描画し、全文を返す"""
+    parts = []
+    pending = 0
+    last_render = 0.0
+    
+    for chunk in chunks:
+        parts.append(chunk)
+        pending += len(chunk)
+        now = time.perf_counter()
+        if now - last_render >= min_interval or pending >= min_chars:
+            placeholder.markdown("".join(parts) + "▌")
+            last_render = now
+            pending = 0
+    
+    text = "".join(parts)
+    placeholder.markdown(text)
+    return text
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_agent(fingerprint: str) -> YouTubeAIAgent:
+    """プロセス共通のエージェント（APIキーが変わると作り直す）"""
+    return YouTubeAIAgent()
+
+def invalidate_agent():
+    """キャッシュ済みのエージェントを破棄（次回のrerunで再構築）"""
+    get_agent.clear()
 
 # メイン画面
 def main():
@@ -680,8 +590,10 @@ def main():
     st.markdown('<h1 class="main-title">YouTube AI Agent</h1>', unsafe_allow_html=True)
     st.markdown('<p class="subtitle">次世代のYouTubeコンテンツ制作をAIがフルサポート</p>', unsafe_allow_html=True)
     
-    # エージェント初期化
-    agent = YouTubeAIAgent()
+    # エージェント初期化（構築は初回のみ、以降のrerunはキャッシュから取得）
+    started = time.perf_counter()
+    agent = get_agent(secrets_fingerprint())
+    agent_lookup_ms = (time.perf_counter() - started) * 1000
     
     if not agent.model:
         st.error("⚠️ Gemini APIキーが設定されていません")
@@ -706,8 +618,8 @@ def main():
             with st.chat_message(message["role"], avatar="🤖" if message["role"] == "assistant" else "👤"):
                 st.markdown(message["content"])
     
-    # 入力フィールド
-    if prompt := st.chat_input("メッセージを入力してください..."):
+    # 入力フィールド（サイドバーのボタンから送られた依頼も同じ経路で処理する）
+    if prompt := st.chat_input("メッセージを入力してください...") or st.session_state.pop("pending_prompt", None):
         # ユーザーメッセージ追加
         st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user", avatar="👤"):
@@ -717,18 +629,14 @@ def main():
         with st.chat_message("assistant", avatar="🤖"):
             message_placeholder = st.empty()
             
-            # タイピングアニメーション
+            chunks = guard_stream(agent.process_message_stream(
+                prompt, st.session_state.context, stream=st.session_state.streaming
+            ))
+            # 最初のチャンクが届くまでスピナーを表示
             with st.spinner("思考中..."):
-                response = agent.process_message(prompt, st.session_state.context)
+                first_chunk = next(chunks, "")
             
-            # レスポンスを段階的に表示（タイピング効果）
-            displayed_text = ""
-            for char in response:
-                displayed_text += char
-                message_placeholder.markdown(displayed_text + "▌")
-                time.sleep(0.01)
-            
-            message_placeholder.markdown(response)
+            response = render_stream(message_placeholder, itertools.chain([first_chunk], chunks))
         
         # アシスタントメッセージ追加
         st.session_state.messages.append({"role": "assistant", "content": response})
@@ -747,8 +655,7 @@ def main():
                 use_container_width=True,
                 help=workflow['description']
             ):
-                prompt = f"{workflow['name']}を実行してください"
-                st.session_state.messages.append({"role": "user", "content": prompt})
+                st.session_state.pending_prompt = f"{workflow['name']}を実行してください"
                 st.rerun()
         
         st.markdown("---")
@@ -767,16 +674,38 @@ def main():
         
         for example in examples:
             if st.button(example, key=f"example_{examples.index(example)}"):
-                st.session_state.messages.append({"role": "user", "content": example})
+                st.session_state.pending_prompt = example
                 st.rerun()
         
         st.markdown("---")
         
+        # 意図分析の解析状況
+        parse_stats = intent_parse_stats()
+        st.caption(
+            f"🧭 意図分析: ローカル判定 {parse_stats['local']} / 構造化 {parse_stats['structured']} "
+            f"/ フォールバック {parse_stats['fallback']} "
+            f"/ 解析失敗 {parse_stats['failures']} / 呼び出し失敗 {parse_stats['errors']}"
+        )
+        
         # コンテキスト表示
         if st.session_state.context:
             with st.expander("📊 現在のコンテキスト"):
                 st.json(st.session_state.context)
         
+        st.toggle(
+            "ストリーミング表示",
+            key="streaming",
+            help="生成されたテキストを届いた順に表示します"
+        )
+        
+        st.caption(
+            f"🚀 エージェント初期化: 構築 {agent.build_seconds * 1000:.1f} ms（初回のみ） "
+            f"/ 今回のrerun {agent_lookup_ms:.2f} ms"
+        )
+        if st.button("🔑 API設定を再読み込み", use_container_width=True):
+            invalidate_agent()
+            st.rerun()
+        
         # リセットボタン
         if st.button("🔄 会話をリセット", use_container_width=True):
             st.session_state.messages = []
@@ -0,0 +1,192 @@
+"""YouTubeAIAgent.analyze_intent用の構造化出力スキーマと応答パーサー
+
+Geminiにはresponse_mime_type="application/json"とスキーマを渡して構造化出力させる。
+それでもコードフェンスや前置きの文章が混ざった場合に備え、
+最初のJSONオブジェクトを取り出す寛容なフォールバックパーサーを用意する。
+"""
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, TypedDict
+
+
+class IntentResult(TypedDict):
+    """意図分析の結果"""
+    workflow: Optional[str]
+    confidence: float
+    extracted_info: Dict[str, str]
+    missing_info: List[str]
+    clarification: str
+    source: str
+
+
+class IntentParseError(ValueError):
+    """意図分析の応答からJSONを読み取れない"""
+
+
+DEFAULT_CLARIFICATION = "どのようなお手伝いをしましょうか？"
+
+# 判定元（sourceの値）
+SOURCE_LOCAL = "local"
+SOURCE_LLM = "llm"
+SOURCE_NONE = "none"
+
+# LLMの判定でワークフローを実行する確信度の下限（これ以下は確認か一般的な会話に回す）。
+# ローカル分類器の判定は、分類器自身の閾値（LOCAL_CONFIDENCE_THRESHOLD）を満たしたものだけが返る
+LLM_CONFIDENCE_THRESHOLD = 0.7
+
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+
+_stats_lock = threading.Lock()
+_parse_stats = {"local": 0, "structured": 0, "fallback": 0, "failures": 0, "errors": 0}
+
+
+def build_intent_schema(workflow_keys: Sequence[str]) -> Dict[str, Any]:
+    """Geminiのresponse_schemaに渡すスキーマ（workflowは既知のキーに限定）"""
+    return {
+        "type": "OBJECT",
+        "properties": {
+            "workflow": {"type": "STRING", "enum": list(workflow_keys)},
+            "confidence": {"type": "NUMBER"},
+            # 自由なキーを持つオブジェクトはスキーマで表せないため、キーと値の配列で受け取る
+            "extracted_info": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "key": {"type": "STRING"},
+                        "value": {"type": "STRING"},
+                    },
+                    "required": ["key", "value"],
+                },
+            },
+            "missing_info": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "clarification": {"type": "STRING"},
+        },
+        "required": ["workflow", "confidence"],
+    }
+
+
+def build_intent_generation_config(workflow_keys: Sequence[str]) -> Dict[str, Any]:
+    """analyze_intent用の生成設定"""
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": build_intent_schema(workflow_keys),
+    }
+
+
+def fallback_intent(clarification: str = DEFAULT_CLARIFICATION) -> IntentResult:
+    """意図を判定できなかった場合の結果"""
+    return {
+        "workflow": None,
+        "confidence": 0.0,
+        "extracted_info": {},
+        "missing_info": [],
+        "clarification": clarification,
+        "source": SOURCE_NONE,
+    }
+
+
+def extract_json_object(text: str) -> Dict[str, Any]:
+    """コードフェンスや前後の文章を取り除き、最初のJSONオブジェクトを返す"""
+    candidates = [m.group(1) for m in _FENCE_PATTERN.finditer(text)] + [text]
+    decoder = json.JSONDecoder()
+    for candidate in candidates:
+        start = candidate.find("{")
+        while start != -1:
+            try:
+                obj, _ = decoder.raw_decode(candidate, start)
+            except json.JSONDecodeError:
+                start = candidate.find("{", start + 1)
+                continue
+            if isinstance(obj, dict):
+                return obj
+            start = candidate.find("{", start + 1)
+    raise IntentParseError("応答にJSONオブジェクトが含まれていません")
+
+
+def _normalize_extracted_info(value: Any) -> Dict[str, str]:
+    if isinstance(value, dict):
+        return {str(k): str(v) for k, v in value.items()}
+    if isinstance(value, list):
+        info = {}
+        for item in value:
+            if isinstance(item, dict) and "key" in item:
+                info[str(item["key"])] = str(item.get("value", ""))
+        return info
+    return {}
+
+
+def _normalize(raw: Dict[str, Any], workflow_keys: Optional[Sequence[str]]) -> IntentResult:
+    workflow = raw.get("workflow")
+    try:
+        confidence = min(1.0, max(0.0, float(raw.get("confidence", 0))))
+    except (TypeError, ValueError):
+        confidence = 0.0
+    # 存在しないワークフローが返された場合は実行させない
+    if workflow_keys is not None and workflow not in workflow_keys:
+        workflow = None
+        confidence = 0.0
+
+    missing = raw.get("missing_info") or []
+    if isinstance(missing, str):
+        missing = [missing]
+
+    return {
+        "workflow": workflow,
+        "confidence": confidence,
+        "extracted_info": _normalize_extracted_info(raw.get("extracted_info")),
+        "missing_info": [str(m) for m in missing if m],
+        "clarification": str(raw.get("clarification") or ""),
+        "source": SOURCE_LLM,
+    }
+
+
+def parse_intent_response(text: str, workflow_keys: Optional[Sequence[str]] = None) -> IntentResult:
+    """意図分析の応答テキストをIntentResultに変換（失敗時はIntentParseError）"""
+    try:
+        raw = json.loads(text)
+        kind = "structured"
+    except (json.JSONDecodeError, TypeError):
+        raw = None
+        kind = "fallback"
+
+    if not isinstance(raw, dict):
+        try:
+            raw = extract_json_object(text or "")
+        except IntentParseError:
+            with _stats_lock:
+                _parse_stats["failures"] += 1
+            raise
+        kind = "fallback"
+
+    with _stats_lock:
+        _parse_stats[kind] += 1
+    return _normalize(raw, workflow_keys)
+
+
+def should_run_workflow(result: IntentResult) -> bool:
+    """判定結果のワークフローを実行してよいか（ローカル判定は閾値を満たしたものだけが返るのでそのまま実行）"""
+    if result["workflow"] is None:
+        return False
+    if result["source"] == SOURCE_LOCAL:
+        return True
+    return result["confidence"] > LLM_CONFIDENCE_THRESHOLD
+
+
+def record_local_intent():
+    """LLMを呼ばずにローカル分類器で判定した件数を数える"""
+    with _stats_lock:
+        _parse_stats["local"] += 1
+
+
+def record_intent_error():
+    """Gemini呼び出し自体の失敗を数える"""
+    with _stats_lock:
+        _parse_stats["errors"] += 1
+
+
+def intent_parse_stats() -> Dict[str, int]:
+    """ローカル判定・構造化出力・フォールバック・解析失敗・呼び出し失敗の件数"""
+    with _stats_lock:
+        return dict(_parse_stats)
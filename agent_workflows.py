@@ -0,0 +1,285 @@
+"""YouTube AI Agentのワークフロー定義（名前・説明・プロンプトテンプレート）
+
+エージェント本体と意図分類器の両方から参照するため、Streamlitに依存しないモジュールに置く。
+"""
+import re
+from typing import Any, Dict
+
+# プロンプト中の「見出し: {プレースホルダー}」の行
+_INPUT_LINE = re.compile(r"^\s*([^:：\n]+?)\s*[:：]\s*\{(\w+)\}", re.MULTILINE)
+
+# 全13種類のワークフロー定義
+AGENT_WORKFLOWS = {
+    "channel_concept": {
+        "name": "チャンネルコンセプト設計",
+        "description": "YouTubeチャンネルのコンセプトを設計し、SEOキーワードとペルソナに基づいた戦略を立案",
+        "icon": "🎯",
+        "prompts": {
+            "step1": """
+            #TASK_EXECUTION[TYPE=YouTubeチャンネル設計支援]
+            
+            Step1: ユーザー入力から販売商品情報を収集する。
+            商品情報: {product_info}
+            サービスURL: {service_url}
+            
+            Step2: 商品と関連性があり、検索ボリュームが高いYouTube SEOキーワードを30個抽出し、ボリューム順にランキング
+            """,
+            "step2": """
+            Step3: 上位3キーワードに対して、それぞれユーザーペルソナ像を3つずつ抽出
+            キーワード: {keywords}
+            """,
+            "step3": """
+            Step4: 合計9ペルソナから最も相関性の高い3ペルソナを選定
+            Step5: 3ペルソナが達成したい未来像（ゴールイメージ）を3つ作成
+            ペルソナ情報: {personas}
+            """,
+            "step4": """
+            Step6: 3つのゴールイメージとTOP3キーワードに基づいて、チャンネルコンセプト案を30個生成
+            タイトルは13文字以内、コンセプト名にはYouTube SEOキーワードを入れる
+            
+            ゴールイメージ: {goals}
+            キーワード: {keywords}
+            """
+        }
+    },
+    "video_marketing": {
+        "name": "動画マーケティング支援",
+        "description": "動画の内容からサムネイル文言とタイトルを生成",
+        "icon": "🎨",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=動画マーケティング支援]
+            
+            動画内容: {video_content}
+            チャンネル情報: {channel_info}
+            
+            Step1: 動画の内容を分析し、視聴者の興味を引くポイントを抽出
+            Step2: ペルソナ別に響くサムネイル文言を10パターン生成
+            Step3: SEO効果の高いタイトルを10パターン生成
+            Step4: クリック率を最大化する組み合わせTOP3を提案
+            """
+        }
+    },
+    "video_planning": {
+        "name": "動画企画生成＆SEO最適化",
+        "description": "SEOキーワードに基づいた動画企画とタイトル案を生成",
+        "icon": "📋",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=動画企画生成]
+            
+            キーワード: {keywords}
+            チャンネルテーマ: {channel_theme}
+            
+            Step1: キーワードの検索意図を分析
+            Step2: 競合動画の分析（想定）
+            Step3: 差別化できる動画企画を30個生成
+            Step4: 各企画のSEO効果とバイラル性を評価
+            Step5: TOP10企画の詳細な構成案を作成
+            """
+        }
+    },
+    "shorts_planning": {
+        "name": "YouTube Shorts企画生成",
+        "description": "ショート動画向けの企画案を大量生成し、ランキング評価",
+        "icon": "📱",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=Shorts企画生成]
+            
+            テーマ: {theme}
+            ターゲット: {target}
+            
+            Step1: Shortsのトレンドを分析
+            Step2: 60秒以内で完結する企画を50個生成
+            Step3: 各企画のフック力、完視聴率、バイラル性を評価
+            Step4: カテゴリー別にTOP企画をランキング
+            Step5: 制作優先順位と投稿スケジュールを提案
+            """
+        }
+    },
+    "shorts_script": {
+        "name": "Shorts台本生成",
+        "description": "最新トレンドを踏まえたショート動画台本を作成",
+        "icon": "📝",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=Shorts台本生成]
+            
+            企画: {plan}
+            キーワード: {keywords}
+            
+            Step1: 関連キーワードでナレッジを収集
+            Step2: 最初の3秒のフックを5パターン作成
+            Step3: 15秒ごとのシーン構成を設計
+            Step4: オチとCTAを最適化
+            Step5: 撮影・編集指示を含む完全台本を生成
+            """
+        }
+    },
+    "content_scoring": {
+        "name": "コンテンツスコアリング",
+        "description": "作成したコンテンツの品質を評価し、改善点をフィードバック",
+        "icon": "📊",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=コンテンツスコアリング]
+            
+            タイトル: {title}
+            サムネイル: {thumbnail}
+            説明文: {description}
+            
+            評価項目:
+            1. SEO最適化スコア（キーワード配置、密度）
+            2. クリック率予測（タイトル魅力度、サムネイル効果）
+            3. 視聴維持率予測（期待値管理、内容の一致度）
+            4. エンゲージメント予測（コメント誘発度、シェア可能性）
+            5. 総合スコアと改善提案
+            """
+        }
+    },
+    "keyword_strategy": {
+        "name": "キーワード戦略シミュレーション",
+        "description": "YouTube運用のためのキーワード戦略を多角的に分析・提案",
+        "icon": "🔍",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=キーワード戦略]
+            
+            ビジネス: {business}
+            目標: {goals}
+            
+            Step1: シードキーワードから関連キーワードを収集
+            Step2: キーワードの価値評価（検索数、競合性、収益性）
+            Step3: 3ヶ月、6ヶ月、12ヶ月のフェーズ別戦略
+            Step4: コンテンツカレンダーの作成
+            Step5: KPI設定と成功指標の定義
+            """
+        }
+    },
+    "long_script": {
+        "name": "長尺動画台本生成",
+        "description": "10-30分の詳細な動画台本を生成",
+        "icon": "🎬",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=長尺動画台本]
+            
+            トピック: {topic}
+            スタイル: {style}
+            
+            Step1: トピックに関するナレッジを体系的に整理
+            Step2: 視聴者の理解度に応じた構成を設計
+            Step3: チャプター別の詳細台本を作成
+            Step4: ビジュアル指示とB-roll提案
+            Step5: 編集指示を含む完全台本を生成
+            """
+        }
+    },
+    "competitor_analysis": {
+        "name": "競合チャンネル分析",
+        "description": "競合チャンネルを分析し、差別化戦略を提案",
+        "icon": "🔬",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=競合分析]
+            
+            競合チャンネル: {competitors}
+            自チャンネル: {own_channel}
+            
+            Step1: 競合の強み・弱みを分析
+            Step2: コンテンツギャップを特定
+            Step3: 差別化ポイントを抽出
+            Step4: 勝てる領域の特定
+            Step5: 具体的なアクションプランを提案
+            """
+        }
+    },
+    "trend_forecast": {
+        "name": "トレンド予測＆早期参入戦略",
+        "description": "今後のトレンドを予測し、早期参入戦略を立案",
+        "icon": "📈",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=トレンド予測]
+            
+            ジャンル: {genre}
+            現在のトレンド: {current_trends}
+            
+            Step1: 過去のトレンドパターンを分析
+            Step2: 新興トレンドの兆候を特定
+            Step3: 3-6ヶ月後のトレンド予測
+            Step4: 早期参入のためのコンテンツ戦略
+            Step5: リスクヘッジプランの策定
+            """
+        }
+    },
+    "monetization": {
+        "name": "収益化戦略立案",
+        "description": "チャンネルの収益化戦略を多角的に立案",
+        "icon": "💰",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=収益化戦略]
+            
+            チャンネル規模: {channel_size}
+            コンテンツタイプ: {content_type}
+            
+            Step1: 現在の収益化ポテンシャルを分析
+            Step2: 複数の収益源を特定（広告、スポンサー、商品等）
+            Step3: 各収益源の実装計画
+            Step4: 収益予測シミュレーション
+            Step5: 段階的な実行プランを作成
+            """
+        }
+    },
+    "community_building": {
+        "name": "コミュニティ構築戦略",
+        "description": "熱狂的なファンコミュニティを構築する戦略",
+        "icon": "👥",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=コミュニティ構築]
+            
+            チャンネルテーマ: {theme}
+            現在の規模: {current_size}
+            
+            Step1: コアファン層の特定
+            Step2: エンゲージメント施策の設計
+            Step3: コミュニティプラットフォームの選定
+            Step4: ファン参加型コンテンツの企画
+            Step5: 長期的な関係構築プランの策定
+            """
+        }
+    },
+    "collaboration": {
+        "name": "コラボレーション戦略",
+        "description": "他のクリエイターとの効果的なコラボ戦略",
+        "icon": "🤝",
+        "prompts": {
+            "main": """
+            #TASK_EXECUTION[TYPE=コラボ戦略]
+            
+            自チャンネル: {own_channel}
+            ターゲット層: {target_audience}
+            
+            Step1: コラボ候補者のリストアップ
+            Step2: 相乗効果の高い組み合わせを特定
+            Step3: アプローチ方法の設計
+            Step4: コラボ企画の立案
+            Step5: 実行スケジュールと期待効果の算出
+            """
+        }
+    }
+}
+
+
+def required_inputs(workflow: Dict[str, Any]) -> Dict[str, str]:
+    """ワークフローの実行に必要な入力（プレースホルダー名 → 見出し）
+
+    最初のプロンプト（mainかstep1）のプレースホルダーだけを数える。
+    以降のステップのものは前のステップの結果で埋まる。
+    """
+    prompts = workflow["prompts"]
+    entry = prompts.get("main") or prompts.get("step1", "")
+    return {key: label for label, key in _INPUT_LINE.findall(entry)}
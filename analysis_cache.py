@@ -0,0 +1,173 @@
+"""サービスURLごとのGemini分析結果の共有キャッシュ（正規化URL + 抽出内容のハッシュ）
+
+チャンネルコンセプト設計のStep 1では、サービスページの内容から「サービス分析」を作り、
+さらに商品情報と合わせて「キーワード抽出」を行う。同じクライアントのURLを別のメンバーが
+分析するたびに両方のGemini呼び出しが発生しないよう、結果を正規化したURLごとにSQLiteへ保存する。
+
+エントリには分析に使ったページ内容（タイトル・メタ説明・本文抜粋）のハッシュを持たせ、
+ページの内容が変わっていれば取得時に自動で無効にする。キーワード抽出は商品名・説明・ターゲットにも
+依存するので、その入力のハッシュが一致する場合だけ再利用する。
+"""
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from storage import open_sqlite
+
+# 使われないまま残ったエントリを削除するまでの秒数
+DEFAULT_RETENTION_SECONDS = int(os.getenv("ANALYSIS_CACHE_RETENTION_SECONDS", str(90 * 24 * 60 * 60)))
+
+# 内容を変えない計測用のクエリパラメータ
+_TRACKING_PARAMS = frozenset(["gclid", "fbclid", "yclid", "msclkid", "_ga", "ref"])
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url: str) -> str:
+    """キャッシュキー用にURLを正規化
+
+    スキーム・ホストの小文字化、既定ポート・フラグメント・utm_*などの計測用パラメータ・
+    末尾のスラッシュの除去、クエリのソートを行う（同じページを指すURLを同じキーにする）。
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/")
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def _digest(*parts: str) -> str:
+    payload = "\x1f".join(unicodedata.normalize("NFC", part or "").strip() for part in parts)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def content_hash(page) -> str:
+    """分析プロンプトに渡すページ内容（タイトル・メタ説明・本文抜粋）のハッシュ"""
+    return _digest(page.title, page.description, page.excerpt())
+
+
+def inputs_hash(*parts: str) -> str:
+    """キーワード抽出の入力（商品名・説明など）のハッシュ"""
+    return _digest(*parts)
+
+
+class AnalysisCache:
+    """URLごとのサービス分析・キーワード抽出結果のSQLiteキャッシュ"""
+
+    def __init__(self, filename: str = "service_analyses.sqlite3",
+                 retention_seconds: int = DEFAULT_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "keyword_hits": 0, "misses": 0, "invalidated": 0}
+        self._conn = open_sqlite(filename)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS service_analyses (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                service_analysis TEXT NOT NULL,
+                keyword_inputs TEXT,
+                extracted_keywords TEXT,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+
+    def get(self, url: str, page_hash: str, model: str) -> Optional[Dict[str, Any]]:
+        """保存済みの結果（service_analysis, keyword_inputs, extracted_keywords）
+
+        ページ内容かモデルが変わっていればエントリを削除してNoneを返す。
+        """
+        key = canonical_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, model, service_analysis, keyword_inputs, extracted_keywords "
+                "FROM service_analyses WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            if row[0] != page_hash or row[1] != model:
+                self._conn.execute("DELETE FROM service_analyses WHERE url = ?", (key,))
+                self._stats["invalidated"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE service_analyses SET last_access = ? WHERE url = ?", (now, key))
+            self._stats["hits"] += 1
+        return {"service_analysis": row[2], "keyword_inputs": row[3], "extracted_keywords": row[4]}
+
+    def keywords_for(self, entry: Optional[Dict[str, Any]], keyword_inputs: str) -> Optional[str]:
+        """getの結果から、入力が同じ場合のキーワード抽出結果を取り出す"""
+        if entry is None or not entry["extracted_keywords"] or entry["keyword_inputs"] != keyword_inputs:
+            return None
+        with self._lock:
+            self._stats["keyword_hits"] += 1
+        return entry["extracted_keywords"]
+
+    def put_analysis(self, url: str, page_hash: str, model: str, service_analysis: str):
+        """サービス分析を保存（以前のキーワード抽出結果は破棄）し、保持期間を過ぎたエントリを削除"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO service_analyses "
+                "(url, content_hash, model, service_analysis, keyword_inputs, extracted_keywords, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, NULL, NULL, ?, ?)",
+                (canonical_url(url), page_hash, model, service_analysis, now, now),
+            )
+            self._conn.execute("DELETE FROM service_analyses WHERE last_access < ?", (now - self.retention_seconds,))
+
+    def put_keywords(self, url: str, page_hash: str, keyword_inputs: str, extracted_keywords: str):
+        """同じページ内容の分析に対するキーワード抽出結果を保存"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE service_analyses SET keyword_inputs = ?, extracted_keywords = ?, last_access = ? "
+                "WHERE url = ? AND content_hash = ?",
+                (keyword_inputs, extracted_keywords, time.time(), canonical_url(url), page_hash),
+            )
+
+    def clear(self):
+        """全エントリを削除"""
+        with self._lock:
+            self._conn.execute("DELETE FROM service_analyses")
+
+    def stats(self) -> Dict[str, Any]:
+        """分析・キーワード抽出の再利用回数と保存件数"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM service_analyses").fetchone()[0]
+        return stats
+
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """プロセス共通の分析キャッシュを返す"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalysisCache()
+    return _cache
+
+
+def peek_analysis_cache() -> Optional[AnalysisCache]:
+    """作成済みならキャッシュを返す（統計表示のためだけにSQLiteを開かない）"""
+    return _cache
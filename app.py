@@ -10,56 +10,69 @@ st.set_page_config(
 
 import os
 import sys
+import time
+import uuid
 from datetime import datetime
-import json
-from typing import Dict, List, Any, Optional
-
-# デバッグ情報を表示
-st.write("Python version:", sys.version)
-st.write("Current working directory:", os.getcwd())
-
-# インストール済みパッケージを確認
-try:
-    from importlib.metadata import distributions
-    installed_packages = [dist.metadata['name'].lower() for dist in distributions()]
-    if "google-generativeai" in installed_packages:
-        st.success("google-generativeai is installed")
-    else:
-        st.error("google-generativeai is NOT installed")
-        st.write("Installed packages:", sorted(installed_packages)[:20])  # 最初の20個を表示
-except Exception as e:
-    st.error(f"Error checking packages: {e}")
-    # Fallback: 直接インポートを試す
-    try:
-        import google.generativeai
-        st.success("google-generativeai detected via direct import")
-    except ImportError:
-        st.error("google-generativeai is not available")
-
-# Google Generative AIをインポート
-try:
-    import google.generativeai as genai
-    st.success("Successfully imported google.generativeai")
-except ImportError as e:
-    st.error(f"Failed to import google.generativeai: {e}")
-    st.error("Trying alternative import...")
-    try:
-        import google.generativeai as genai
-    except Exception as e2:
-        st.error(f"Second attempt failed: {e2}")
-        genai = None
-
-from streamlit_option_menu import option_menu
-import requests
-import yaml
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+# 重いライブラリ（google.generativeai, pandas, plotly, yaml, requests）は
+# 使う箇所で遅延インポートし、起動と最初の描画を軽くする
 from dotenv import load_dotenv
 
+from gemini_client import AsyncGeminiClient
+from http_client import peek_http_client
+from keyword_sources import (
+    SYNTHETIC_SOURCE, YOUTUBE_SOURCE, SyntheticKeywordSource, build_keyword_sources, collect_keywords, mock_keywords
+)
+from keyword_crawler import CALL_BUDGET, FINISHED, KeywordCrawler, get_crawl_store, make_crawl_id
+from keyword_quota import QuotaExceeded, get_keyword_quota
+from keyword_table import KeywordTable, as_keyword_table
+from keyword_utils import dedupe_keywords
+from rate_limiter import estimate_tokens, get_rate_limiter
+from settings import get_secret, secrets_fingerprint
+from singleflight import get_singleflight
+from response_cache import get_response_cache, make_cache_key
+
 # Load environment variables
 load_dotenv()
 
+def is_debug_mode() -> bool:
+    """診断情報を表示するか（環境変数 APP_DEBUG=1 または URLに ?debug=1）"""
+    if os.getenv("APP_DEBUG", "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        return st.query_params.get("debug") == "1"
+    except Exception:
+        return False
+
+def render_debug_panel():
+    """実行環境の診断情報（デバッグモード時のみ）"""
+    with st.expander("🛠️ 診断情報", expanded=False):
+        st.write("Python version:", sys.version)
+        st.write("Current working directory:", os.getcwd())
+        
+        # インストール済みパッケージを確認（全パッケージを走査するため通常時は実行しない）
+        try:
+            from importlib.metadata import distributions
+            installed_packages = [dist.metadata['name'].lower() for dist in distributions()]
+            if "google-generativeai" in installed_packages:
+                st.success("google-generativeai is installed")
+            else:
+                st.error("google-generativeai is NOT installed")
+                st.write("Installed packages:", sorted(installed_packages)[:20])  # 最初の20個を表示
+        except Exception as e:
+            st.error(f"Error checking packages: {e}")
+        
+        try:
+            import google.generativeai  # noqa: F401
+            st.success("Successfully imported google.generativeai")
+        except ImportError as e:
+            st.error(f"Failed to import google.generativeai: {e}")
+        
+        loaded = [name for name in ("pandas", "plotly", "bs4", "yaml", "requests") if name in sys.modules]
+        st.write("読み込み済みの重いモジュール:", loaded or "なし")
+
 # Initialize session state
 if 'workflow_history' not in st.session_state:
     st.session_state.workflow_history = []
@@ -167,6 +180,12 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# キーワード一括取得の同時実行数（HTTPプールのホストごとの接続数以下にする）
+KEYWORD_FETCH_CONCURRENCY = int(os.getenv("KEYWORD_FETCH_CONCURRENCY", "8"))
+# 1回の収集で扱うシードキーワード数の上限
+MAX_SEED_KEYWORDS = 30
+MAX_CONCEPT_SEED_KEYWORDS = 10
+
 # Workflow definitions
 WORKFLOWS = {
     "channel_concept": {
@@ -219,101 +238,222 @@ WORKFLOWS = {
     }
 }
 
+def render_score_weight_controls(key: str) -> Dict[str, float]:
+    """機会スコアの重みを調整するスライダー"""
+    from keyword_scoring import DEFAULT_WEIGHTS, WEIGHT_LABELS
+    
+    with st.expander("⚖️ キーワードスコアの重み", expanded=False):
+        return {
+            name: st.slider(WEIGHT_LABELS[name], 0.0, 1.0, default, 0.05, key=f"{key}_weight_{name}")
+            for name, default in DEFAULT_WEIGHTS.items()
+        }
+
+
 class YouTubeWorkflowApp:
     def __init__(self):
+        started = time.perf_counter()
         self.setup_apis()
+        self._prompts: Optional[Dict] = None
+        self.build_seconds = time.perf_counter() - started
         
     def setup_apis(self):
         """APIの初期設定"""
         # Gemini API setup - Streamlit CloudのSecretsまたは環境変数から取得
-        gemini_api_key = None
-        
-        # Streamlit Cloudの場合
-        if "GEMINI_API_KEY" in st.secrets:
-            gemini_api_key = st.secrets["GEMINI_API_KEY"]
-        # ローカル環境の場合
-        else:
-            gemini_api_key = os.getenv("GEMINI_API_KEY")
+        gemini_api_key = get_secret("GEMINI_API_KEY")
             
+        self.model_name = 'gemini-2.0-flash-exp'
+        self.generation_config: Dict[str, Any] = {}
+        self.response_cache = get_response_cache()
+        self.async_client = AsyncGeminiClient(self._generate_text)
+
         if gemini_api_key:
+            import google.generativeai as genai
             genai.configure(api_key=gemini_api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model = genai.GenerativeModel(self.model_name, generation_config=self.generation_config or None)
         else:
             self.model = None
-            st.warning("⚠️ Gemini APIキーが設定されていません。アプリの機能が制限されます。")
             
         # Keyword Tool API setup
-        if "KEYWORD_TOOL_API_KEY" in st.secrets:
-            self.keyword_api_key = st.secrets["KEYWORD_TOOL_API_KEY"]
-        else:
-            self.keyword_api_key = os.getenv("KEYWORD_TOOL_API_KEY")
+        self.keyword_api_key = get_secret("KEYWORD_TOOL_API_KEY")
             
-        self.keyword_api_url = "https://api.keywordtool.io/v2/search/suggestions/youtube"
+        # キーワード戦略の「キーワード収集ソース」ごとのアダプター（YouTube検索は他のワークフローでも使用）
+        self.keyword_sources = build_keyword_sources(self.keyword_api_key)
+        self.keyword_cache = self.keyword_sources[YOUTUBE_SOURCE].cache
         
-    def get_keywords(self, keyword: str, country: str = "jp", language: str = "ja") -> List[Dict]:
+    def get_keywords(self, keyword: str, country: str = "jp", language: str = "ja") -> KeywordTable:
         """Keyword Tool APIを使用してキーワードを取得"""
-        if not self.keyword_api_key:
-            # モックデータを返す（API keyがない場合）
-            return self._get_mock_keywords(keyword)
+        keywords, error = self._fetch_keywords(keyword, country, language, get_quota_user())
+        if error:
+            st.error(error)
+        return KeywordTable.from_records(keywords)
             
-        params = {
-            "apikey": self.keyword_api_key,
-            "keyword": keyword,
-            "country": country,
-            "language": language,
-            "metrics": "true",
-            "output": "json"
-        }
-        
+    def get_keywords_many(self, seeds: List[str], country: str = "jp", language: str = "ja",
+                          max_workers: int = KEYWORD_FETCH_CONCURRENCY) -> KeywordTable:
+        """複数のシードキーワードを並列に検索し、重複を除いて統合（検索ボリューム順）
+
+        表記揺れだけが違うシードは1回の検索にまとめる。
+        """
+        unique_seeds = dedupe_keywords(seeds)
+        if not unique_seeds:
+            return KeywordTable()
+            
+        user = get_quota_user()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_seeds)))) as executor:
+            results = list(executor.map(lambda seed: self._fetch_keywords(seed, country, language, user), unique_seeds))
+            
+        # エラー表示はスクリプトスレッドでまとめて行う
+        errors = [error for _, error in results if error]
+        if errors:
+            st.error(f"{errors[0]}（{len(errors)}/{len(unique_seeds)}件のシードでエラー）")
+        return KeywordTable().merge(*(KeywordTable.from_records(keywords) for keywords, _ in results))
+            
+    def get_keywords_by_market(self, seeds: List[str], markets: List[Tuple[str, str, str]],
+                               max_workers: int = KEYWORD_FETCH_CONCURRENCY) -> Dict[str, Dict[str, KeywordTable]]:
+        """シード×マーケット（表示名, 国, 言語）を並列に検索し、マーケット→シード→結果の辞書で返す
+
+        get_keywordsと同じ経路（キャッシュ優先）なので、取得済みのマーケットはAPIを呼ばない。
+        """
+        unique_seeds = dedupe_keywords(seeds)
+        pairs = [(seed, market) for market in markets for seed in unique_seeds]
+        if not pairs:
+            return {}
+
+        user = get_quota_user()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pairs)))) as executor:
+            results = list(executor.map(
+                lambda pair: self._fetch_keywords(pair[0], pair[1][1], pair[1][2], user), pairs
+            ))
+
+        by_market: Dict[str, Dict[str, KeywordTable]] = {name: {} for name, _, _ in markets}
+        errors = []
+        for (seed, (name, _, _)), (keywords, error) in zip(pairs, results):
+            by_market[name][seed] = KeywordTable.from_records(keywords)
+            if error:
+                errors.append(f"{name}/{seed}: {error}")
+        # エラー表示はスクリプトスレッドでまとめて行う
+        if errors:
+            st.error(f"{errors[0]}（{len(errors)}/{len(pairs)}件でエラー）")
+        return by_market
+
+    def collect_keywords(self, seeds: List[str], source_names: List[str], country: str = "jp",
+                         language: str = "ja", synthetic_count: Optional[int] = None) -> KeywordTable:
+        """選択された収集ソースを並列に検索し、取得元付きで統合（検索ボリューム順）
+
+        synthetic_countを指定すると、合成データのソースはシードあたりその件数を返す。
+        """
+        unique_seeds = dedupe_keywords(seeds)
+        sources = [self.keyword_sources[name] for name in source_names if name in self.keyword_sources]
+        if synthetic_count:
+            # アプリオブジェクトは全セッション共通なので、件数を変えたソースはこの呼び出し専用に作る
+            sources = [
+                SyntheticKeywordSource(SYNTHETIC_SOURCE, synthetic_count) if source.name == SYNTHETIC_SOURCE else source
+                for source in sources
+            ]
+        if not unique_seeds or not sources:
+            return KeywordTable()
+            
+        table, report = collect_keywords(sources, unique_seeds, country, language, get_quota_user())
+        
+        # 失敗・タイムアウトの表示はスクリプトスレッドでまとめて行う
+        for name, entry in report.items():
+            if entry["errors"]:
+                st.warning(f"{name}: {len(entry['errors'])}件のシードで取得に失敗しました（{entry['errors'][0]}）")
+            if entry["timed_out"]:
+                st.warning(f"{name}: {entry['timed_out']}件のシードがタイムアウトしました")
+            if entry["degraded"]:
+                st.warning(f"{name}: APIの予算上限のため{entry['degraded']}件のシードは合成データを使用しました")
+        st.caption(" / ".join(f"{name} {entry['keywords']}件（{entry['seconds']:.1f}秒）" for name, entry in report.items()))
+        return table
+            
+    def make_keyword_crawler(self, seeds: List[str], max_depth: int = 2, max_calls: int = 50,
+                             max_seconds: float = 60.0, country: str = "jp", language: str = "ja",
+                             restart: bool = False) -> KeywordCrawler:
+        """シードから候補を再帰的に展開するクローラーを作成（同じ条件の前回のクロールがあれば続きから）"""
+        store = get_crawl_store()
+        crawl_id = make_crawl_id(seeds, country, language, max_depth)
+        if restart:
+            store.clear(crawl_id)
+        user = get_quota_user()
+        # 予算切れのノードはエラー扱いになり、再開時に再検索される
+        return KeywordCrawler(
+            lambda keyword: self._fetch_keywords(keyword, country, language, user),
+            seeds,
+            crawl_id,
+            store,
+            max_depth=max_depth,
+            max_calls=max_calls,
+            max_seconds=max_seconds,
+            concurrency=KEYWORD_FETCH_CONCURRENCY,
+        )
+            
+    def _fetch_keywords(self, keyword: str, country: str, language: str,
+                        user: str = "") -> Tuple[List[Dict], Optional[str]]:
+        """キーワードを取得（UI処理なし。失敗時・予算切れ時はモックデータとエラーメッセージを返す）"""
         try:
-            response = requests.get(self.keyword_api_url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("results", [])[:30]  # Top 30 keywords
-            else:
-                st.error(f"Keyword API Error: {response.status_code}")
-                return self._get_mock_keywords(keyword)
+            # キャッシュ優先（APIキーがない場合はモックデータ）
+            return self.keyword_sources[YOUTUBE_SOURCE].lookup(keyword, country, language, user), None
+        except QuotaExceeded as e:
+            return mock_keywords(keyword), f"{e}（キャッシュにない「{keyword}」は合成データを使用します）"
         except Exception as e:
-            st.error(f"Keyword API Error: {str(e)}")
-            return self._get_mock_keywords(keyword)
+            return mock_keywords(keyword), f"Keyword API Error: {str(e)}"
             
-    def _get_mock_keywords(self, keyword: str) -> List[Dict]:
-        """モックキーワードデータを生成"""
-        base_keywords = [
-            f"{keyword} やり方",
-            f"{keyword} 方法",
-            f"{keyword} 初心者",
-            f"{keyword} おすすめ",
-            f"{keyword} 比較",
-            f"{keyword} 2024",
-            f"{keyword} 始め方",
-            f"{keyword} コツ",
-            f"{keyword} 注意点",
-            f"{keyword} メリット"
-        ]
-        
-        return [
-            {
-                "keyword": kw,
-                "search_volume": 1000 + (i * 100),
-                "competition": round(0.3 + (i * 0.05), 2),
-                "cpc": round(50 + (i * 10), 2)
-            }
-            for i, kw in enumerate(base_keywords)
-        ]
-        
-    def generate_with_gemini(self, prompt: str) -> str:
-        """Gemini APIを使用してコンテンツを生成"""
+    def generate_with_gemini(self, prompt: str, use_cache: bool = True) -> str:
+        """Gemini APIを使用してコンテンツを生成（use_cache=Falseでキャッシュを迂回）"""
         if not self.model:
             return "⚠️ Gemini APIが設定されていません。環境変数 GEMINI_API_KEY を設定してください。"
             
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self._generate_text(prompt, use_cache=use_cache)
         except Exception as e:
             st.error(f"Gemini API Error: {str(e)}")
             return f"エラーが発生しました: {str(e)}"
             
+    def _generate_text(self, prompt: str, use_cache: bool = True) -> str:
+        """キャッシュを考慮してGeminiを呼び出す（例外はそのまま送出、UI処理なし）"""
+        cache_key = make_cache_key(self.model_name, self.generation_config, prompt)
+        if use_cache:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+        def call_upstream() -> str:
+            # プロセス共通のリミッターでクォータ待ち・429/503のリトライを行う
+            response = get_rate_limiter().call(
+                lambda: self.model.generate_content(prompt), tokens=estimate_tokens(prompt)
+            )
+            text = response.text
+            # 成功した応答のみキャッシュ
+            self.response_cache.set(cache_key, text)
+            return text
+            
+        # キャッシュ迂回（再生成）は実行中の同じプロンプトにも相乗りせず、必ず新しく呼び出す
+        if not use_cache:
+            return call_upstream()
+        # 同じプロンプトが実行中なら、その結果を待って共有する
+        return get_singleflight().do(cache_key, call_upstream)
+            
+    def generate_many(self, prompts: List[str], max_concurrency: Optional[int] = None,
+                      timeout: Optional[float] = None, use_cache: bool = True) -> List[str]:
+        """独立した複数のプロンプトを並列に生成（結果は入力と同じ順序）"""
+        if not self.model:
+            return [self.generate_with_gemini(p) for p in prompts]
+            
+        client = self.async_client if use_cache else AsyncGeminiClient(
+            lambda p: self._generate_text(p, use_cache=False), max_concurrency=self.async_client.max_concurrency
+        )
+        results = client.run_many(prompts, max_concurrency=max_concurrency, timeout=timeout)
+        
+        # 例外はメインスレッドでまとめて表示し、従来と同じエラー文字列に変換
+        texts = []
+        for result in results:
+            if isinstance(result, BaseException):
+                message = str(result) or type(result).__name__
+                st.error(f"Gemini API Error: {message}")
+                texts.append(f"エラーが発生しました: {message}")
+            else:
+                texts.append(result)
+        return texts
+            
     def save_to_history(self, workflow_type: str, data: Dict):
         """作業履歴を保存"""
         history_entry = {
@@ -325,12 +465,15 @@ class YouTubeWorkflowApp:
         st.session_state.current_data.update(data)
         
     def load_prompts(self) -> Dict:
-        """YAMLファイルからプロンプトを読み込む"""
-        try:
-            with open("prompts.yaml", "r", encoding="utf-8") as f:
-                return yaml.safe_load(f)
-        except FileNotFoundError:
-            return self._get_default_prompts()
+        """YAMLファイルからプロンプトを読み込む（初回のみ読み込み、以降は共有）"""
+        if self._prompts is None:
+            try:
+                import yaml
+                with open("prompts.yaml", "r", encoding="utf-8") as f:
+                    self._prompts = yaml.safe_load(f)
+            except FileNotFoundError:
+                self._prompts = self._get_default_prompts()
+        return self._prompts
             
     def _get_default_prompts(self) -> Dict:
         """デフォルトのプロンプトを返す"""
@@ -364,8 +507,42 @@ class YouTubeWorkflowApp:
             }
         }
 
+def get_quota_user() -> str:
+    """Keyword Tool APIの使用量を記録する利用者（ログイン中ならメールアドレス、なければセッションごとのID）
+
+    ワーカースレッドからは参照できないので、スクリプトスレッドで取得して渡すこと。
+    """
+    try:
+        user_info = getattr(st, "user", None) or getattr(st, "experimental_user", None)
+        email = user_info.get("email") if user_info is not None else None
+    except Exception:
+        # 認証を設定していない環境では参照できない
+        email = None
+    if email:
+        return email
+    if 'quota_user' not in st.session_state:
+        st.session_state.quota_user = f"session-{uuid.uuid4().hex[:8]}"
+    return st.session_state.quota_user
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_workflow_app(fingerprint: str) -> YouTubeWorkflowApp:
+    """プロセス共通のアプリオブジェクト（APIキーが変わると作り直す）"""
+    return YouTubeWorkflowApp()
+
+def invalidate_workflow_app():
+    """キャッシュ済みのアプリオブジェクトを破棄（次回のrerunで再構築）"""
+    get_workflow_app.clear()
+
 def main():
-    app = YouTubeWorkflowApp()
+    started = time.perf_counter()
+    app = get_workflow_app(secrets_fingerprint())
+    app_lookup_ms = (time.perf_counter() - started) * 1000
+    
+    if is_debug_mode():
+        render_debug_panel()
+    
+    if not app.model:
+        st.warning("⚠️ Gemini APIキーが設定されていません。アプリの機能が制限されます。")
     
     # Header
     st.markdown('<h1 class="main-header">🎬 YouTube Workflow AI Assistant</h1>', unsafe_allow_html=True)
@@ -430,7 +607,7 @@ def main():
                 if 'product_name' in st.session_state.current_data:
                     st.write(f"**商品名:** {st.session_state.current_data['product_name']}")
                 if 'keywords' in st.session_state.current_data:
-                    st.write(f"**選定キーワード:** {len(st.session_state.current_data.get('keywords', []))}個")
+                    st.write(f"**選定キーワード:** {len(as_keyword_table(st.session_state.current_data.get('keywords')))}個")
                 if 'channel_concept' in st.session_state.current_data:
                     st.write("**チャンネルコンセプト:** 作成済み")
                 if 'video_plans' in st.session_state.current_data:
@@ -470,6 +647,67 @@ def main():
                         st.rerun()
                 st.divider()
         
+        # 応答キャッシュの状況
+        cache_stats = app.response_cache.stats()
+        st.caption(
+            f"⚡ 応答キャッシュ: ヒット {cache_stats['hits']} / ミス {cache_stats['misses']} "
+            f"（{cache_stats['entries']}件保存）"
+        )
+        limiter_stats = get_rate_limiter().stats()
+        st.caption(
+            f"🚦 Gemini呼び出し: {limiter_stats['calls']}回 / リトライ {limiter_stats['retries']}回 "
+            f"/ 待機中 {limiter_stats['waiting']}件"
+        )
+        keyword_stats = app.keyword_cache.stats()
+        st.caption(
+            f"🔍 キーワードキャッシュ: ヒット {keyword_stats['hits']} / 期限切れ {keyword_stats['stale_hits']} "
+            f"/ ミス {keyword_stats['misses']}（{keyword_stats['entries']}件保存）"
+        )
+        if app.keyword_api_key:
+            quota_stats = get_keyword_quota().stats(get_quota_user())
+            budget = f"/{quota_stats['monthly_budget']}" if quota_stats['monthly_budget'] else ""
+            remaining = "無制限" if quota_stats['remaining'] is None else f"{quota_stats['remaining']}回"
+            st.caption(
+                f"🎫 Keyword APIクォータ: 今月 {quota_stats['month']}{budget}回 / 本日 {quota_stats['today']}回 "
+                f"（あなた {quota_stats['user_today']}回・残り {remaining}）"
+            )
+        flight_stats = get_singleflight().stats()
+        st.caption(f"🔗 重複リクエスト集約: {flight_stats['coalesced_calls']}回分の呼び出しを節約")
+        # 初期化コスト: 構築は初回（またはAPIキー変更時）のみ、以降のrerunは取得だけ
+        st.caption(
+            f"🚀 アプリ初期化: 構築 {app.build_seconds * 1000:.1f} ms（初回のみ） "
+            f"/ 今回のrerun {app_lookup_ms:.2f} ms"
+        )
+        # ページキャッシュはサービスURLを読んだ時に初めて読み込む（統計表示のためにimportしない）
+        page_cache_module = sys.modules.get("page_cache")
+        page_cache = page_cache_module.peek_page_cache() if page_cache_module else None
+        if page_cache is not None:
+            page_stats = page_cache.stats()
+            st.caption(
+                f"📄 ページキャッシュ: 期限内 {page_stats['fresh_hits']} / 304再検証 {page_stats['revalidated']} "
+                f"/ 取得 {page_stats['fetched']}（{page_stats['entries']}件保存）"
+            )
+        analysis_cache_module = sys.modules.get("analysis_cache")
+        analysis_cache = analysis_cache_module.peek_analysis_cache() if analysis_cache_module else None
+        if analysis_cache is not None:
+            analysis_stats = analysis_cache.stats()
+            st.caption(
+                f"🧠 サービス分析キャッシュ: 再利用 {analysis_stats['hits']}回（キーワード抽出 "
+                f"{analysis_stats['keyword_hits']}回）/ 内容変更で無効化 {analysis_stats['invalidated']}回 "
+                f"（{analysis_stats['entries']}件保存）"
+            )
+        http_client = peek_http_client()
+        if http_client is not None:
+            http_stats = http_client.stats()
+            reused = sum(p["requests"] - p["connections_opened"] for p in http_stats["pools"].values())
+            st.caption(
+                f"🌐 HTTP: {http_stats['requests']}件 / エラー {http_stats['errors']}件 "
+                f"/ 接続再利用 {reused}回（{len(http_stats['pools'])}ホスト）"
+            )
+        if st.button("🔑 API設定を再読み込み", use_container_width=True):
+            invalidate_workflow_app()
+            st.rerun()
+        
         # データクリアボタン
         if st.button("🗑️ セッションデータをクリア", use_container_width=True):
             st.session_state.current_data = {}
@@ -493,103 +731,65 @@ def handle_channel_concept_workflow(app: YouTubeWorkflowApp):
         
         if st.button("次へ →", type="primary", use_container_width=True):
             if product_name and service_url:
-                with st.spinner("サービスページを分析中..."):
-                    # サービスURLからコンテンツを取得
-                    if service_url and service_url.startswith("http"):
-                        # WebFetchを使用してサービスページを読み取る
-                        try:
-                            # WebFetch関数を定義していない場合の代替実装
-                            fetch_prompt = f"""
-                            以下のURLのWebページにアクセスして、内容を詳しく分析してください：
-                            {service_url}
-                            
-                            この分析は学習塾や教育サービスのページの可能性が高いです。
-                            ページの実際の内容を正確に読み取り、以下を抽出してください：
-                            
-                            1. サービス名・会社名
-                            2. 提供しているサービスの詳細（学習塾なら科目、対象学年など）
-                            3. 特徴・強み
-                            4. 料金体系
-                            5. 対象顧客（生徒・保護者など）
-                            """
-                            
-                            # requestsを使用してページ内容を取得
-                            import requests
-                            from bs4 import BeautifulSoup
-                            
-                            try:
-                                response = requests.get(service_url, timeout=10)
-                                soup = BeautifulSoup(response.text, 'html.parser')
-                                
-                                # タイトルとメタ情報を抽出
-                                title = soup.find('title').text if soup.find('title') else ''
-                                meta_desc = soup.find('meta', {'name': 'description'})
-                                description = meta_desc.get('content', '') if meta_desc else ''
-                                
-                                # 本文テキストを抽出（最初の1000文字）
-                                text_content = soup.get_text()[:1000]
-                                
-                                analysis_prompt = f"""
-                                Webページの分析結果：
-                                タイトル: {title}
-                                説明: {description}
-                                本文抜粋: {text_content}
-                                
-                                上記の内容から、このサービスについて分析してください：
-                                1. サービスの種類（学習塾、教育サービスなど具体的に）
-                                2. 提供価値
-                                3. ターゲット顧客
-                                4. YouTube動画で訴求すべきポイント
-                                5. 関連するキーワード候補20個
-                                """
-                                
-                                service_analysis = app.generate_with_gemini(analysis_prompt)
-                                st.session_state.current_data['service_analysis'] = service_analysis
-                                
-                            except Exception as e:
-                                st.warning(f"ページの読み取りに失敗しました: {e}")
-                                # URLが読み取れない場合は、商品説明から分析
-                                fallback_prompt = f"""
-                                商品名: {product_name}
-                                説明: {product_description}
-                                
-                                上記の情報から推測して分析してください。
-                                """
-                                service_analysis = app.generate_with_gemini(fallback_prompt)
-                                st.session_state.current_data['service_analysis'] = service_analysis
-                                
-                        except Exception as e:
-                            st.error(f"サービス分析エラー: {e}")
-                            st.session_state.current_data['service_analysis'] = "分析失敗"
-                    
-                    # 商品情報とサービス分析から自動的にキーワードを抽出
-                    keyword_extraction_prompt = f"""
-                    商品名: {product_name}
-                    サービス説明: {product_description}
-                    サービス分析: {st.session_state.current_data.get('service_analysis', '')}
-                    
-                    この商品・サービスに関連するYouTube SEOキーワードを30個抽出してください。
-                    以下のカテゴリーで分類してください：
-                    1. 主要キーワード（商品名・サービス名に直接関連）
-                    2. 問題解決キーワード（ユーザーの悩み・課題）
-                    3. ハウツーキーワード（使い方・やり方）
-                    4. 比較キーワード（他社比較・選び方）
-                    5. トレンドキーワード（最新・2024年など）
-                    """
-                    
-                    extracted_keywords = app.generate_with_gemini(keyword_extraction_prompt)
+                # ページ取得→サービス分析と、商品情報だけのキーワード抽出を並列に進め、届いた順に表示する
+                # （同じURL・同じページ内容の分析は全セッションで共有し、内容が変われば自動で無効）
+                from analysis_cache import get_analysis_cache
+                from concept_pipeline import ANALYSIS, BASE_KEYWORDS, KEYWORDS, PAGE, ConceptPipeline
+                from page_cache import fetch_page_cached
+                
+                pipeline = ConceptPipeline(
+                    product_name, product_description, target_audience, service_url,
+                    # Gemini未設定時は案内文が返るので、共有キャッシュには保存しない
+                    generate_fn=app._generate_text if app.model else app.generate_with_gemini,
+                    fetch_fn=fetch_page_cached,
+                    cache=get_analysis_cache(),
+                    model=app.model_name,
+                    store=app.model is not None,
+                )
+                service_analysis = ""
+                extracted_keywords = ""
+                with st.status("サービスページを分析中...", expanded=True) as status:
+                    for event in pipeline.run():
+                        source = "（保存済みの結果）" if event.cached else ""
+                        if not event.ok:
+                            if event.stage == PAGE:
+                                st.warning(f"ページの読み取りに失敗しました: {event.error}（商品情報から推測して分析します）")
+                            else:
+                                st.error(f"Gemini API Error: {event.error}")
+                        elif event.stage == PAGE:
+                            st.write(f"📄 ページを読み込みました: {event.value.title or service_url}（{event.seconds:.1f}秒）")
+                        elif event.stage == BASE_KEYWORDS:
+                            st.write(f"🔑 商品情報からキーワードを抽出しました（{event.seconds:.1f}秒）")
+                            st.caption(event.value[:200])
+                        elif event.stage == ANALYSIS:
+                            st.write(f"🔍 サービス分析が完了しました{source}（{event.seconds:.1f}秒）")
+                            st.caption(event.value[:200])
+                        
+                        if event.stage == ANALYSIS:
+                            service_analysis = event.value if event.ok else f"エラーが発生しました: {event.error}"
+                        elif event.stage == KEYWORDS:
+                            extracted_keywords = event.value if event.ok else f"エラーが発生しました: {event.error}"
                     
-                    data = {
-                        "product_name": product_name,
-                        "service_url": service_url,
-                        "target_audience": target_audience,
-                        "product_description": product_description,
-                        "service_analysis": st.session_state.current_data.get('service_analysis', ''),
-                        "extracted_keywords": extracted_keywords
-                    }
-                    app.save_to_history("channel_concept", data)
-                    st.session_state.workflow_step = 1
-                    st.rerun()
+                    if pipeline.analysis_pending:
+                        st.info("サービス分析は引き続き実行し、Step 2で反映します")
+                    status.update(label=f"分析完了（{pipeline.results[KEYWORDS].seconds:.1f}秒）", state="complete")
+                
+                data = {
+                    "product_name": product_name,
+                    "service_url": service_url,
+                    "target_audience": target_audience,
+                    "product_description": product_description,
+                    "service_analysis": service_analysis,
+                    "extracted_keywords": extracted_keywords
+                }
+                app.save_to_history("channel_concept", data)
+                if pipeline.analysis_pending:
+                    # 履歴のエントリも後から更新できるよう、保存したdataと一緒に持っておく
+                    st.session_state.concept_pipeline = {"pipeline": pipeline, "data": data}
+                else:
+                    st.session_state.pop("concept_pipeline", None)
+                st.session_state.workflow_step = 1
+                st.rerun()
             else:
                 st.error("商品・サービス名とURLは必須項目です")
                 
@@ -597,6 +797,33 @@ def handle_channel_concept_workflow(app: YouTubeWorkflowApp):
         # Step 2: キーワード分析（自動実行）
         st.markdown("### Step 2: キーワード分析")
         
+        # Step 1で待ちきれなかったサービス分析を受け取り、ページ由来のキーワードを統合し直す
+        pending = st.session_state.pop("concept_pipeline", None)
+        if pending is not None:
+            from concept_pipeline import ANALYSIS, PAGE
+            from gemini_client import DEFAULT_TIMEOUT_SECONDS
+            
+            pipeline = pending["pipeline"]
+            with st.spinner("サービス分析の完了を待っています..."):
+                keywords_event = pipeline.finish(timeout=DEFAULT_TIMEOUT_SECONDS)
+            if keywords_event is None:
+                st.warning("サービス分析が時間内に完了しなかったため、商品情報のキーワードだけで進めます")
+            else:
+                page_event = pipeline.results.get(PAGE)
+                if page_event is not None and not page_event.ok:
+                    st.warning(f"ページの読み取りに失敗しました: {page_event.error}（商品情報から推測して分析しました）")
+                analysis_event = pipeline.results[ANALYSIS]
+                if not analysis_event.ok:
+                    st.error(f"Gemini API Error: {analysis_event.error}")
+                update = {
+                    "service_analysis": analysis_event.value if analysis_event.ok
+                    else f"エラーが発生しました: {analysis_event.error}",
+                }
+                if keywords_event.ok:
+                    update["extracted_keywords"] = keywords_event.value
+                pending["data"].update(update)
+                st.session_state.current_data.update(update)
+        
         # 前のステップで抽出されたキーワードを表示
         st.info("Step 1で抽出されたキーワード候補:")
         st.write(st.session_state.current_data.get('extracted_keywords', ''))
@@ -607,7 +834,7 @@ def handle_channel_concept_workflow(app: YouTubeWorkflowApp):
                 # 抽出されたキーワードから主要なものを自動選択
                 extracted_keywords_text = st.session_state.current_data.get('extracted_keywords', '')
                 
-                # キーワードリストから最初の3つの主要キーワードを抽出
+                # キーワードリストから主要キーワードを抽出
                 keyword_list = []
                 for line in extracted_keywords_text.split('\n'):
                     if any(word in line for word in ['1.', '2.', '3.', '-', '・']):
@@ -615,14 +842,19 @@ def handle_channel_concept_workflow(app: YouTubeWorkflowApp):
                         keyword = keyword.replace('-', '').replace('・', '').strip()
                         if keyword and len(keyword) > 1:
                             keyword_list.append(keyword)
-                            if len(keyword_list) >= 3:
+                            if len(keyword_list) >= MAX_CONCEPT_SEED_KEYWORDS:
                                 break
                 
-                # 各キーワードについてAPI検索を実行
-                all_keywords = []
-                for kw in keyword_list[:3]:
-                    keywords = app.get_keywords(kw)
-                    all_keywords.extend(keywords)
+                # 各キーワードのAPI検索を並列に実行し、重複を除いて統合
+                all_keywords = app.get_keywords_many(keyword_list)
+                
+                # 表記揺れをまとめてから機会スコアで順位付けし、Geminiには上位30クラスタの解説だけを依頼
+                from keyword_clustering import cluster_keywords
+                from keyword_scoring import rank_indices
+                clusters = cluster_keywords(all_keywords)
+                order, scores = rank_indices(clusters.representatives, keyword_list, top_k=30)
+                ranked_clusters = clusters.take(order.tolist())
+                ranked_keywords = ranked_clusters.representatives
                 
                 # Geminiでの分析
                 prompt = f"""
@@ -635,15 +867,15 @@ def handle_channel_concept_workflow(app: YouTubeWorkflowApp):
                 抽出されたキーワード候補:
                 {st.session_state.current_data.get('extracted_keywords')}
                 
-                API検索結果:
-                {json.dumps(all_keywords[:30], ensure_ascii=False, indent=2)}
+                機会スコア順の上位キーワード（表記揺れはvariantsにまとめ、検索ボリュームは合算済み。スコアは検索ボリューム・競合性・CPC・関連性から算出済み）:
+                {ranked_clusters.to_prompt(scores=scores)}
                 
-                YouTube SEOに最適な上位30個のキーワードを選定し、以下の形式で出力してください：
+                上記の順位はスコアで確定済みです。順位は変えずに、YouTube SEOの観点から各キーワードを解説し、以下の形式で出力してください：
                 
                 【最重要キーワード TOP3】
-                1. キーワード名 - 推定月間検索数 - 商品との関連性スコア(10点満点) - 選定理由
-                2. キーワード名 - 推定月間検索数 - 商品との関連性スコア(10点満点) - 選定理由
-                3. キーワード名 - 推定月間検索数 - 商品との関連性スコア(10点満点) - 選定理由
+                1. キーワード名 - 月間検索数 - 機会スコア - 商品との関連性(10点満点) - 選定理由
+                2. キーワード名 - 月間検索数 - 機会スコア - 商品との関連性(10点満点) - 選定理由
+                3. キーワード名 - 月間検索数 - 機会スコア - 商品との関連性(10点満点) - 選定理由
                 
                 【サポートキーワード（4-30位）】
                 各キーワードについて同様の形式で記載
@@ -652,14 +884,10 @@ def handle_channel_concept_workflow(app: YouTubeWorkflowApp):
                 result = app.generate_with_gemini(prompt)
                 st.session_state.current_data['keywords_analysis'] = result
                 # キーワードデータを正しく保存
-                if all_keywords and len(all_keywords) > 0:
-                    st.session_state.current_data['keywords'] = all_keywords[:3] if len(all_keywords) >= 3 else all_keywords
-                    st.session_state.current_data['all_keywords'] = all_keywords[:30] if len(all_keywords) >= 30 else all_keywords
-                    st.session_state.current_data['top_keywords_text'] = ', '.join([kw.get('keyword', '') for kw in all_keywords[:3] if isinstance(kw, dict)])
-                else:
-                    st.session_state.current_data['keywords'] = []
-                    st.session_state.current_data['all_keywords'] = []
-                    st.session_state.current_data['top_keywords_text'] = ''
+                st.session_state.current_data['keywords'] = ranked_keywords[:3]
+                st.session_state.current_data['all_keywords'] = ranked_keywords
+                st.session_state.current_data['keyword_scores'] = scores.tolist()
+                st.session_state.current_data['top_keywords_text'] = ', '.join(ranked_keywords.keywords(3))
                 
                 # 結果表示
                 st.markdown('<div class="result-box">', unsafe_allow_html=True)
@@ -668,11 +896,14 @@ def handle_channel_concept_workflow(app: YouTubeWorkflowApp):
                 st.markdown('</div>', unsafe_allow_html=True)
                 
                 # キーワードチャート
-                if keywords:
-                    df = pd.DataFrame(keywords[:10])
-                    fig = px.bar(df, x='keyword', y='search_volume', 
-                                title='キーワード検索ボリューム Top 10',
-                                labels={'search_volume': '月間検索数', 'keyword': 'キーワード'})
+                if ranked_keywords:
+                    import plotly.express as px
+                    
+                    df = ranked_keywords.to_dataframe(10)
+                    df['opportunity_score'] = scores[:10]
+                    fig = px.bar(df, x='keyword', y='search_volume', color='opportunity_score',
+                                title='機会スコア上位10キーワードの検索ボリューム',
+                                labels={'search_volume': '月間検索数', 'keyword': 'キーワード', 'opportunity_score': '機会スコア'})
                     st.plotly_chart(fig, use_container_width=True)
         
         col1, col2 = st.columns(2)
@@ -695,7 +926,8 @@ def handle_channel_concept_workflow(app: YouTubeWorkflowApp):
         if st.button("ペルソナ分析実行", type="primary"):
             with st.spinner("ペルソナを分析中..."):
                 prompt = f"""
-                上位3キーワード: {st.session_state.current_data.get('keywords', [])}
+                上位3キーワード:
+                {as_keyword_table(st.session_state.current_data.get('keywords')).to_prompt()}
                 商品情報: {st.session_state.current_data.get('product_description')}
                 
                 各キーワードに対して、検索する可能性の高いユーザーペルソナを3つずつ（計9つ）作成してください。
@@ -740,7 +972,8 @@ def handle_channel_concept_workflow(app: YouTubeWorkflowApp):
             with st.spinner("コンセプトを生成中..."):
                 prompt = f"""
                 選定した3つのペルソナ: {st.session_state.current_data.get('personas_analysis')}
-                TOP3キーワード: {st.session_state.current_data.get('keywords', [])}
+                TOP3キーワード:
+                {as_keyword_table(st.session_state.current_data.get('keywords')).to_prompt()}
                 商品情報: {st.session_state.current_data.get('product_description')}
                 
                 以下の条件でチャンネルコンセプト案を30個生成してください：
@@ -813,9 +1046,9 @@ def handle_video_marketing_workflow(app: YouTubeWorkflowApp):
         
         # 前のワークフローからのデータを自動取得
         if 'keywords' in st.session_state.current_data:
-            top_keywords = st.session_state.current_data.get('keywords', [])
-            if top_keywords and isinstance(top_keywords, list) and len(top_keywords) > 0:
-                default_keywords = top_keywords[0].get('keyword', '') if isinstance(top_keywords[0], dict) else ''
+            top_keywords = as_keyword_table(st.session_state.current_data.get('keywords'))
+            if top_keywords:
+                default_keywords = top_keywords.keyword[0]
             else:
                 default_keywords = ''
         else:
@@ -1111,12 +1344,15 @@ def handle_video_planning_workflow(app: YouTubeWorkflowApp):
         
         if st.button("競合分析実行", type="primary"):
             with st.spinner("キーワードと競合を分析中..."):
-                # キーワード取得
-                keywords = app.get_keywords(search_keyword)
+                # キーワード取得（表記揺れはまとめて代表キーワードだけを使う）
+                from keyword_clustering import cluster_keywords
+                clusters = cluster_keywords(app.get_keywords(search_keyword))
+                keywords = clusters.representatives
                 
                 prompt = f"""
                 メインキーワード: {st.session_state.current_data.get('main_keyword')}
-                関連キーワード: {json.dumps(keywords[:10], ensure_ascii=False, indent=2)}
+                関連キーワード:
+                {clusters.to_prompt(10)}
                 チャンネルテーマ: {st.session_state.current_data.get('channel_theme')}
                 
                 以下を分析してください：
@@ -1152,8 +1388,9 @@ def handle_video_planning_workflow(app: YouTubeWorkflowApp):
                 
                 # キーワードチャート
                 if keywords:
-                    df = pd.DataFrame(keywords[:10])
-                    fig = px.scatter(df, x='search_volume', y='competition', 
+                    import plotly.express as px
+                    
+                    fig = px.scatter(keywords.to_dataframe(10), x='search_volume', y='competition', 
                                     text='keyword', size='search_volume',
                                     title='キーワード分析（検索ボリューム vs 競合性）',
                                     labels={'search_volume': '月間検索数', 'competition': '競合性'})
@@ -1352,13 +1589,16 @@ def handle_shorts_planning_workflow(app: YouTubeWorkflowApp):
         
         if st.button("市場分析実行", type="primary"):
             with st.spinner("Shorts市場を分析中..."):
-                # キーワード分析
-                keywords = app.get_keywords(st.session_state.current_data.get("target_keywords"))
+                # キーワード分析（表記揺れはまとめて代表キーワードだけを使う）
+                from keyword_clustering import cluster_keywords
+                clusters = cluster_keywords(app.get_keywords(st.session_state.current_data.get("target_keywords")))
+                keywords = clusters.representatives
                 
                 prompt = f"""
                 Shortsテーマ: {st.session_state.current_data.get('shorts_theme')}
                 キーワード: {st.session_state.current_data.get('target_keywords')}
-                関連キーワード: {json.dumps(keywords[:10], ensure_ascii=False, indent=2)}
+                関連キーワード:
+                {clusters.to_prompt(10)}
                 ターゲット層: {st.session_state.current_data.get('target_age')}
                 
                 YouTube Shortsの市場分析を行ってください：
@@ -1643,10 +1883,8 @@ def handle_shorts_script_workflow(app: YouTubeWorkflowApp):
         # 既存のキーワードデータを活用
         available_keywords = []
         if 'keywords' in st.session_state.current_data:
-            keywords_data = st.session_state.current_data.get('keywords', [])
-            for kw in keywords_data[:5]:
-                if isinstance(kw, dict):
-                    available_keywords.append(kw.get('keyword', ''))
+            keywords_data = as_keyword_table(st.session_state.current_data.get('keywords'))
+            available_keywords = keywords_data.keywords(5)
         
         # 利用可能なデータを表示
         with st.expander("📊 利用可能なデータ", expanded=True):
@@ -2298,19 +2536,42 @@ def handle_keyword_strategy_workflow(app: YouTubeWorkflowApp):
         
         keyword_sources = st.multiselect(
             "キーワード収集ソース",
-            ["YouTube検索", "Google検索", "競合分析", "トレンド分析", "関連キーワード"],
+            list(app.keyword_sources),
             default=["YouTube検索", "関連キーワード"]
         )
         
+        synthetic_count = None
+        if SYNTHETIC_SOURCE in keyword_sources:
+            # APIキーなしで大規模データの挙動（グラフ・スコアリング・プロンプト）を確認する
+            synthetic_count = st.select_slider(
+                "合成データの件数（シードあたり）",
+                options=[10, 100, 1_000, 10_000, 100_000],
+                value=1_000
+            )
+        
+        score_weights = render_score_weight_controls("keyword_strategy")
+        
         if st.button("キーワード収集実行", type="primary"):
             with st.spinner("キーワードを収集・分析中..."):
-                # 各シードキーワードでキーワード収集
-                all_keywords = []
+                # 各シードキーワードを並列に検索し、重複を除いて統合
                 seed_list = [k.strip() for k in seed_keywords.split(",") if k.strip()]
+                if len(seed_list) > MAX_SEED_KEYWORDS:
+                    st.info(f"シードキーワードは最初の{MAX_SEED_KEYWORDS}個を使用します")
+                all_keywords = app.collect_keywords(
+                    seed_list[:MAX_SEED_KEYWORDS], keyword_sources or [YOUTUBE_SOURCE], synthetic_count=synthetic_count
+                )
                 
-                for seed in seed_list[:3]:  # 最初の3つのシードキーワード
-                    keywords = app.get_keywords(seed)
-                    all_keywords.extend(keywords)
+                # 収集した全キーワードの表記揺れをまとめ、機会スコアで順位付け（Geminiには上位30クラスタの解説を依頼）
+                from keyword_clustering import cluster_keywords
+                from keyword_scoring import rank_indices
+                clusters = cluster_keywords(all_keywords)
+                order, scores = rank_indices(clusters.representatives, seed_list, score_weights, top_k=30)
+                ranked_clusters = clusters.take(order.tolist())
+                ranked_keywords = ranked_clusters.representatives
+                st.caption(
+                    f"{len(all_keywords)}件のキーワードを{len(clusters)}クラスタにまとめてスコアリングし、"
+                    f"上位{len(ranked_keywords)}件を分析します"
+                )
                 
                 prompt = f"""
                 ビジネス情報:
@@ -2320,9 +2581,10 @@ def handle_keyword_strategy_workflow(app: YouTubeWorkflowApp):
                 - 目標: {st.session_state.current_data.get('channel_goals')}
                 
                 シードキーワード: {seed_keywords}
-                収集されたキーワード: {json.dumps(all_keywords[:30], ensure_ascii=False, indent=2)}
+                機会スコア順の上位キーワード（表記揺れはvariantsにまとめ、検索ボリュームは合算済み。スコアは検索ボリューム・競合性・CPC・シードとの関連性から算出済み）:
+                {ranked_clusters.to_prompt(scores=scores)}
                 
-                以下の分析を実施してください：
+                順位はスコアで確定済みです。順位付けはやり直さず、上記のキーワードについて以下の分析を実施してください：
                 
                 1. キーワード分類
                    - カテゴリー別に分類（購買意欲、情報収集、エンタメなど）
@@ -2354,7 +2616,9 @@ def handle_keyword_strategy_workflow(app: YouTubeWorkflowApp):
                 result = app.generate_with_gemini(prompt)
                 st.session_state.current_data['keyword_analysis'] = result
                 st.session_state.current_data['seed_keywords'] = seed_keywords
-                st.session_state.current_data['collected_keywords'] = all_keywords[:30]
+                st.session_state.current_data['keyword_sources'] = keyword_sources
+                st.session_state.current_data['collected_keywords'] = ranked_keywords
+                st.session_state.current_data['keyword_scores'] = scores.tolist()
                 
                 st.markdown('<div class="result-box">', unsafe_allow_html=True)
                 st.markdown("#### キーワード分析結果")
@@ -2362,19 +2626,109 @@ def handle_keyword_strategy_workflow(app: YouTubeWorkflowApp):
                 st.markdown('</div>', unsafe_allow_html=True)
                 
                 # キーワードビジュアライゼーション
-                if all_keywords:
-                    df = pd.DataFrame(all_keywords[:20])
+                if ranked_keywords:
+                    import plotly.express as px
+                    
+                    df = ranked_keywords.to_dataframe(20)
+                    df['opportunity_score'] = scores[:20]
                     
                     # バブルチャート
                     fig = px.scatter(df, x='search_volume', y='competition', 
-                                    size='search_volume', text='keyword',
+                                    size='search_volume', text='keyword', hover_data=['source'],
                                     title='キーワードポートフォリオ（検索ボリューム vs 競合性）',
-                                    labels={'search_volume': '月間検索数', 'competition': '競合性'},
-                                    color='competition',
-                                    color_continuous_scale='RdYlGn_r')
+                                    labels={'search_volume': '月間検索数', 'competition': '競合性', 'opportunity_score': '機会スコア', 'source': '取得元'},
+                                    color='opportunity_score',
+                                    color_continuous_scale='RdYlGn')
                     fig.update_traces(textposition='top center')
                     st.plotly_chart(fig, use_container_width=True)
         
+        # ロングテールの深掘り（候補の候補を幅優先で展開）
+        with st.expander("🔁 ロングテール深掘りクロール", expanded=False):
+            crawl_seeds = [k.strip() for k in seed_keywords.split(",") if k.strip()][:MAX_SEED_KEYWORDS]
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                crawl_depth = st.number_input("深さ", min_value=1, max_value=4, value=2)
+            with col2:
+                crawl_calls = st.number_input("検索回数の上限", min_value=5, max_value=500, value=50, step=5)
+            with col3:
+                crawl_seconds = st.number_input("時間の上限（秒）", min_value=5, max_value=600, value=60, step=5)
+            
+            restart = st.checkbox("保存済みの結果を破棄して最初からクロール", value=False)
+            if st.button("深掘りクロール実行", disabled=not crawl_seeds):
+                crawler = app.make_keyword_crawler(
+                    crawl_seeds, max_depth=int(crawl_depth), max_calls=int(crawl_calls),
+                    max_seconds=float(crawl_seconds), restart=restart
+                )
+                status = st.empty()
+                table_placeholder = st.empty()
+                last_render = 0.0
+                # 検索が終わったノードから順に結果を表示（表の再描画は間引く）
+                for event in crawler.run():
+                    status.caption(
+                        f"検索 {event['calls']}/{int(crawl_calls)}回 / 深さ{event['depth']}: {event['keyword']} "
+                        f"/ 待機中 {event['pending']}件"
+                    )
+                    if time.perf_counter() - last_render > 0.5:
+                        table_placeholder.dataframe(crawler.table().to_dataframe(100), use_container_width=True)
+                        last_render = time.perf_counter()
+                
+                crawled = crawler.table()
+                table_placeholder.dataframe(crawled.to_dataframe(100), use_container_width=True)
+                st.session_state.current_data['crawled_keywords'] = crawled
+                progress = crawler.progress()
+                if crawler.stop_reason == FINISHED:
+                    status.success(f"クロール完了: {len(crawled)}件のキーワードを収集しました")
+                else:
+                    reason = "検索回数" if crawler.stop_reason == CALL_BUDGET else "時間"
+                    status.warning(
+                        f"{reason}の上限で停止しました（{len(crawled)}件収集 / 未検索 {progress['pending']}件）。"
+                        "同じ条件で再実行すると続きから再開します"
+                    )
+                if crawler.errors:
+                    st.caption(f"⚠️ {crawler.errors}件の検索に失敗しました（再実行時に再試行します）")
+
+        # 国・言語ごとの需要比較（マーケットごとにキャッシュされるので、追加したマーケットの分だけ検索される）
+        with st.expander("🌏 マーケット比較", expanded=False):
+            from keyword_markets import DEFAULT_MARKETS, MARKETS, compare_markets, market_pairs
+
+            market_seeds = [k.strip() for k in seed_keywords.split(",") if k.strip()][:MAX_SEED_KEYWORDS]
+            market_names = st.multiselect(
+                "比較するマーケット",
+                list(MARKETS),
+                default=st.session_state.current_data.get("keyword_markets", DEFAULT_MARKETS)
+            )
+            if st.button("マーケット比較実行", disabled=not market_seeds or not market_names):
+                with st.spinner(f"{len(market_names)}マーケットのキーワードを検索中..."):
+                    started = time.perf_counter()
+                    comparison = compare_markets(app.get_keywords_by_market(market_seeds, market_pairs(market_names)))
+                st.caption(
+                    f"{len(market_seeds)}シード × {len(market_names)}マーケットを"
+                    f"{time.perf_counter() - started:.1f}秒で取得 / {len(comparison)}キーワード"
+                )
+                st.session_state.current_data['keyword_markets'] = market_names
+                st.session_state.current_data['market_comparison'] = comparison
+
+                if len(comparison):
+                    import plotly.express as px
+
+                    # シードごとの需要をマーケット別に比較
+                    fig = px.bar(comparison.seed_dataframe(), x='seed', y='search_volume', color='market',
+                                 barmode='group', title='シード別の需要（候補キーワードの検索ボリューム合計）',
+                                 labels={'seed': 'シード', 'search_volume': '月間検索数', 'market': 'マーケット'})
+                    st.plotly_chart(fig, use_container_width=True)
+
+                    # 上位キーワードのマーケット別ヒートマップ
+                    df = comparison.to_dataframe(20).set_index('keyword')
+                    fig = px.imshow(df[comparison.markets], aspect='auto', color_continuous_scale='Blues',
+                                    title='上位キーワードのマーケット別検索ボリューム',
+                                    labels={'x': 'マーケット', 'y': 'キーワード', 'color': '月間検索数'})
+                    st.plotly_chart(fig, use_container_width=True)
+
+                    st.dataframe(comparison.to_dataframe(100), use_container_width=True)
+                    shared = comparison.shared_keywords(10)
+                    if shared and len(market_names) > 1:
+                        st.caption("全マーケット共通: " + ", ".join(shared))
+
         col1, col2 = st.columns(2)
         with col1:
             if st.button("← 戻る", use_container_width=True):
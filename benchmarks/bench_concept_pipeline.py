@@ -0,0 +1,90 @@
+"""チャンネルコンセプトStep 1の所要時間: 従来の直列処理 vs 並列パイプライン
+
+ページ取得とGemini呼び出しを一定の待ち時間で模擬し（ネットワーク・APIキー不要）、
+「次へ」からStep 2に進めるまでの時間を比べる。
+
+- 直列: ページ取得 → サービス分析 → 分析を含めたキーワード抽出
+- 並列: ページ取得 → サービス分析 ‖ 商品情報だけのキーワード抽出 → キーワード候補の統合
+
+使い方: python benchmarks/bench_concept_pipeline.py [ページ取得秒] [Gemini応答秒]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("APP_CACHE_DIR", tempfile.mkdtemp(prefix="concept-pipeline-"))
+
+from analysis_cache import AnalysisCache  # noqa: E402
+from concept_pipeline import (  # noqa: E402
+    ANALYSIS, KEYWORDS, ConceptPipeline, analysis_prompt, base_keyword_prompt, page_keyword_candidates
+)
+from page_extract import PageContent  # noqa: E402
+
+ANALYSIS_TEXT = """1. サービスの種類: 個別指導の学習塾
+2. 提供価値: 志望校合格までの個別カリキュラム
+3. ターゲット顧客: 中高生と保護者
+4. YouTube動画で訴求すべきポイント: 講師の質、自習室
+5. 関連するキーワード候補20個
+- 個別指導 塾
+- 高校受験 勉強法
+- 定期テスト 対策（中学生向け）
+- 自習室 使い方
+"""
+KEYWORD_TEXT = """1. 主要キーワード
+- 個別指導 塾
+2. 問題解決キーワード
+- 成績が上がらない
+"""
+
+
+def make_page() -> PageContent:
+    page = PageContent("https://example.com/juku")
+    page.title = "個別指導の学習塾｜志望校合格までサポート"
+    page.description = "小中高生向けの個別指導塾。"
+    page.text = "講師が一人ひとりに合わせたカリキュラムを作成します。" * 20
+    return page
+
+
+def main():
+    fetch_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 0.3
+    llm_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    def fetch(url):
+        time.sleep(fetch_seconds)
+        return make_page()
+
+    def generate(prompt):
+        time.sleep(llm_seconds)
+        return ANALYSIS_TEXT if "Webページの分析結果" in prompt else KEYWORD_TEXT
+
+    print(f"模擬: ページ取得 {fetch_seconds:.1f}秒 / Gemini応答 {llm_seconds:.1f}秒")
+
+    started = time.perf_counter()
+    page = fetch("https://example.com/juku")
+    analysis = generate(analysis_prompt(page))
+    generate(base_keyword_prompt("個別指導塾", "", "") + analysis)
+    serial = time.perf_counter() - started
+    print(f"{'直列':<16} {serial:>6.2f} 秒")
+
+    cache = AnalysisCache(os.path.join(tempfile.mkdtemp(prefix="concept-cache-"), "analyses.sqlite3"))
+    for label in ("並列", "並列（2回目）"):
+        pipeline = ConceptPipeline(
+            "個別指導塾", "小中高生向け", "保護者", "https://example.com/juku",
+            generate_fn=generate, fetch_fn=fetch, cache=cache, model="mock",
+        )
+        started = time.perf_counter()
+        events = [f"{event.stage}@{event.seconds:.2f}s{'*' if event.cached else ''}" for event in pipeline.run()]
+        seconds = time.perf_counter() - started
+        print(f"{label:<14} {seconds:>6.2f} 秒（{serial / seconds:.1f}倍）  {' → '.join(events)}")
+        assert pipeline.results[ANALYSIS].ok and pipeline.results[KEYWORDS].ok
+
+    print("\n統合されたページ由来キーワード:", page_keyword_candidates(ANALYSIS_TEXT))
+    print(pipeline.results[KEYWORDS].value)
+    print(f"キャッシュ: {cache.stats()}（* は保存済みの結果）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""ローカル意図分類器の精度・レイテンシレポート
+
+LOCAL_CONFIDENCE_THRESHOLDは閾値選定用サンプル（THRESHOLD_SAMPLES）での閾値ごとの結果から選び、
+選んだ閾値での精度・委譲率は、ルール調整にも閾値選定にも使っていない評価用サンプル
+（HELD_OUT_SAMPLES）で報告する。調整用・選定用サンプルの結果は参考値。
+
+使い方: python benchmarks/bench_intent_classifier.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_workflows import AGENT_WORKFLOWS  # noqa: E402
+from intent_classifier import (  # noqa: E402
+    HELD_OUT_SAMPLES, LABELLED_SAMPLES, LOCAL_CONFIDENCE_THRESHOLD, MIN_THRESHOLD_PRECISION, THRESHOLD_SAMPLES,
+    LocalIntentClassifier, evaluate, select_threshold, threshold_sweep,
+)
+
+
+def main():
+    started = time.perf_counter()
+    classifier = LocalIntentClassifier()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # サイドバーのクイックスタートボタンが送る文言
+    quick_start = [(f"{w['name']}を実行してください", key) for key, w in AGENT_WORKFLOWS.items()]
+
+    print(f"分類器の構築: {build_ms:.2f} ms")
+    for title, samples in [
+        ("評価用サンプル", HELD_OUT_SAMPLES),
+        ("閾値選定用サンプル（参考）", THRESHOLD_SAMPLES),
+        ("調整用サンプル（参考）", LABELLED_SAMPLES),
+        ("クイックスタート", quick_start),
+    ]:
+        report = evaluate(classifier, samples)
+        print(f"\n== {title} ({report['samples']}件) ==")
+        print(f"ローカル判定: {report['routed_locally']}件 / LLMへ委譲: {report['escalated']}件")
+        print(f"適合率: {report['precision']:.3f} / カバー率: {report['coverage']:.3f}")
+        print(f"曖昧入力の委譲: {report['ambiguous_escalated']}件")
+        print(f"レイテンシ: p50 {report['latency_us_p50']} µs / max {report['latency_us_max']} µs")
+        for text, label, predicted in report["errors"]:
+            print(f"  誤判定: {text!r} 正解={label} 予測={predicted}")
+
+    sweep = threshold_sweep(classifier, THRESHOLD_SAMPLES)
+    print(f"\n== 閾値選定用サンプルでの閾値ごとの結果（求める適合率 {MIN_THRESHOLD_PRECISION}） ==")
+    print(f"{'閾値':>6} {'ローカル':>8} {'誤判定':>6} {'適合率':>6} {'カバー率':>8} {'委譲率':>6}")
+    for entry in sweep:
+        print(
+            f"{entry['threshold']:>6.2f} {entry['routed_locally']:>8} {entry['errors']:>6} "
+            f"{entry['precision']:>6.3f} {entry['coverage']:>8.3f} {entry['escalation_rate']:>6.1%}"
+        )
+    print(f"選定した閾値: {select_threshold(sweep)}（現在の設定 {LOCAL_CONFIDENCE_THRESHOLD}）")
+
+
+if __name__ == "__main__":
+    main()
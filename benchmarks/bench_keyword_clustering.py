@@ -0,0 +1,78 @@
+"""近似重複キーワードのクラスタリング時間と圧縮率（1k / 10k / 100k件）
+
+使い方: python benchmarks/bench_keyword_clustering.py [件数 ...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_clustering import cluster_keywords  # noqa: E402
+from keyword_table import KeywordTable  # noqa: E402
+
+TOPICS = ["料理", "キャンプ", "筋トレ", "英語", "投資", "副業", "メイク", "ゲーム", "旅行", "プログラミング"]
+SUBTOPICS = [
+    "弁当", "鍋", "パスタ", "カレー", "テント", "焚き火", "腹筋", "ダンベル", "単語", "発音", "株", "NISA",
+    "ブログ", "物販", "アイシャドウ", "リップ", "RPG", "スマホ", "温泉", "海外", "Python", "アプリ",
+    "冷凍", "時短", "ソロ", "車中泊", "自宅", "ジム", "会話", "TOEIC", "積立", "仮想通貨", "動画編集",
+    "転売", "韓国", "プチプラ", "実況", "攻略", "京都", "沖縄",
+]
+INTENTS = [
+    ["やり方", "方法", "仕方"],
+    ["おすすめ", "オススメ", "お勧め"],
+    ["初心者", "ビギナー"],
+    ["比較"],
+    ["コツ"],
+    ["道具"],
+]
+
+
+def make_table(n: int, seed: int = 0, unique: bool = False) -> KeywordTable:
+    """同じ検索意図の言い換え・語順違い・「の」付きを含むキーワード（400トピック x 6意図）
+
+    unique=Trueなら末尾に番号を付けて全件を別々のキーワードにする（クラスタがほぼできない最悪ケース）。
+    """
+    rng = random.Random(seed)
+    table = KeywordTable()
+    for i in range(n):
+        topic = f"{rng.choice(TOPICS)} {rng.choice(SUBTOPICS)}"
+        intent = rng.choice(INTENTS)
+        modifier = rng.choice(intent)
+        form = rng.random()
+        if form < 0.5:
+            keyword = f"{topic} {modifier}"
+        elif form < 0.75:
+            keyword = f"{topic}の{modifier}"
+        else:
+            keyword = f"{modifier} {topic}"
+        if unique:
+            keyword = f"{keyword} {rng.choice(SUBTOPICS)}{i}"
+        table.append(keyword, int(rng.paretovariate(1.2) * 50), rng.random(), rng.uniform(10, 300))
+    return table
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    for n in sizes:
+        table = make_table(n)
+        started = time.perf_counter()
+        clusters = cluster_keywords(table)
+        seconds = time.perf_counter() - started
+        unique = len(table.dedup())
+        print(f"{n:>8,}件: {seconds:6.2f}秒 / 重複除去後 {unique:,}件 → クラスタ {len(clusters):,}件")
+
+        table = make_table(n, unique=True)
+        started = time.perf_counter()
+        clusters = cluster_keywords(table)
+        print(f"{'':>8}  全件ユニーク: {time.perf_counter() - started:6.2f}秒 → クラスタ {len(clusters):,}件")
+
+    clusters = cluster_keywords(make_table(1_000))
+    print("\nクラスタの例（1k件）:")
+    for line in clusters.to_prompt(5).split("\n"):
+        print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
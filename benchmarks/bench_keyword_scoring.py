@@ -0,0 +1,59 @@
+"""キーワード機会スコアの処理時間（1k / 10k / 100k件）
+
+使い方: python benchmarks/bench_keyword_scoring.py [件数 ...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_scoring import rank_keywords, score_keywords  # noqa: E402
+from keyword_table import KeywordTable  # noqa: E402
+
+SEEDS = ["料理レシピ", "簡単料理", "時短料理"]
+MODIFIERS = ["やり方", "初心者", "おすすめ", "人気", "簡単", "作り置き", "弁当", "ダイエット", "節約", "プロ"]
+
+
+def make_table(n: int, seed: int = 0) -> KeywordTable:
+    rng = random.Random(seed)
+    table = KeywordTable()
+    for i in range(n):
+        base = SEEDS[i % len(SEEDS)] if rng.random() < 0.6 else f"食材{rng.randrange(500)}"
+        table.append(
+            f"{base} {rng.choice(MODIFIERS)} {i}",
+            int(rng.paretovariate(1.1) * 50),
+            rng.random(),
+            rng.uniform(10, 500),
+        )
+    return table
+
+
+def best_ms(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print(f"{'件数':>8} {'スコア（関連性なし）':>20} {'スコア（関連性あり）':>20} {'上位30件の順位付け':>18}")
+    for n in sizes:
+        table = make_table(n)
+        no_seed = best_ms(lambda: score_keywords(table))
+        with_seed = best_ms(lambda: score_keywords(table, SEEDS))
+        ranking = best_ms(lambda: rank_keywords(table, SEEDS, top_k=30))
+        print(f"{n:>8,} {no_seed:>17.2f} ms {with_seed:>17.2f} ms {ranking:>15.2f} ms")
+
+    ranked, scores = rank_keywords(make_table(1_000), SEEDS, top_k=5)
+    print("\n上位5件（1k件）:")
+    for row, score in zip(ranked, scores):
+        print(f"  {score:5.1f}  {row['keyword']}  vol={row['search_volume']} comp={row['competition']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
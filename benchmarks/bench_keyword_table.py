@@ -0,0 +1,81 @@
+"""辞書のリストとKeywordTableのメモリ・処理時間の比較
+
+使い方: python benchmarks/bench_keyword_table.py [件数 ...]
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_table import KeywordTable  # noqa: E402
+
+
+def make_records(n: int, seed: int = 0):
+    """APIの結果と同じ形の辞書のリスト（1割は表記違いの重複）"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        keyword = f"キーワード {i % int(n * 0.9) or 1} 候補"
+        if i >= n * 0.9:
+            keyword = keyword.replace(" ", "　")
+        records.append(
+            {
+                "keyword": keyword,
+                "search_volume": int(rng.paretovariate(1.2) * 100),
+                "competition": round(rng.random(), 2),
+                "cpc": round(rng.uniform(10, 500), 2),
+            }
+        )
+    return records
+
+
+def measure(build):
+    """構築したオブジェクトと、その確保メモリ（バイト）を返す"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    obj = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return obj, size
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 50_000]
+    for n in sizes:
+        # 同じ文字列を共有しないよう、どちらもJSON（API応答）から作る
+        payload = json.dumps(make_records(n), ensure_ascii=False)
+        records, records_bytes = measure(lambda: json.loads(payload))
+        table, table_bytes = measure(lambda: KeywordTable.from_records(json.loads(payload)))
+
+        print(f"\n== {n:,}件 ==")
+        print(f"メモリ: 辞書のリスト {records_bytes / 1024:,.0f} KiB / KeywordTable {table_bytes / 1024:,.0f} KiB "
+              f"（{records_bytes / max(table_bytes, 1):.1f}倍）")
+
+        print(f"ソート: 辞書 {timed(lambda: sorted(records, key=lambda r: r['search_volume'], reverse=True)):.2f} ms "
+              f"/ テーブル {timed(lambda: table.sort_by('search_volume')):.2f} ms")
+        print(f"上位30件: 辞書 {timed(lambda: sorted(records, key=lambda r: r['search_volume'], reverse=True)[:30]):.2f} ms "
+              f"/ テーブル {timed(lambda: table.top(30)):.2f} ms")
+        print(f"重複除去: テーブル {timed(lambda: table.dedup()):.2f} ms（{len(table):,} → {len(table.dedup()):,}件）")
+
+        top = table.top(30)
+        json_prompt = json.dumps(top.to_records(), ensure_ascii=False, indent=2)
+        tsv_prompt = top.to_prompt()
+        print(f"プロンプト（上位30件）: JSON {len(json_prompt):,}文字 / TSV {len(tsv_prompt):,}文字")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""ページキャッシュの動作確認と時間計測（ローカルHTTPサーバーのフィクスチャ）
+
+ETag・Last-Modifiedを返し、条件付きGETには304で応える http.server を別スレッドで起動し、
+Cache-Controlの違う3つのページを同じURLで繰り返し取得する。
+
+- /max-age   : max-age=60（2回目以降は通信しない）
+- /no-cache  : no-cache（毎回再検証し、304なら解析しない）
+- /no-store  : no-store（保存せず毎回取得）
+
+サーバー側で数えた200/304の回数と、キャッシュの状態・1回あたりの時間を表示する。
+
+使い方: python benchmarks/bench_page_cache.py [繰り返し回数]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_page_extract import make_fixture  # noqa: E402
+from page_cache import FETCHED, FRESH, REVALIDATED, PageCache  # noqa: E402
+
+BODY = make_fixture(1024 * 1024)
+ETAG = '"' + hashlib.sha256(BODY).hexdigest()[:16] + '"'
+LAST_MODIFIED = formatdate(time.time() - 7 * 24 * 60 * 60, usegmt=True)
+CACHE_CONTROL = {"/max-age": "max-age=60", "/no-cache": "no-cache", "/no-store": "no-store"}
+
+responses: Counter = Counter()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        cache_control = CACHE_CONTROL.get(self.path)
+        if cache_control is None:
+            self.send_error(404)
+            return
+        if self.headers.get("If-None-Match") == ETAG or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            responses[(self.path, 304)] += 1
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Cache-Control", cache_control)
+            self.end_headers()
+            return
+        responses[(self.path, 200)] += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Cache-Control", cache_control)
+        self.end_headers()
+        try:
+            self.wfile.write(BODY)
+        except (BrokenPipeError, ConnectionResetError):
+            # クライアントが必要な分だけ読んで接続を閉じた
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 抽出が早期終了すると、クライアントは本文を読み切らずに接続を切る
+        pass
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    server = FixtureServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    cache = PageCache(os.path.join(tempfile.mkdtemp(prefix="page-cache-"), "pages.sqlite3"))
+
+    print(f"{'パス':<10} {'回':>3} {'状態':<12} {'時間':>10}")
+    try:
+        for path in CACHE_CONTROL:
+            for i in range(repeat):
+                started = time.perf_counter()
+                page, state = cache.fetch(base + path)
+                ms = (time.perf_counter() - started) * 1000
+                print(f"{path:<10} {i + 1:>3} {state:<12} {ms:>7.2f} ms")
+            assert page.title, "タイトルを抽出できませんでした"
+    finally:
+        server.shutdown()
+
+    print("\nサーバー側のレスポンス:")
+    for path in CACHE_CONTROL:
+        print(f"  {path:<10} 200: {responses[(path, 200)]}回 / 304: {responses[(path, 304)]}回")
+    expected = {
+        "/max-age": (1, 0),
+        "/no-cache": (1, repeat - 1),
+        "/no-store": (repeat, 0),
+    }
+    for path, (full, not_modified) in expected.items():
+        assert (responses[(path, 200)], responses[(path, 304)]) == (full, not_modified), path
+    print(f"キャッシュ: {cache.stats()}（期待どおり: {FRESH} / {REVALIDATED} / {FETCHED}）")
+
+
+if __name__ == "__main__":
+    main()
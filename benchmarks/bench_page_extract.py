@@ -0,0 +1,115 @@
+"""ページ内容抽出の処理時間・メモリ: 従来のBeautifulSoup全体パース vs ストリーミング抽出
+
+重いランディングページを模したHTML（インラインのscript/style・ナビゲーション・大量のセクション）を
+200KB / 1MB / 5MBで生成して保存し、両方の方法で抽出する。保存済みのHTMLファイルを引数に渡すと
+そのファイルで計測する。BeautifulSoupが入っていない環境ではストリーミング抽出だけを計測する。
+
+使い方: python benchmarks/bench_page_extract.py [HTMLファイル ...]
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from page_extract import CHUNK_SIZE, extract_page  # noqa: E402
+
+SIZES = [200 * 1024, 1024 * 1024, 5 * 1024 * 1024]
+
+
+def make_fixture(size: int) -> bytes:
+    """head・ファーストビューの後に、広告タグ・埋め込みJSON・セクションが続くページ"""
+    head = (
+        "<!DOCTYPE html><html lang='ja'><head><meta charset='utf-8'>"
+        "<title>個別指導の学習塾｜志望校合格までサポート</title>"
+        "<meta name='description' content='小中高生向けの個別指導塾。無料体験授業を実施中。'>"
+        + "<link rel='stylesheet' href='/static/app.css'>" * 20
+        + "<style>" + ".c{margin:0;padding:0;color:#333}" * 2000 + "</style>"
+        + "<script>window.__DATA__=" + '{"id":1,"name":"item","tags":["a","b"]},' * 3000 + "</script>"
+        + "</head><body>"
+    )
+    nav = "<nav><ul>" + "".join(f"<li><a href='/p/{i}'>メニュー{i}</a></li>" for i in range(200)) + "</ul></nav>"
+    section = (
+        "<section class='feature'><h2>講師が一人ひとりに合わせたカリキュラムを作成します</h2>"
+        "<p>定期テスト対策から受験対策まで、生徒の理解度に合わせて授業を進めます。<b>保護者面談</b>も毎月実施。</p>"
+        "<ul><li>週1回から通える柔軟なスケジュールで部活と両立できます</li>"
+        "<li>自習室は毎日開放しており、質問にもいつでも対応します</li></ul>"
+        "<div class='ad'><script>(function(){var s=document.createElement('script');s.src='/ad.js';})();</script></div>"
+        "</section>"
+    )
+    body = [head, nav]
+    total = len(head) + len(nav)
+    while total < size:
+        body.append(section)
+        total += len(section.encode("utf-8"))
+    body.append("</body></html>")
+    return "".join(body).encode("utf-8")
+
+
+def bs4_extract(data: bytes):
+    """変更前の処理（全体をデコードしてBeautifulSoupの木を作る）"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(data.decode("utf-8"), "html.parser")
+    title = soup.find("title").text if soup.find("title") else ""
+    meta_desc = soup.find("meta", {"name": "description"})
+    description = meta_desc.get("content", "") if meta_desc else ""
+    main_content = []
+    for tag in soup.find_all(["h1", "h2", "h3", "p", "li"]):
+        text = tag.get_text().strip()
+        if text and len(text) > 20:
+            main_content.append(text)
+    return title, description, main_content[:50], soup.get_text()[:1000]
+
+
+def streaming_extract(data: bytes):
+    """ストリーミング抽出（16KBずつ受け取る）"""
+    chunks = (data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
+    page = extract_page(chunks)
+    return page.title, page.description, page.blocks, page.excerpt(1000), page.bytes_read
+
+
+def measure(fn, data: bytes):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(data)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds * 1000, peak / 1024 / 1024
+
+
+def main():
+    paths = sys.argv[1:]
+    if not paths:
+        fixture_dir = tempfile.mkdtemp(prefix="page-fixtures-")
+        for size in SIZES:
+            path = os.path.join(fixture_dir, f"landing_{size // 1024}kb.html")
+            with open(path, "wb") as f:
+                f.write(make_fixture(size))
+            paths.append(path)
+        print(f"フィクスチャ: {fixture_dir}")
+
+    has_bs4 = importlib.util.find_spec("bs4") is not None
+    if not has_bs4:
+        print("beautifulsoup4が見つからないため、従来の方法は計測しません")
+
+    print(f"{'ファイル':<24} {'サイズ':>8} {'方法':<14} {'時間':>10} {'ピークメモリ':>12} {'読んだ量':>10}")
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        name = os.path.basename(path)
+        size = f"{len(data) / 1024:.0f}KB"
+        if has_bs4:
+            _, ms, peak = measure(bs4_extract, data)
+            print(f"{name:<24} {size:>8} {'BeautifulSoup':<14} {ms:>7.1f} ms {peak:>9.1f} MB {size:>10}")
+        (title, description, blocks, _, read), ms, peak = measure(streaming_extract, data)
+        print(f"{name:<24} {size:>8} {'ストリーミング':<14} {ms:>7.1f} ms {peak:>9.1f} MB {read / 1024:>8.0f}KB")
+        print(f"{'':<24} → タイトル: {title} / 説明: {description[:20]}… / 本文 {len(blocks)}要素")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""app.pyの起動コスト計測（モジュールのインポート時間と最初の描画・rerunの時間）
+
+使い方: python benchmarks/bench_startup.py
+本番モード（既定）とデバッグモード（APP_DEBUG=1）の両方を計測する。
+"""
+import math
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# app.pyが以前はトップレベルで読み込んでいたモジュール
+HEAVY_MODULES = [
+    "google.generativeai",
+    "pandas",
+    "plotly.express",
+    "plotly.graph_objects",
+    "bs4",
+    "yaml",
+    "requests",
+    "streamlit_option_menu",
+]
+
+
+def measure_import(module: str, repeat: int = 3) -> float:
+    """新しいプロセスでのインポート時間（ミリ秒、中央値）"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if out.returncode != 0:
+            return float("nan")
+        samples.append(float(out.stdout.strip()) * 1000)
+    return statistics.median(samples)
+
+
+def measure_app(debug: bool, reruns: int = 5):
+    """AppTestで最初の描画とrerunの時間を計測（ミリ秒）"""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["APP_DEBUG"] = "1" if debug else "0"
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    started = time.perf_counter()
+    app.run()
+    first = (time.perf_counter() - started) * 1000
+
+    rerun_times = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        rerun_times.append((time.perf_counter() - started) * 1000)
+    return first, statistics.median(rerun_times)
+
+
+def main():
+    print("== モジュールのインポート時間（コールドスタート） ==")
+    total = 0.0
+    for module in HEAVY_MODULES:
+        ms = measure_import(module)
+        if not math.isnan(ms):
+            total += ms
+        print(f"{module:28s} {ms:8.1f} ms")
+    print(f"{'合計（遅延化で初回描画から除外）':28s} {total:8.1f} ms")
+
+    print("\n== app.py 描画時間 ==")
+    os.chdir(ROOT)
+    for label, debug in [("本番モード", False), ("デバッグモード", True)]:
+        try:
+            first, rerun = measure_app(debug)
+        except ImportError as e:
+            print(f"{label}: streamlitが必要です ({e})")
+            return
+        print(f"{label}: 最初の描画 {first:.1f} ms / rerun中央値 {rerun:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""合成キーワードでのキーワード処理全体の時間（10 / 1k / 100k件、APIキー不要）
+
+キーワード戦略と同じ順序で、収集（ソース経由の取得・重複除去）→ クラスタリング →
+機会スコアの順位付け → プロンプト組み立て → グラフ用DataFrame を計測する。
+
+使い方: python benchmarks/bench_synthetic_keywords.py [件数 ...]
+"""
+import importlib.util
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_clustering import cluster_keywords  # noqa: E402
+from keyword_scoring import rank_indices  # noqa: E402
+from keyword_sources import SYNTHETIC_SOURCE, SyntheticKeywordSource, collect_keywords  # noqa: E402
+from synthetic_keywords import synthetic_table  # noqa: E402
+
+SEEDS = ["料理レシピ", "簡単料理", "時短料理"]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 1_000, 100_000]
+    has_pandas = importlib.util.find_spec("pandas") is not None
+
+    print(f"{'件数/シード':>10} {'生成':>9} {'収集':>9} {'クラスタ':>9} {'順位付け':>9} {'プロンプト':>9} {'DataFrame':>10}")
+    for n in sizes:
+        _, generate_ms = timed(lambda: synthetic_table(SEEDS[0], n))
+        source = SyntheticKeywordSource(SYNTHETIC_SOURCE, n)
+        (table, _), collect_ms = timed(lambda: collect_keywords([source], SEEDS))
+        clusters, cluster_ms = timed(lambda: cluster_keywords(table))
+        (order, scores), rank_ms = timed(lambda: rank_indices(clusters.representatives, SEEDS, top_k=30))
+        ranked = clusters.take(order.tolist())
+        prompt, prompt_ms = timed(lambda: ranked.to_prompt(scores=scores))
+        frame = f"{timed(lambda: table.to_dataframe(20))[1]:7.1f} ms" if has_pandas else f"{'-':>10}"
+        print(
+            f"{n:>10,} {generate_ms:6.1f} ms {collect_ms:6.1f} ms {cluster_ms:6.1f} ms "
+            f"{rank_ms:6.1f} ms {prompt_ms:6.1f} ms {frame}"
+        )
+        print(f"{'':>10} → 収集 {len(table):,}件 / クラスタ {len(clusters):,}件 / プロンプト {len(prompt):,}文字")
+
+    table = synthetic_table(SEEDS[0], 1_000)
+    print("\n合成データの例（1k件の検索ボリューム上位5件）:")
+    for line in table.top(5).to_prompt().split("\n"):
+        print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
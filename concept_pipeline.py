@@ -0,0 +1,312 @@
+"""チャンネルコンセプト設計Step 1の並列パイプライン（サービスページ分析 + キーワード抽出）
+
+従来は「ページ取得 → サービス分析 → 分析を含めたキーワード抽出」を順に実行していたが、
+キーワードの大半は商品名・説明・ターゲットだけから出せるので、ページを待つ必要はない。
+
+- ページ取得（→ サービス分析）と、商品情報だけのキーワード抽出を同時に始める
+- サービス分析が届いたら、分析中の「キーワード候補」を基本キーワードに統合する（追加のLLM呼び出しなし）
+- 基本キーワードが揃ってからrefine_wait_seconds以内に分析が届かなければ基本キーワードだけで次へ進み、
+  分析は裏で完了させる（共有キャッシュに保存され、finishで後から受け取れる）
+
+ワーカースレッドはStreamlitに触れず、runが完了した段階をイベントとして呼び出し側に返す。
+"""
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from analysis_cache import AnalysisCache, content_hash, inputs_hash
+
+DEFAULT_REFINE_WAIT_SECONDS = float(os.getenv("CONCEPT_REFINE_WAIT_SECONDS", "5"))
+MAX_PAGE_KEYWORDS = 20
+
+# 段階
+PAGE = "page"
+ANALYSIS = "analysis"
+BASE_KEYWORDS = "base_keywords"
+KEYWORDS = "keywords"
+
+# 待ちきれなかった分析を裏で完了させるため、モジュール共通のExecutorを使う
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CONCEPT_PIPELINE_WORKERS", "8")), thread_name_prefix="concept"
+)
+
+_LIST_MARKER = re.compile(r"^\s*(?:[-*・•]|\d+\s*[.)．、])\s*")
+_HEADING = re.compile(r"^\s*(?:#+|【|\*\*\s*\d+\s*[.．])")
+_CANDIDATE_SEPARATOR = re.compile(r"[、,，/]")
+
+
+def analysis_prompt(page) -> str:
+    """ページ内容からのサービス分析プロンプト"""
+    return f"""
+    Webページの分析結果：
+    タイトル: {page.title}
+    説明: {page.description}
+    本文抜粋: {page.excerpt(1000)}
+
+    上記の内容から、このサービスについて分析してください：
+    1. サービスの種類（学習塾、教育サービスなど具体的に）
+    2. 提供価値
+    3. ターゲット顧客
+    4. YouTube動画で訴求すべきポイント
+    5. 関連するキーワード候補20個
+    """
+
+
+def fallback_analysis_prompt(product_name: str, product_description: str) -> str:
+    """ページを読めなかった場合の、商品情報からの推測プロンプト"""
+    return f"""
+    商品名: {product_name}
+    説明: {product_description}
+
+    上記の情報から推測して分析してください。
+    """
+
+
+def base_keyword_prompt(product_name: str, product_description: str, target_audience: str) -> str:
+    """商品情報だけからのキーワード抽出プロンプト（ページの分析を待たない）"""
+    return f"""
+    商品名: {product_name}
+    サービス説明: {product_description}
+    ターゲット層: {target_audience}
+
+    この商品・サービスに関連するYouTube SEOキーワードを30個抽出してください。
+    以下のカテゴリーで分類してください：
+    1. 主要キーワード（商品名・サービス名に直接関連）
+    2. 問題解決キーワード（ユーザーの悩み・課題）
+    3. ハウツーキーワード（使い方・やり方）
+    4. 比較キーワード（他社比較・選び方）
+    5. トレンドキーワード（最新・2024年など）
+    """
+
+
+def _clean_candidate(text: str) -> str:
+    text = text.replace("**", "").strip()
+    # 「キーワード（説明）」「キーワード: 説明」「キーワード - 説明」の説明部分を除く
+    for separator in ("（", "(", "：", ":", " - ", " – "):
+        text = text.split(separator, 1)[0]
+    return text.strip(" 「」\"'")
+
+
+def page_keyword_candidates(analysis: str, limit: int = MAX_PAGE_KEYWORDS) -> List[str]:
+    """サービス分析の「キーワード候補」の項目から、キーワードを出現順に取り出す"""
+    candidates: List[str] = []
+    in_section = False
+    for line in (analysis or "").splitlines():
+        if not in_section:
+            if "キーワード候補" in line:
+                in_section = True
+                # 見出しと同じ行に「、」区切りで並んでいる場合
+                _, _, rest = line.partition("：") if "：" in line else line.partition(":")
+                candidates.extend(_CANDIDATE_SEPARATOR.split(rest))
+            continue
+        if not line.strip():
+            continue
+        if _HEADING.match(line) and not _LIST_MARKER.match(line.replace("**", "")):
+            break
+        candidates.extend(_CANDIDATE_SEPARATOR.split(_LIST_MARKER.sub("", line.replace("**", ""), count=1)))
+
+    keywords: List[str] = []
+    for candidate in candidates:
+        keyword = _clean_candidate(candidate)
+        if keyword and len(keyword) <= 40 and keyword not in keywords:
+            keywords.append(keyword)
+            if len(keywords) >= limit:
+                break
+    return keywords
+
+
+def merge_keywords(base_keywords: Optional[str], analysis: Optional[str]) -> str:
+    """基本キーワードに、サービス分析のキーワード候補のうち未出のものを6番目のカテゴリーとして追加"""
+    base = base_keywords or ""
+    lowered = base.lower()
+    additions = [k for k in page_keyword_candidates(analysis or "") if k.lower() not in lowered]
+    if not additions:
+        return base
+    section = "6. ページ由来キーワード（サービスページの分析から追加）\n" + "\n".join(f"- {k}" for k in additions)
+    return f"{base.rstrip()}\n\n{section}" if base.strip() else section
+
+
+class PipelineEvent:
+    """完了した段階の結果（失敗時はerrorに例外）"""
+
+    __slots__ = ("stage", "value", "error", "seconds", "cached")
+
+    def __init__(self, stage: str, value: Any = None, error: Optional[BaseException] = None,
+                 seconds: float = 0.0, cached: bool = False):
+        self.stage = stage
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+        self.cached = cached
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ConceptPipeline:
+    """サービス分析とキーワード抽出を依存関係に沿って並列に実行する
+
+    generate_fnは「プロンプトを受け取りテキストを返す同期関数（失敗時は例外）」、
+    fetch_fnは「URLを受け取りPageContentを返す同期関数（失敗時は例外）」。
+    store=Falseの場合、生成結果を共有キャッシュに保存しない（Gemini未設定時の案内文など）。
+    """
+
+    def __init__(
+        self,
+        product_name: str,
+        product_description: str,
+        target_audience: str,
+        service_url: str,
+        generate_fn: Callable[[str], str],
+        fetch_fn: Callable[[str], Any],
+        cache: Optional[AnalysisCache] = None,
+        model: str = "",
+        store: bool = True,
+        refine_wait_seconds: float = DEFAULT_REFINE_WAIT_SECONDS,
+    ):
+        self.product_name = product_name
+        self.product_description = product_description
+        self.target_audience = target_audience
+        self.service_url = service_url
+        self.generate_fn = generate_fn
+        self.fetch_fn = fetch_fn
+        self.cache = cache
+        self.model = model
+        self.store = store and cache is not None
+        self.refine_wait_seconds = refine_wait_seconds
+        self.keyword_inputs = inputs_hash(product_name, product_description, target_audience)
+        self.results: Dict[str, PipelineEvent] = {}
+        self.page_hash: Optional[str] = None
+        self._started = 0.0
+        # runの時間内に届かなかった分析（finishで受け取る）
+        self._pending_analysis: Optional[Future] = None
+        # runの時間内に終わらなかったページ取得（分析はその完了を待って裏で始める）
+        self._pending_page: Optional[Future] = None
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def _analyze(self, prompt: str, page_hash: Optional[str]) -> str:
+        """分析を生成し、ページから作った分析なら共有キャッシュに保存（ワーカースレッドで実行）"""
+        text = self.generate_fn(prompt)
+        if self.store and page_hash is not None:
+            self.cache.put_analysis(self.service_url, page_hash, self.model, text)
+        return text
+
+    def _analyze_page(self, page_future: Future) -> str:
+        """ページ取得の完了を待ち、保存済みの分析があれば使い、なければ分析する（ワーカースレッドで実行）"""
+        try:
+            page = page_future.result()
+        except Exception:
+            return self._analyze(fallback_analysis_prompt(self.product_name, self.product_description), None)
+        self.page_hash = content_hash(page)
+        cached = self.cache.get(self.service_url, self.page_hash, self.model) if self.cache else None
+        if cached is not None:
+            return cached["service_analysis"]
+        return self._analyze(analysis_prompt(page), self.page_hash)
+
+    def _finish_event(self, stage: str, future: Future) -> PipelineEvent:
+        try:
+            return PipelineEvent(stage, future.result(), seconds=self._elapsed())
+        except Exception as e:
+            return PipelineEvent(stage, error=e, seconds=self._elapsed())
+
+    def _keywords_event(self) -> PipelineEvent:
+        """基本キーワードと（届いていれば）分析を統合し、ページ由来の分析なら統合結果を保存"""
+        base = self.results.get(BASE_KEYWORDS)
+        analysis = self.results.get(ANALYSIS)
+        analysis_text = analysis.value if analysis is not None and analysis.ok else None
+        base_text = base.value if base is not None and base.ok else None
+        if base_text is None and analysis_text is None:
+            error = base.error if base is not None else RuntimeError("キーワードを抽出できませんでした")
+            return PipelineEvent(KEYWORDS, error=error, seconds=self._elapsed())
+        merged = merge_keywords(base_text, analysis_text)
+        if self.store and analysis_text is not None and base_text is not None and self.page_hash is not None:
+            self.cache.put_keywords(self.service_url, self.page_hash, self.keyword_inputs, merged)
+        return PipelineEvent(KEYWORDS, merged, seconds=self._elapsed())
+
+    def run(self) -> Iterator[PipelineEvent]:
+        """各段階が完了するたびにイベントを返し、最後にKEYWORDS（統合済みキーワード）を返す"""
+        self._started = time.monotonic()
+        pending: Dict[Future, str] = {
+            _executor.submit(
+                self.generate_fn,
+                base_keyword_prompt(self.product_name, self.product_description, self.target_audience),
+            ): BASE_KEYWORDS,
+        }
+        # http(s)以外のURLはページを読まず、分析もしない（商品情報だけのキーワードになる）
+        if self.service_url.startswith("http"):
+            pending[_executor.submit(self.fetch_fn, self.service_url)] = PAGE
+        refine_deadline: Optional[float] = None
+
+        while pending:
+            timeout = None if refine_deadline is None else max(0.0, refine_deadline - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                stage = pending.pop(future)
+                event = self._finish_event(stage, future)
+                self.results[stage] = event
+                yield event
+
+                if stage == BASE_KEYWORDS:
+                    refine_deadline = time.monotonic() + self.refine_wait_seconds
+                elif stage == PAGE and not event.ok:
+                    # ページを読めなければ商品情報から推測する（キャッシュには保存しない）
+                    prompt = fallback_analysis_prompt(self.product_name, self.product_description)
+                    pending[_executor.submit(self._analyze, prompt, None)] = ANALYSIS
+                elif stage == PAGE:
+                    self.page_hash = content_hash(event.value)
+                    cached = self.cache.get(self.service_url, self.page_hash, self.model) if self.cache else None
+                    if cached is None:
+                        prompt = analysis_prompt(event.value)
+                        pending[_executor.submit(self._analyze, prompt, self.page_hash)] = ANALYSIS
+                        continue
+                    analysis = PipelineEvent(ANALYSIS, cached["service_analysis"], seconds=self._elapsed(), cached=True)
+                    self.results[ANALYSIS] = analysis
+                    yield analysis
+                    keywords = self.cache.keywords_for(cached, self.keyword_inputs)
+                    if keywords is not None:
+                        # 同じページ・同じ商品情報の統合済みキーワードがあれば、基本キーワードを待たない
+                        self.results[KEYWORDS] = PipelineEvent(KEYWORDS, keywords, seconds=self._elapsed(), cached=True)
+                        yield self.results[KEYWORDS]
+                        return
+
+        for future, stage in pending.items():
+            if stage == ANALYSIS:
+                self._pending_analysis = future
+            elif stage == PAGE:
+                # ページ取得が遅い場合も分析を捨てず、取得後の分析を裏で続ける
+                self._pending_page = future
+                self._pending_analysis = _executor.submit(self._analyze_page, future)
+        self.results[KEYWORDS] = self._keywords_event()
+        yield self.results[KEYWORDS]
+
+    @property
+    def analysis_pending(self) -> bool:
+        """runの時間内に届かなかった分析が残っている"""
+        return self._pending_analysis is not None
+
+    def finish(self, timeout: Optional[float] = None) -> Optional[PipelineEvent]:
+        """残っていた分析を待ってキーワードを統合し直す（KEYWORDSのイベント。残りがなければNone）
+
+        PAGE（runの時間内に取得が終わらなかった場合）とANALYSISの結果はresultsに入る。
+        timeout内に届かなければNone（分析は裏で続く）。
+        """
+        future = self._pending_analysis
+        if future is None:
+            return None
+        done, _ = wait([future], timeout=timeout)
+        if not done:
+            return None
+        self._pending_analysis = None
+        if self._pending_page is not None:
+            self.results[PAGE] = self._finish_event(PAGE, self._pending_page)
+            self._pending_page = None
+        self.results[ANALYSIS] = self._finish_event(ANALYSIS, future)
+        self.results[KEYWORDS] = self._keywords_event()
+        return self.results[KEYWORDS]
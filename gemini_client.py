@@ -0,0 +1,86 @@
+"""Gemini呼び出しの非同期ラッパー（同時実行数の制限付きファンアウト）
+
+generate_fnには「プロンプトを受け取りテキストを返す同期関数」を渡す。
+キャッシュやリトライなど同期側の処理をそのまま再利用するため、
+各呼び出しはスレッド上で実行し、asyncioで同時実行数とタイムアウトを管理する。
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Union
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "120"))
+
+# 全クライアント共通のワーカースレッド。asyncio.runのデフォルトExecutorと違い、
+# タイムアウトした呼び出しの終了をイベントループ終了時に待たない。
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="gemini")
+
+
+class AsyncGeminiClient:
+    """同期の生成関数を非同期・並列に呼び出すクライアント"""
+
+    def __init__(
+        self,
+        generate_fn: Callable[[str], str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+    ):
+        self.generate_fn = generate_fn
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """1件のプロンプトを生成（タイムアウト時はasyncio.TimeoutError）"""
+        limit = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(_executor, self.generate_fn, prompt), limit)
+
+    async def generate_many(
+        self,
+        prompts: Sequence[str],
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Union[str, BaseException]]:
+        """複数のプロンプトを並列に生成し、入力と同じ順序で結果を返す
+
+        失敗した要素には例外オブジェクトが入る（他の結果は失わない）。
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+
+        async def run_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.generate(prompt, timeout=timeout)
+
+        return await asyncio.gather(*(run_one(p) for p in prompts), return_exceptions=True)
+
+    def run_many(
+        self,
+        prompts: Sequence[str],
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Union[str, BaseException]]:
+        """generate_manyを同期コード（Streamlitスクリプト）から実行"""
+        coro = self.generate_many(prompts, max_concurrency=max_concurrency, timeout=timeout)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+
+        # 既にイベントループが動いているスレッドからは別スレッドで実行する
+        result: List[Union[str, BaseException]] = []
+        error: List[BaseException] = []
+
+        def runner():
+            try:
+                result.extend(asyncio.run(coro))
+            except BaseException as e:
+                error.append(e)
+
+        thread = threading.Thread(target=runner, daemon=True)
+        thread.start()
+        thread.join()
+        if error:
+            raise error[0]
+        return result
@@ -0,0 +1,131 @@
+"""外部HTTP通信用の共有クライアント（コネクションプール・keep-alive・タイムアウト・リトライ）
+
+Keyword Tool APIやサービスページの取得はすべてこのクライアントを通す。
+プロセスで1つのrequests.Sessionを共有するため、同じホストへの2回目以降の
+リクエストはTCP/TLSハンドシェイクを省略できる。
+"""
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+DEFAULT_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+
+# 冪等なメソッドのみ自動リトライする
+RETRY_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+RETRY_STATUS_CODES = (502, 503, 504)
+
+USER_AGENT = "Mozilla/5.0 (compatible; YouTubeWorkflowAssistant/1.0)"
+
+
+class HttpClient:
+    """プロセス共通のHTTPクライアント"""
+
+    def __init__(
+        self,
+        pool_connections: int = 20,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = 2,
+        backoff_factor: float = 0.3,
+    ):
+        # requestsは重いので、最初にクライアントを作るときに読み込む
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_connections: 保持するホスト数 / pool_maxsize: ホストごとの同時接続数
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+            pool_block=True,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT})
+
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "seconds": 0.0}
+        self._hosts: Counter = Counter()
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[Any] = None,
+        **kwargs,
+    ):
+        """GETリクエスト（timeout未指定時は既定の接続/読み取りタイムアウト）"""
+        host = urlparse(url).netloc
+        started = time.perf_counter()
+        try:
+            return self.session.get(url, params=params, timeout=timeout or self.timeout, **kwargs)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._stats["requests"] += 1
+                self._stats["seconds"] += time.perf_counter() - started
+                self._hosts[host] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """リクエスト数・エラー数・ホスト別件数・プールの状態"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hosts"] = dict(self._hosts)
+        stats["seconds"] = round(stats["seconds"], 3)
+
+        pools = {}
+        poolmanager = getattr(self.adapter, "poolmanager", None)
+        if poolmanager is not None:
+            for key in list(poolmanager.pools.keys()):
+                pool = poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                pools[f"{pool.scheme}://{pool.host}"] = {
+                    # 新規に張った接続数と、その接続で処理したリクエスト数（差分がkeep-aliveでの再利用）
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                }
+        stats["pools"] = pools
+        return stats
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """プロセス共通のHTTPクライアントを返す"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+
+def peek_http_client() -> Optional[HttpClient]:
+    """作成済みならクライアントを返す（統計表示のためだけにrequestsを読み込まない）"""
+    return _client
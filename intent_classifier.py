@@ -0,0 +1,392 @@
+"""ローカル意図分類器（LLMを呼ぶ前の高速パス）
+
+ワークフロー名・説明・キーワード/正規表現ルール・文字n-gram類似度で
+メッセージを13種類のワークフローに振り分ける。明らかなケースだけを高い確信度で返し、
+曖昧な入力はworkflow=Noneとして呼び出し側（LLM）に判断を委ねる。
+"""
+import math
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agent_workflows import AGENT_WORKFLOWS
+
+# この確信度以上ならLLMを呼ばずにローカル判定を採用する。
+# THRESHOLD_SAMPLES（48件）でのselect_thresholdの結果: 0.55以上は誤判定0件、0.5では1件。
+# 1段下でも適合率を満たす0.6を採用（委譲率 22.9%。以前の0.8では25.0%、カバー率 0.925 / 0.9）。
+# 閾値の選定に使っていないHELD_OUT_SAMPLES（33件）では 適合率 1.0 / カバー率 0.889 / 委譲率 27.3%
+LOCAL_CONFIDENCE_THRESHOLD = 0.6
+# 閾値の候補と、閾値選定で求める適合率
+THRESHOLD_GRID = tuple(round(0.5 + 0.05 * i, 2) for i in range(10))
+MIN_THRESHOLD_PRECISION = 0.98
+
+# ルールだけでこのスコアに達すれば「強い一致」とみなす
+STRONG_SCORE = 1.0
+
+# 依頼の定型句（ワークフロー名・URLとこれらを除いて何も残らなければ、依頼文に具体的な情報はない）
+REQUEST_PHRASES = (
+    "を実行してください", "を実行して", "を実行", "をお願いします", "をお願い", "お願いします",
+    "してください", "ください",
+)
+_URL_PATTERN = re.compile(r"https?://\S+")
+_PUNCTUATION = re.compile(r"[。、.,!?「」・]")
+
+# (ワークフローキー, 正規表現, 重み)
+INTENT_RULES: List[Tuple[str, str, float]] = [
+    ("channel_concept", r"チャンネル.*(始め|はじめ|作り|つくり|立ち上げ|開設|コンセプト|設計)", 1.2),
+    ("channel_concept", r"(youtuber|ユーチューバー)に?なりたい", 1.2),
+    ("channel_concept", r"(youtube|ユーチューブ)を?(始め|はじめ)", 1.0),
+    ("channel_concept", r"コンセプト", 0.6),
+    ("channel_concept", r"ペルソナ", 0.3),
+    ("video_marketing", r"サムネ", 1.2),
+    ("video_marketing", r"タイトル.*(考え|作|案|付け|つけ)", 0.8),
+    ("video_marketing", r"クリック率|ctr", 0.6),
+    ("video_planning", r"(動画|長尺).*企画", 0.8),
+    ("video_planning", r"企画.*(seo|検索)", 0.6),
+    ("video_planning", r"^(?!.*(shorts?|ショート)).*ネタ", 0.4),
+    ("shorts_planning", r"(shorts?|ショート).*(企画|ネタ|バズ|アイデア)", 1.4),
+    ("shorts_planning", r"(企画|ネタ|アイデア).*(shorts?|ショート)", 1.4),
+    ("shorts_script", r"(shorts?|ショート).*(台本|脚本|構成)", 1.8),
+    ("shorts_script", r"(台本|脚本).*(shorts?|ショート)", 1.8),
+    ("shorts_script", r"\d+秒.*(台本|脚本)|(台本|脚本).*\d+秒", 1.4),
+    ("content_scoring", r"(評価|採点|スコア|点数)(して|を|し)", 1.2),
+    ("content_scoring", r"改善点", 0.6),
+    ("keyword_strategy", r"キーワード.*(戦略|選定|調査|分析|探し)", 1.2),
+    ("keyword_strategy", r"(seo|検索)(対策|戦略)", 0.8),
+    ("long_script", r"(\d+|十|二十|三十)分.*(台本|脚本|原稿)", 1.6),
+    ("long_script", r"(長尺|解説動画|長い動画).*(台本|脚本|原稿)", 1.6),
+    ("long_script", r"^(?!.*(shorts?|ショート|\d+秒)).*(台本|脚本|原稿)", 0.5),
+    ("competitor_analysis", r"競合|ライバル|他のチャンネル", 1.2),
+    ("competitor_analysis", r"差別化", 0.4),
+    ("trend_forecast", r"トレンド.*(予測|先取り|読|来る)", 1.4),
+    ("trend_forecast", r"(今後|これから|来年).*(流行|はや|伸び)", 1.0),
+    ("trend_forecast", r"早期参入|先行者", 1.0),
+    ("monetization", r"収益化|マネタイズ|稼ぎ|稼ぐ|収入|広告収益|メンバーシップ|スパチャ", 1.4),
+    ("collaboration", r"コラボ|共演|タイアップ", 1.4),
+    ("community_building", r"コミュニティ|ファン(層|づくり|作り|を増や)|熱狂的|エンゲージメント", 1.2),
+]
+
+# ルールとn-gram類似度以外に、各ワークフローのプロファイルに加える語
+EXTRA_VOCABULARY: Dict[str, str] = {
+    "channel_concept": "チャンネル 始めたい 立ち上げ コンセプト 方向性",
+    "video_marketing": "サムネイル タイトル 文言 クリック",
+    "video_planning": "動画 企画 アイデア ネタ SEO",
+    "shorts_planning": "Shorts ショート 企画 バズ ネタ",
+    "shorts_script": "Shorts ショート 台本 フック",
+    "content_scoring": "評価 採点 スコア 改善",
+    "keyword_strategy": "キーワード 戦略 検索 SEO",
+    "long_script": "長尺 台本 解説 原稿",
+    "competitor_analysis": "競合 ライバル 分析 差別化",
+    "trend_forecast": "トレンド 予測 流行 今後",
+    "monetization": "収益化 マネタイズ 稼ぐ 収入",
+    "community_building": "コミュニティ ファン 交流",
+    "collaboration": "コラボ 共演 クリエイター",
+}
+
+# ルール調整用のラベル付きサンプル（Noneは曖昧なためLLMに委ねるべき入力）
+# ルールはこのサンプルを見ながら調整しているので、ここでの精度は実際の入力に対する精度を表さない
+LABELLED_SAMPLES: List[Tuple[str, Optional[str]]] = [
+    # サンプルプロンプト（サイドバー）
+    ("学習塾のYouTubeチャンネルを始めたいです", "channel_concept"),
+    ("https://example.com このサービスでYouTubeを始めたい", "channel_concept"),
+    ("料理系YouTuberになりたい。戦略を教えて", "channel_concept"),
+    ("Shortsでバズる企画を50個考えて", "shorts_planning"),
+    ("10分の解説動画の台本を作って", "long_script"),
+    ("競合チャンネルを分析して差別化戦略を提案して", "competitor_analysis"),
+    # その他の代表的な依頼
+    ("整体院のチャンネルコンセプトを設計したい", "channel_concept"),
+    ("新しくチャンネルを立ち上げるので方向性を決めたい", "channel_concept"),
+    ("この動画のサムネ文言を考えてほしい", "video_marketing"),
+    ("動画のタイトル案を10個作って", "video_marketing"),
+    ("クリック率が上がるサムネイルにしたい", "video_marketing"),
+    ("筋トレの動画企画を30個出して", "video_planning"),
+    ("SEOに強い長尺の動画企画を考えたい", "video_planning"),
+    ("ショート動画のネタが欲しい", "shorts_planning"),
+    ("YouTube Shortsのアイデアを大量に出して", "shorts_planning"),
+    ("ショート動画の台本を書いて", "shorts_script"),
+    ("60秒で完結する台本をお願い", "shorts_script"),
+    ("Shortsの構成を作って", "shorts_script"),
+    ("このタイトルと説明文を評価してください", "content_scoring"),
+    ("動画の改善点を採点して教えて", "content_scoring"),
+    ("料理ジャンルのキーワード戦略を立てたい", "keyword_strategy"),
+    ("狙うべきキーワードを選定して", "keyword_strategy"),
+    ("YouTubeのSEO対策をしたい", "keyword_strategy"),
+    ("20分の動画の原稿を作成して", "long_script"),
+    ("長尺動画の台本を書いて", "long_script"),
+    ("ライバルチャンネルと比べて何が足りない？", "competitor_analysis"),
+    ("他のチャンネルを分析してほしい", "competitor_analysis"),
+    ("来年伸びそうなジャンルを予測して", "trend_forecast"),
+    ("トレンドを先取りしたい", "trend_forecast"),
+    ("早期参入できる分野を知りたい", "trend_forecast"),
+    ("チャンネルの収益化について相談したい", "monetization"),
+    ("YouTubeでもっと稼ぐ方法は？", "monetization"),
+    ("メンバーシップを始めるべき？", "monetization"),
+    ("熱狂的なファンを増やしたい", "community_building"),
+    ("視聴者とのコミュニティを作りたい", "community_building"),
+    ("他のクリエイターとコラボしたい", "collaboration"),
+    ("タイアップ企画の進め方を教えて", "collaboration"),
+    # 曖昧・雑談（LLMに委ねる）
+    ("こんにちは", None),
+    ("ありがとう！", None),
+    ("もう少し詳しく教えて", None),
+    ("さっきの続きをお願い", None),
+    ("YouTubeについて相談したい", None),
+]
+
+# 閾値選定用のラベル付きサンプル（ルールの調整には使わない）。閾値ごとの適合率・委譲率はこちらで測る
+THRESHOLD_SAMPLES: List[Tuple[str, Optional[str]]] = [
+    ("美容院の集客用にYouTubeチャンネルを作りたいです", "channel_concept"),
+    ("子育て系チャンネルを開設したいので方向性を一緒に考えて", "channel_concept"),
+    ("ゲーム実況のYouTuberになりたいんだけど何から始めればいい？", "channel_concept"),
+    ("会社の公式チャンネルのコンセプト案がほしい", "channel_concept"),
+    ("再生数が伸びるサムネのデザインを提案して", "video_marketing"),
+    ("釣り動画のタイトルを考えてもらえますか", "video_marketing"),
+    ("CTRを改善するための工夫を教えて", "video_marketing"),
+    ("キャンプ動画の企画をいくつか出して", "video_planning"),
+    ("来月投稿する動画のネタが思いつかない", "video_planning"),
+    ("検索で上位を狙える動画企画を作って", "video_planning"),
+    ("ショートでバズりそうなアイデアちょうだい", "shorts_planning"),
+    ("犬のShortsネタを20本考えて", "shorts_planning"),
+    ("縦型ショート用の企画を量産したい", "shorts_planning"),
+    ("30秒のショートの台本を書いてほしい", "shorts_script"),
+    ("Shorts用の脚本を作成してください", "shorts_script"),
+    ("15秒で伝わる台本が欲しい", "shorts_script"),
+    ("このサムネとタイトルの組み合わせを採点して", "content_scoring"),
+    ("投稿前の動画構成を評価してほしい", "content_scoring"),
+    ("動画の改善点を教えてください", "content_scoring"),
+    ("英会話チャンネルで狙うキーワードを調査して", "keyword_strategy"),
+    ("検索対策としてどんな語句を入れればいい？", "keyword_strategy"),
+    ("キーワード分析をお願いします", "keyword_strategy"),
+    ("15分くらいの解説動画の原稿を書いて", "long_script"),
+    ("長い動画用の台本を作ってほしい", "long_script"),
+    ("歴史解説動画の脚本をお願いします", "long_script"),
+    ("同じジャンルの競合を調べて", "competitor_analysis"),
+    ("ライバルと差をつけるにはどうすればいい？", "competitor_analysis"),
+    ("他のチャンネルの成功要因を分析して", "competitor_analysis"),
+    ("これから流行りそうなテーマを予測して", "trend_forecast"),
+    ("次に来るトレンドを読んでほしい", "trend_forecast"),
+    ("先行者利益を取れるジャンルはある？", "trend_forecast"),
+    ("広告収益以外の稼ぎ方を知りたい", "monetization"),
+    ("登録者1000人で収入を得る方法は？", "monetization"),
+    ("スパチャを増やすコツを教えて", "monetization"),
+    ("視聴者との交流を深めるコミュニティ施策を考えて", "community_building"),
+    ("ファン層を厚くしたい", "community_building"),
+    ("エンゲージメントを上げる方法を知りたい", "community_building"),
+    ("企業とのタイアップを成功させたい", "collaboration"),
+    ("人気YouTuberとコラボするにはどう声をかければいい？", "collaboration"),
+    ("共演企画を提案して", "collaboration"),
+    # 曖昧・雑談（LLMに委ねる）
+    ("おはようございます", None),
+    ("それでお願いします", None),
+    ("いい感じ！次は？", None),
+    ("何ができるの？", None),
+    ("動画について質問があります", None),
+    ("うまくいかなくて困っています", None),
+    ("前回の内容をもう一度見せて", None),
+    ("ちょっと相談いいですか", None),
+]
+
+# 評価用のラベル付きサンプル（ルールの調整にも閾値の選定にも使わない）。選んだ閾値での精度の報告だけに使う
+HELD_OUT_SAMPLES: List[Tuple[str, Optional[str]]] = [
+    ("パン屋の宣伝になるYouTubeチャンネルを立ち上げたい", "channel_concept"),
+    ("ヨガ教室でYouTubeを始めたいけど方向性に迷ってる", "channel_concept"),
+    ("税理士事務所のチャンネル設計をお願いしたい", "channel_concept"),
+    ("旅行Vlogのサムネに入れる言葉を考えて", "video_marketing"),
+    ("新作動画のタイトル案を何パターンか作ってほしい", "video_marketing"),
+    ("料理チャンネルの次の動画企画を考えて", "video_planning"),
+    ("投資系チャンネルで使える動画ネタを出して", "video_planning"),
+    ("猫のショート動画で使えるネタを考えて", "shorts_planning"),
+    ("Shortsで伸びる企画を一緒に考えてほしい", "shorts_planning"),
+    ("45秒のショート台本をお願い", "shorts_script"),
+    ("商品紹介Shortsの構成を考えて", "shorts_script"),
+    ("作ったサムネを点数で評価してほしい", "content_scoring"),
+    ("この動画タイトルをスコアリングして", "content_scoring"),
+    ("ダイエット系で狙えるキーワードを探してほしい", "keyword_strategy"),
+    ("YouTubeの検索戦略を一緒に立てたい", "keyword_strategy"),
+    ("30分の講義動画の原稿をお願いします", "long_script"),
+    ("ガジェットレビューの長尺台本を作って", "long_script"),
+    ("競合チャンネルの強みと弱みを洗い出して", "competitor_analysis"),
+    ("ライバルの投稿頻度や企画を比較したい", "competitor_analysis"),
+    ("今後流行しそうなジャンルを教えて", "trend_forecast"),
+    ("来年のトレンドを予測してほしい", "trend_forecast"),
+    ("チャンネルをマネタイズする方法を考えて", "monetization"),
+    ("YouTubeの収入を増やしたい", "monetization"),
+    ("視聴者が集まるコミュニティを育てたい", "community_building"),
+    ("ファンづくりの施策を考えてほしい", "community_building"),
+    ("同じジャンルの配信者とコラボ企画をやりたい", "collaboration"),
+    ("メーカーとのタイアップ案件を増やしたい", "collaboration"),
+    # 曖昧・雑談（LLMに委ねる）
+    ("はじめまして", None),
+    ("了解です", None),
+    ("それってどういう意味？", None),
+    ("もう一回説明して", None),
+    ("YouTubeのことで悩んでいます", None),
+    ("ちょっと聞きたいことがある", None),
+]
+
+
+def normalize_text(text: str) -> str:
+    """全角/半角・大文字小文字・空白の揺れを吸収"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return re.sub(r"\s+", "", text)
+
+
+def char_ngrams(text: str, sizes: Sequence[int] = (2, 3)) -> Counter:
+    """文字n-gramの出現数"""
+    grams: Counter = Counter()
+    for n in sizes:
+        for i in range(len(text) - n + 1):
+            grams[text[i:i + n]] += 1
+    return grams
+
+
+def _cosine(a: Counter, b: Counter, b_norm: float) -> float:
+    if not a or not b_norm:
+        return 0.0
+    dot = sum(count * b.get(gram, 0) for gram, count in a.items())
+    a_norm = math.sqrt(sum(v * v for v in a.values()))
+    return dot / (a_norm * b_norm) if a_norm else 0.0
+
+
+class LocalIntentClassifier:
+    """ワークフロー振り分け用のルール + n-gram分類器"""
+
+    def __init__(
+        self,
+        workflows: Dict[str, Dict[str, Any]] = AGENT_WORKFLOWS,
+        rules: Sequence[Tuple[str, str, float]] = INTENT_RULES,
+        threshold: float = LOCAL_CONFIDENCE_THRESHOLD,
+    ):
+        self.workflows = workflows
+        self.threshold = threshold
+        self.rules = [
+            (key, re.compile(pattern), weight)
+            for key, pattern, weight in rules
+            if key in workflows
+        ]
+        # サイドバーのクイックスタート「{name}を実行してください」
+        self.names = {normalize_text(w["name"]): key for key, w in workflows.items()}
+        self.profiles = {}
+        for key, workflow in workflows.items():
+            profile_text = normalize_text(
+                workflow["name"] + workflow["description"] + EXTRA_VOCABULARY.get(key, "")
+            )
+            grams = char_ngrams(profile_text)
+            self.profiles[key] = (grams, math.sqrt(sum(v * v for v in grams.values())))
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """ワークフローごとのスコア（ルール一致の重み + n-gram類似度）"""
+        normalized = normalize_text(text)
+        grams = char_ngrams(normalized)
+        scores = {}
+        for key, (profile, norm) in self.profiles.items():
+            scores[key] = 0.5 * _cosine(grams, profile, norm)
+        for key, pattern, weight in self.rules:
+            if pattern.search(normalized):
+                scores[key] += weight
+        return scores
+
+    def classify(self, text: str) -> Dict[str, Any]:
+        """最も近いワークフローと確信度を返す（確信度が閾値未満ならworkflow=None）"""
+        normalized = normalize_text(text)
+
+        # ワークフロー名がそのまま含まれていれば確定
+        for name, key in self.names.items():
+            if name and name in normalized:
+                return {"workflow": key, "confidence": 1.0, "method": "name"}
+
+        scores = self.scores(text)
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        (top_key, top), (_, second) = ranked[0], ranked[1]
+        if top <= 0:
+            return {"workflow": None, "confidence": 0.0, "method": "none"}
+
+        strength = min(1.0, top / STRONG_SCORE)
+        confidence = round(strength * top / (top + second), 3)
+        workflow = top_key if confidence >= self.threshold else None
+        return {"workflow": workflow, "confidence": confidence, "method": "rules", "candidate": top_key}
+
+    def request_details(self, text: str, workflow_key: str) -> str:
+        """依頼文からワークフロー名・URL・依頼の定型句を除いた残り（空なら具体的な情報がない）"""
+        details = normalize_text(_URL_PATTERN.sub("", text))
+        details = details.replace(normalize_text(self.workflows[workflow_key]["name"]), "")
+        for phrase in REQUEST_PHRASES:
+            details = details.replace(phrase, "")
+        return _PUNCTUATION.sub("", details)
+
+
+def evaluate(
+    classifier: LocalIntentClassifier,
+    samples: Sequence[Tuple[str, Optional[str]]] = LABELLED_SAMPLES,
+) -> Dict[str, Any]:
+    """ラベル付きサンプルで精度・LLMへのエスカレーション率・レイテンシを計測"""
+    routed = correct = escalated = should_escalate_ok = 0
+    errors = []
+    latencies = []
+    for text, label in samples:
+        started = time.perf_counter()
+        result = classifier.classify(text)
+        latencies.append((time.perf_counter() - started) * 1e6)
+        predicted = result["workflow"]
+        if predicted is None:
+            escalated += 1
+            if label is None:
+                should_escalate_ok += 1
+            continue
+        routed += 1
+        if predicted == label:
+            correct += 1
+        else:
+            errors.append((text, label, predicted))
+
+    latencies.sort()
+    labelled = sum(1 for _, label in samples if label is not None)
+    return {
+        "samples": len(samples),
+        "routed_locally": routed,
+        "escalated": escalated,
+        "precision": round(correct / routed, 3) if routed else 0.0,
+        "coverage": round(correct / labelled, 3) if labelled else 0.0,
+        "ambiguous_escalated": should_escalate_ok,
+        "errors": errors,
+        "latency_us_p50": round(latencies[len(latencies) // 2], 1),
+        "latency_us_max": round(latencies[-1], 1),
+    }
+
+
+def threshold_sweep(
+    classifier: LocalIntentClassifier,
+    samples: Sequence[Tuple[str, Optional[str]]] = THRESHOLD_SAMPLES,
+    thresholds: Sequence[float] = THRESHOLD_GRID,
+) -> List[Dict[str, Any]]:
+    """閾値ごとの適合率・カバー率・LLMへの委譲率（各サンプルは1回だけ分類する）"""
+    predictions = []
+    for text, label in samples:
+        result = classifier.classify(text)
+        candidate = result["workflow"] or result.get("candidate")
+        predictions.append((label, candidate, result["confidence"]))
+
+    labelled = sum(1 for label, _, _ in predictions if label is not None)
+    sweep = []
+    for threshold in thresholds:
+        routed = [(label, candidate) for label, candidate, confidence in predictions if confidence >= threshold]
+        correct = sum(1 for label, candidate in routed if candidate == label)
+        sweep.append({
+            "threshold": threshold,
+            "routed_locally": len(routed),
+            "errors": len(routed) - correct,
+            "precision": round(correct / len(routed), 3) if routed else 1.0,
+            "coverage": round(correct / labelled, 3) if labelled else 0.0,
+            "escalation_rate": round(1 - len(routed) / len(predictions), 3) if predictions else 0.0,
+        })
+    return sweep
+
+
+def select_threshold(sweep: Sequence[Dict[str, Any]], min_precision: float = MIN_THRESHOLD_PRECISION) -> float:
+    """委譲率が最も低くなる閾値のうち、1段下の閾値でも適合率を満たすもの（選定用サンプルへの過適合を避ける）"""
+    for lower, entry in zip(sweep, sweep[1:]):
+        if lower["precision"] >= min_precision and entry["precision"] >= min_precision:
+            return entry["threshold"]
+    return sweep[-1]["threshold"]
@@ -0,0 +1,190 @@
+"""Keyword Tool APIの検索結果キャッシュ（SQLite + stale-while-revalidate）
+
+正規化したキーワード・国・言語をキーに検索結果を保存する。
+鮮度期限内はそのまま返し、期限切れでも最大保持期間内なら古い結果を即座に返して
+バックグラウンドで再取得する。API呼び出し回数の台帳はkeyword_quota（予算確認時に記録）が持つ。
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from keyword_quota import QuotaExceeded
+from keyword_utils import normalize_keyword
+from singleflight import get_singleflight
+from storage import open_sqlite
+
+DEFAULT_FRESH_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+
+# 結果の状態
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+FetchFn = Callable[[str, str, str], List[Dict]]
+# API呼び出しの直前に呼ばれ、予算内ならTrue（使用済みとして記録する）
+BudgetFn = Callable[[], bool]
+
+# バックグラウンド再取得用（UIスレッドをブロックしない）
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="keyword-refresh")
+
+
+def make_keyword_key(keyword: str, country: str, language: str) -> str:
+    """正規化したキーワード・国・言語からキャッシュキーを作成"""
+    return "\t".join([normalize_keyword(keyword), country.lower(), language.lower()])
+
+
+class KeywordCache:
+    """SQLiteベースのキーワード検索結果キャッシュ"""
+
+    def __init__(
+        self,
+        filename: str = "keywords.sqlite3",
+        fresh_seconds: int = DEFAULT_FRESH_SECONDS,
+        max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS,
+    ):
+        self.fresh_seconds = fresh_seconds
+        self.max_age_seconds = max(max_age_seconds, fresh_seconds)
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._stats = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0, "refresh_skips": 0
+        }
+        self._conn = open_sqlite(filename)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS keywords (
+                key TEXT PRIMARY KEY,
+                keyword TEXT NOT NULL,
+                value TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+
+    def get(self, keyword: str, country: str, language: str) -> Tuple[Optional[List[Dict]], str]:
+        """キャッシュを取得し、(結果, 状態)を返す（最大保持期間を過ぎたものはMISS）"""
+        key = make_keyword_key(keyword, country, language)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, fetched_at FROM keywords WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.max_age_seconds:
+            return None, MISS
+        return json.loads(row[0]), FRESH if now - row[1] <= self.fresh_seconds else STALE
+
+    def set(self, keyword: str, country: str, language: str, keywords: List[Dict]):
+        """検索結果を保存し、最大保持期間を過ぎたものを削除"""
+        key = make_keyword_key(keyword, country, language)
+        now = time.time()
+        value = json.dumps(keywords, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO keywords (key, keyword, value, fetched_at) VALUES (?, ?, ?, ?)",
+                (key, keyword, value, now),
+            )
+            self._conn.execute("DELETE FROM keywords WHERE fetched_at < ?", (now - self.max_age_seconds,))
+
+    def lookup(
+        self, keyword: str, country: str, language: str, fetch_fn: FetchFn, budget: Optional[BudgetFn] = None
+    ) -> Tuple[List[Dict], str]:
+        """キャッシュ優先で検索結果を返す
+
+        期限切れの結果はそのまま返し、裏で再取得する。未登録ならfetch_fnで取得して保存する
+        （fetch_fnの例外は呼び出し元に伝える）。budgetがFalseを返すとAPIは呼ばず、
+        期限切れの結果はそのまま使い続け、未登録ならQuotaExceededを送出する。
+        """
+        cached, state = self.get(keyword, country, language)
+        if state == FRESH:
+            self._count("hits")
+            return cached, state
+        if state == STALE:
+            self._count("stale_hits")
+            self._schedule_refresh(keyword, country, language, fetch_fn, budget)
+            return cached, state
+
+        self._count("misses")
+        key = make_keyword_key(keyword, country, language)
+        # 同じシードの同時取得は1回のAPI呼び出しにまとめる
+        return get_singleflight().do(
+            f"keywords:{key}", lambda: self._fetch(keyword, country, language, fetch_fn, budget)
+        ), state
+
+    def _fetch(
+        self, keyword: str, country: str, language: str, fetch_fn: FetchFn, budget: Optional[BudgetFn] = None
+    ) -> List[Dict]:
+        # 同時取得はシングルフライトでまとめた後なので、予算は実際のAPI呼び出し1回につき1回分だけ使う
+        if budget is not None and not budget():
+            raise QuotaExceeded("Keyword Tool APIの予算の上限に達しました")
+        keywords = fetch_fn(keyword, country, language)
+        self.set(keyword, country, language, keywords)
+        return keywords
+
+    def _schedule_refresh(
+        self, keyword: str, country: str, language: str, fetch_fn: FetchFn, budget: Optional[BudgetFn] = None
+    ):
+        """同じキーの再取得が実行中でなければバックグラウンドで再取得する"""
+        key = make_keyword_key(keyword, country, language)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+
+        def refresh():
+            try:
+                get_singleflight().do(
+                    f"keywords:{key}", lambda: self._fetch(keyword, country, language, fetch_fn, budget)
+                )
+            except QuotaExceeded:
+                # 予算切れの間は古い結果をそのまま使う（キャッシュのみで動作）
+                self._count("refresh_skips")
+            except Exception:
+                # 失敗しても古い結果を使い続け、次回アクセス時に再試行する
+                self._count("refresh_errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _refresh_executor.submit(refresh)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def clear(self):
+        """全エントリを削除"""
+        with self._lock:
+            self._conn.execute("DELETE FROM keywords")
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率・再取得などの統計情報"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["refreshing"] = len(self._refreshing)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM keywords").fetchone()[0]
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_caches: Dict[str, KeywordCache] = {}
+_cache_lock = threading.Lock()
+
+
+def get_keyword_cache(namespace: str = "youtube") -> KeywordCache:
+    """プロセス共通のキーワードキャッシュを返す（検索元ごとに別のファイル）"""
+    cache = _caches.get(namespace)
+    if cache is None:
+        with _cache_lock:
+            cache = _caches.get(namespace)
+            if cache is None:
+                filename = "keywords.sqlite3" if namespace == "youtube" else f"keywords_{namespace}.sqlite3"
+                cache = _caches[namespace] = KeywordCache(
+                    filename=filename,
+                    fresh_seconds=int(os.getenv("KEYWORD_CACHE_FRESH_SECONDS", DEFAULT_FRESH_SECONDS)),
+                    max_age_seconds=int(os.getenv("KEYWORD_CACHE_MAX_AGE_SECONDS", DEFAULT_MAX_AGE_SECONDS)),
+                )
+    return cache
@@ -0,0 +1,230 @@
+"""表記揺れ・言い換えキーワードのローカルクラスタリング（文字n-gram MinHash + LSH）
+
+「料理 やり方」「料理 方法」「料理のやり方」のような近似重複をLLMを使わずにまとめる。
+キーワードを正規化（NFKC・同義語・助詞「の」・語順）したうえで文字bigramを作り、
+MinHash署名をNumPyでまとめて計算し、LSHのバケットで候補を見つけて推定Jaccard類似度で確認する。
+クラスタごとに検索ボリューム最大のキーワードを代表にし、ボリュームを合算する。
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from keyword_table import KeywordTable, _join_sources
+from keyword_utils import normalize_keyword
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+
+# 検索意図が同じ言い換え（左を右に揃える）
+SYNONYMS = (
+    ("やり方", "方法"),
+    ("仕方", "方法"),
+    ("オススメ", "おすすめ"),
+    ("お勧め", "おすすめ"),
+    ("お薦め", "おすすめ"),
+    ("ビギナー", "初心者"),
+)
+
+# 漢字・カタカナ・英数字の直後の「の」（「料理のやり方」→「料理やり方」、「きのこ」は残す）
+_PARTICLE_NO = re.compile(r"(?<=[^぀-ゟ\s])の(?=\S)")
+
+_GOLDEN = np.uint64(0x9E3779B1)
+_BAND_MULTIPLIER = np.uint64(0x100000001B3)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_CHUNK = 8
+
+
+def canonical_form(keyword: str) -> str:
+    """クラスタリング用の正規形（同義語・助詞「の」を揃える。語の区切りは空白で残す）"""
+    text = normalize_keyword(keyword)
+    for variant, canonical in SYNONYMS:
+        text = text.replace(variant, canonical)
+    return _PARTICLE_NO.sub(" ", text).strip()
+
+
+def shingle_text(keyword: str) -> str:
+    """語を並べ替えて連結した正規形
+
+    語順の違い（「やり方 料理」）と空白の有無（「キャンプ 料理」「キャンプ料理」）は同じになる。
+    """
+    return "".join(sorted(canonical_form(keyword).split()))
+
+
+def _bigram_hashes(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """全テキストの文字bigramの32bitハッシュと、テキストごとの開始位置
+
+    テキストを区切り文字でつないでコードポイント配列にし、隣り合う2文字からまとめて計算する。
+    1文字のテキストはその文字だけを1つのshingleにする。同じbigramが重複しても最小値は変わらない。
+    """
+    joined = "\x00".join(text or "\x01" for text in texts) + "\x00"
+    codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    first, second = codes[:-1], codes[1:]
+    is_char = first != 0
+    pair = is_char & (second != 0)
+    previous_sep = np.concatenate(([True], first[:-1] == 0))
+    single = is_char & (second == 0) & previous_sep
+
+    hashes = ((first * _GOLDEN) ^ second) & _MAX_HASH
+    keep = pair | single
+    # 区切り文字の数 = 何番目のテキストか
+    text_index = np.cumsum(first == 0) - (first == 0)
+    offsets = np.searchsorted(text_index[keep], np.arange(len(texts)))
+    return hashes[keep], offsets
+
+
+def minhash_signatures(texts: Sequence[str], num_perm: int = DEFAULT_NUM_PERM, seed: int = 1) -> np.ndarray:
+    """正規形（shingle_text）ごとのMinHash署名（件数 x num_perm のuint32配列）"""
+    values, offsets = _bigram_hashes(texts)
+
+    # multiply-shiftハッシュ（64bitの桁あふれを前提に、上位32bitを使う）
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    # 全ハッシュ関数を一度に展開するとメモリが大きいので、数本ずつ計算する
+    with np.errstate(over="ignore"):
+        for start in range(0, num_perm, _CHUNK):
+            stop = min(start + _CHUNK, num_perm)
+            hashed = (values[None, :] * a[start:stop, None] + b[start:stop, None]) >> np.uint64(32)
+            signatures[:, start:stop] = np.minimum.reduceat(hashed, offsets, axis=1).T
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x: int, y: int):
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+def cluster_labels(
+    keywords: Sequence[str],
+    threshold: float = DEFAULT_THRESHOLD,
+    num_perm: int = DEFAULT_NUM_PERM,
+    bands: int = DEFAULT_BANDS,
+) -> np.ndarray:
+    """各キーワードのクラスタ番号"""
+    if not keywords:
+        return np.zeros(0, dtype=np.int64)
+    # 正規形が完全に一致するものは同じクラスタなので、署名の計算とLSHは正規形ごとに1回だけ行う
+    forms: Dict[str, int] = {}
+    row_forms = np.fromiter(
+        (forms.setdefault(shingle_text(k), len(forms)) for k in keywords), dtype=np.int64, count=len(keywords)
+    )
+    n = len(forms)
+    rows = num_perm // bands
+    signatures = minhash_signatures(list(forms), num_perm)
+    uf = _UnionFind(n)
+
+    for band in range(bands):
+        # バンド内の署名を1つの64bit値にまとめる（衝突しても後の類似度確認で除外される）
+        keys = np.zeros(n, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for column in range(band * rows, (band + 1) * rows):
+                keys = keys * _BAND_MULTIPLIER + signatures[:, column]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # 同じバケットの行を、バケット先頭の行と比較する
+        same = np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1]) + 1
+        if same.size == 0:
+            continue
+        starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        leaders = order[starts[np.searchsorted(starts, same, side="right") - 1]]
+        members = order[same]
+        similarity = (signatures[leaders] == signatures[members]).mean(axis=1)
+        for leader, member in zip(leaders[similarity >= threshold].tolist(), members[similarity >= threshold].tolist()):
+            uf.union(leader, member)
+
+    roots = np.fromiter((uf.find(i) for i in range(n)), dtype=np.int64, count=n)
+    return roots[row_forms]
+
+
+class KeywordClusters:
+    """クラスタの代表キーワード（ボリューム合算済み）と、各クラスタに含まれるキーワード"""
+
+    def __init__(self, representatives: KeywordTable, members: List[List[str]]):
+        self.representatives = representatives
+        self.members = members
+
+    def __len__(self) -> int:
+        return len(self.representatives)
+
+    def take(self, indices: Sequence[int]) -> "KeywordClusters":
+        """指定した順序でクラスタを取り出す"""
+        indices = list(indices)
+        return KeywordClusters(self.representatives.take(indices), [self.members[i] for i in indices])
+
+    def to_prompt(self, limit: Optional[int] = None, scores: Optional[Sequence[float]] = None, max_variants: int = 3) -> str:
+        """プロンプト用のTSV（代表キーワード・合算ボリューム・言い換えの例。scoresがあれば順位とスコアも）"""
+        header, *rows = self.representatives.to_prompt(limit).split("\n")
+        prefix = "rank\tscore\t" if scores is not None else ""
+        lines = [f"{prefix}{header}\tvariants"]
+        for i, row in enumerate(rows):
+            others = [k for k in dict.fromkeys(self.members[i][1:]) if k != self.members[i][0]]
+            variants = " / ".join(others[:max_variants]) + (f" 他{len(others) - max_variants}件" if len(others) > max_variants else "")
+            rank = f"{i + 1}\t{float(scores[i]):.1f}\t" if scores is not None else ""
+            lines.append(f"{rank}{row}\t{variants}")
+        return "\n".join(lines)
+
+
+def cluster_keywords(
+    table: KeywordTable,
+    threshold: float = DEFAULT_THRESHOLD,
+    num_perm: int = DEFAULT_NUM_PERM,
+    bands: int = DEFAULT_BANDS,
+) -> KeywordClusters:
+    """近似重複をまとめ、代表キーワードの合算ボリューム順に並べる
+
+    代表はクラスタ内で検索ボリューム最大のキーワード。ボリュームは合計、
+    競合性はボリューム加重平均、CPCは最大値、取得元は和集合にする。
+    """
+    if not table:
+        return KeywordClusters(KeywordTable(), [])
+    labels = cluster_labels(table.keyword, threshold, num_perm, bands)
+
+    volume = np.frombuffer(table.search_volume, dtype=np.int64)
+    competition = np.frombuffer(table.competition, dtype=np.float64)
+    cpc = np.frombuffer(table.cpc, dtype=np.float64)
+
+    _, inverse = np.unique(labels, return_inverse=True)
+    count = int(inverse.max()) + 1
+    total_volume = np.bincount(inverse, weights=volume, minlength=count)
+    weighted_competition = np.bincount(inverse, weights=competition * np.maximum(volume, 1), minlength=count)
+    competition_mean = weighted_competition / np.bincount(inverse, weights=np.maximum(volume, 1), minlength=count)
+    max_cpc = np.full(count, -np.inf)
+    np.maximum.at(max_cpc, inverse, cpc)
+
+    # クラスタごとに、ボリュームの大きい順にメンバーを並べる（先頭が代表）
+    order = np.lexsort((-volume, inverse))
+    members: List[List[str]] = [[] for _ in range(count)]
+    sources: Dict[int, List[str]] = {}
+    for i in order.tolist():
+        cluster = int(inverse[i])
+        members[cluster].append(table.keyword[i])
+        if table.source[i]:
+            sources.setdefault(cluster, []).append(table.source[i])
+
+    representatives = KeywordTable()
+    for cluster in range(count):
+        representatives.append(
+            members[cluster][0],
+            int(total_volume[cluster]),
+            round(float(competition_mean[cluster]), 2),
+            float(max_cpc[cluster]),
+            _join_sources(sources.get(cluster, ())),
+        )
+    clusters = KeywordClusters(representatives, members)
+    return clusters.take(np.argsort(-total_volume, kind="stable").tolist())
@@ -0,0 +1,271 @@
+"""キーワード候補の再帰クローラー（幅優先・予算付き・再開可能）
+
+シードキーワードの候補、その候補の候補…と指定した深さまで幅優先で展開する。
+検索回数と経過時間に上限を設け、正規化したキーワードで重複を除いたフロンティアから
+複数の検索を並列に実行する。各ノードの状態と結果はSQLiteに保存するので、
+予算切れや中断で止まったクロールを同じ条件で再実行すると続きから再開できる。
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from keyword_table import KeywordTable
+from keyword_utils import normalize_keyword
+from storage import open_sqlite
+
+# 1キーワードの検索結果と、失敗時のエラーメッセージ（ワーカースレッドで呼ばれる）
+FetchFn = Callable[[str], Tuple[List[Dict], Optional[str]]]
+
+PENDING = "pending"
+DONE = "done"
+ERROR = "error"
+
+# 停止理由
+FINISHED = "finished"
+CALL_BUDGET = "call_budget"
+TIME_BUDGET = "time_budget"
+
+
+def make_crawl_id(seeds: Sequence[str], country: str, language: str, max_depth: int) -> str:
+    """シード・国・言語・深さが同じクロールは同じIDになる（再開用）"""
+    payload = json.dumps(
+        {
+            "seeds": sorted({normalize_keyword(s) for s in seeds if s.strip()}),
+            "country": country,
+            "language": language,
+            "max_depth": max_depth,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class CrawlStore:
+    """クロールのノード（キーワード）と結果のSQLite保存先"""
+
+    def __init__(self, filename: str = "keyword_crawls.sqlite3"):
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(filename)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS crawl_nodes (
+                crawl_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                results TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (crawl_id, key)
+            )
+            """
+        )
+
+    def load(self, crawl_id: str) -> List[Dict[str, Any]]:
+        """クロールの全ノードを登録順に返す"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, keyword, depth, status, results, error FROM crawl_nodes "
+                "WHERE crawl_id = ? ORDER BY rowid",
+                (crawl_id,),
+            ).fetchall()
+        return [
+            {
+                "key": key,
+                "keyword": keyword,
+                "depth": depth,
+                "status": status,
+                "results": json.loads(results) if results else [],
+                "error": error,
+            }
+            for key, keyword, depth, status, results, error in rows
+        ]
+
+    def add_pending(self, crawl_id: str, nodes: Sequence[Tuple[str, str, int]]):
+        """未検索のノード（key, keyword, depth）を追加（登録済みのものは無視）"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO crawl_nodes (crawl_id, key, keyword, depth, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(crawl_id, key, keyword, depth, PENDING, now) for key, keyword, depth in nodes],
+            )
+
+    def complete(self, crawl_id: str, key: str, results: List[Dict], error: Optional[str]):
+        """ノードの検索結果を保存"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE crawl_nodes SET status = ?, results = ?, error = ?, updated_at = ? "
+                "WHERE crawl_id = ? AND key = ?",
+                (ERROR if error else DONE, json.dumps(results, ensure_ascii=False), error, time.time(), crawl_id, key),
+            )
+
+    def progress(self, crawl_id: str) -> Dict[str, int]:
+        """状態ごとのノード数"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM crawl_nodes WHERE crawl_id = ? GROUP BY status", (crawl_id,)
+            ).fetchall()
+        counts = {PENDING: 0, DONE: 0, ERROR: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def clear(self, crawl_id: str):
+        """クロールの保存内容を削除（最初からやり直す）"""
+        with self._lock:
+            self._conn.execute("DELETE FROM crawl_nodes WHERE crawl_id = ?", (crawl_id,))
+
+
+class KeywordCrawler:
+    """キーワード候補を幅優先で展開するクローラー
+
+    run()はノードの検索が終わるたびにイベントをyieldするジェネレーター。
+    UIの更新は呼び出し側（スクリプトスレッド）で行い、ワーカーはfetch_fnだけを実行する。
+    """
+
+    def __init__(
+        self,
+        fetch_fn: FetchFn,
+        seeds: Sequence[str],
+        crawl_id: str,
+        store: CrawlStore,
+        max_depth: int = 2,
+        max_calls: int = 50,
+        max_seconds: float = 60.0,
+        concurrency: int = 8,
+        expand_limit: int = 10,
+    ):
+        self.fetch_fn = fetch_fn
+        self.seeds = [s.strip() for s in seeds if s and s.strip()]
+        self.crawl_id = crawl_id
+        self.store = store
+        self.max_depth = max_depth
+        self.max_calls = max_calls
+        self.max_seconds = max_seconds
+        self.concurrency = max(1, concurrency)
+        self.expand_limit = expand_limit
+
+        self.calls = 0
+        self.errors = 0
+        self.stop_reason: Optional[str] = None
+        self._seen: Set[str] = set()
+        self._frontier: Deque[Tuple[str, str, int]] = deque()
+        self._tables: List[KeywordTable] = []
+
+    def _restore(self):
+        """保存済みのノードからフロンティアと結果を復元（なければシードから開始）
+
+        前回失敗したノードは再検索する。
+        """
+        nodes = self.store.load(self.crawl_id)
+        if not nodes:
+            seeds = list({normalize_keyword(s): (normalize_keyword(s), s, 0) for s in self.seeds}.values())
+            self.store.add_pending(self.crawl_id, seeds)
+            nodes = [{"key": k, "keyword": kw, "depth": d, "status": PENDING, "results": []} for k, kw, d in seeds]
+
+        for node in nodes:
+            self._seen.add(node["key"])
+            if node["status"] in (PENDING, ERROR):
+                self._frontier.append((node["key"], node["keyword"], node["depth"]))
+            elif node["results"]:
+                self._tables.append(KeywordTable.from_records(node["results"]))
+
+    def _expand(self, keywords: KeywordTable, depth: int) -> List[Tuple[str, str, int]]:
+        """検索結果のうち未登録のものを次の深さのノードにする（検索ボリューム上位expand_limit件）"""
+        if depth >= self.max_depth:
+            return []
+        children = []
+        for keyword in keywords.top(self.expand_limit).keywords():
+            key = normalize_keyword(keyword)
+            if key and key not in self._seen:
+                self._seen.add(key)
+                children.append((key, keyword, depth + 1))
+        return children
+
+    def run(self) -> Iterator[Dict[str, Any]]:
+        """クロールを実行し、ノードごとの結果をイベントとして返す"""
+        self._restore()
+        deadline = time.monotonic() + self.max_seconds
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="keyword-crawl")
+        in_flight: Dict[Future, Tuple[str, str, int]] = {}
+        try:
+            while self._frontier or in_flight:
+                while (
+                    self._frontier
+                    and len(in_flight) < self.concurrency
+                    and self.calls < self.max_calls
+                    and time.monotonic() < deadline
+                ):
+                    node = self._frontier.popleft()
+                    in_flight[executor.submit(self.fetch_fn, node[1])] = node
+                    self.calls += 1
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    key, keyword, depth = in_flight.pop(future)
+                    try:
+                        records, error = future.result()
+                    except Exception as e:
+                        records, error = [], str(e)
+                    self.store.complete(self.crawl_id, key, records, error)
+
+                    table = KeywordTable.from_records(records)
+                    children: List[Tuple[str, str, int]] = []
+                    if error:
+                        self.errors += 1
+                    else:
+                        self._tables.append(table)
+                        children = self._expand(table, depth)
+                        self.store.add_pending(self.crawl_id, children)
+                        self._frontier.extend(children)
+                    yield {
+                        "keyword": keyword,
+                        "depth": depth,
+                        "keywords": table,
+                        "error": error,
+                        "new_nodes": len(children),
+                        "calls": self.calls,
+                        "pending": len(self._frontier) + len(in_flight),
+                    }
+        finally:
+            # 予算切れで残った検索は待たずに打ち切る（未完了のノードはpendingのまま残り、次回再開される）
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if not self._frontier and not in_flight:
+            self.stop_reason = FINISHED
+        elif self.calls >= self.max_calls:
+            self.stop_reason = CALL_BUDGET
+        else:
+            self.stop_reason = TIME_BUDGET
+
+    def table(self) -> KeywordTable:
+        """これまでに収集した全キーワード（重複除去・検索ボリューム順）"""
+        return KeywordTable().merge(*self._tables)
+
+    def progress(self) -> Dict[str, int]:
+        """保存済みの状態ごとのノード数"""
+        return self.store.progress(self.crawl_id)
+
+
+_store: Optional[CrawlStore] = None
+_store_lock = threading.Lock()
+
+
+def get_crawl_store() -> CrawlStore:
+    """プロセス共通のクロール保存先を返す"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CrawlStore()
+    return _store
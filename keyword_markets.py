@@ -0,0 +1,157 @@
+"""複数マーケット（国・言語）のキーワード需要比較
+
+同じシードを国・言語の組み合わせごとに検索した結果を、正規化したキーワードで
+1つのクロスマーケット表にそろえる。検索自体はアプリのget_keywordsと同じ経路で行い、
+キャッシュのキーに国・言語が含まれるので、マーケットを追加しても新しいマーケットの分だけ検索される。
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from keyword_table import KeywordTable
+from keyword_utils import normalize_keyword
+
+# 表示名 → (国, 言語)（Keyword Tool APIのパラメーター）
+MARKETS: Dict[str, Tuple[str, str]] = {
+    "日本": ("jp", "ja"),
+    "アメリカ": ("us", "en"),
+    "イギリス": ("gb", "en"),
+    "カナダ": ("ca", "en"),
+    "オーストラリア": ("au", "en"),
+    "韓国": ("kr", "ko"),
+    "台湾": ("tw", "zh-TW"),
+    "香港": ("hk", "zh-TW"),
+    "タイ": ("th", "th"),
+    "インドネシア": ("id", "id"),
+    "ドイツ": ("de", "de"),
+    "フランス": ("fr", "fr"),
+    "ブラジル": ("br", "pt"),
+}
+DEFAULT_MARKETS = ["日本", "アメリカ"]
+
+# マーケット → シード → 検索結果
+MarketResults = Dict[str, Dict[str, KeywordTable]]
+
+
+class MarketComparison:
+    """マーケット横断のキーワード表（行: キーワード、列: マーケット）
+
+    volumeは未取得のマーケットを0、competitionはNaNにした（キーワード数 x マーケット数）の配列。
+    seed_volumeはシードごと・マーケットごとの候補の検索ボリューム合計（シード数 x マーケット数）。
+    """
+
+    def __init__(
+        self,
+        markets: List[str],
+        keywords: List[str],
+        volume: np.ndarray,
+        competition: np.ndarray,
+        seeds: List[str],
+        seed_volume: np.ndarray,
+    ):
+        self.markets = markets
+        self.keywords = keywords
+        self.volume = volume
+        self.competition = competition
+        self.seeds = seeds
+        self.seed_volume = seed_volume
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def market_totals(self) -> Dict[str, int]:
+        """マーケットごとの検索ボリューム合計"""
+        return {market: int(total) for market, total in zip(self.markets, self.volume.sum(axis=0))}
+
+    def coverage(self) -> Dict[str, int]:
+        """マーケットごとの取得キーワード数"""
+        return {market: int(count) for market, count in zip(self.markets, (self.volume > 0).sum(axis=0))}
+
+    def shared_keywords(self, limit: Optional[int] = None) -> List[str]:
+        """全マーケットで検索されているキーワード（合計ボリューム順）"""
+        shared = [kw for kw, row in zip(self.keywords, self.volume) if (row > 0).all()]
+        return shared[:limit] if limit is not None else shared
+
+    def to_dataframe(self, limit: Optional[int] = None):
+        """キーワード x マーケットの検索ボリューム表（pandasは必要な時だけ読み込む）"""
+        import pandas as pd
+
+        stop = len(self) if limit is None else min(limit, len(self))
+        df = pd.DataFrame(self.volume[:stop], columns=self.markets)
+        df.insert(0, "keyword", self.keywords[:stop])
+        df["total"] = self.volume[:stop].sum(axis=1)
+        return df
+
+    def seed_dataframe(self):
+        """シード x マーケットの需要（縦持ち。グラフ用）"""
+        import pandas as pd
+
+        return pd.DataFrame(
+            [
+                {"seed": seed, "market": market, "search_volume": int(self.seed_volume[i, j])}
+                for i, seed in enumerate(self.seeds)
+                for j, market in enumerate(self.markets)
+            ]
+        )
+
+    def to_prompt(self, limit: Optional[int] = 30) -> str:
+        """プロンプト用のTSV（キーワードごとのマーケット別検索ボリューム）"""
+        stop = len(self) if limit is None else min(limit, len(self))
+        lines = ["keyword\t" + "\t".join(self.markets)]
+        for i in range(stop):
+            lines.append(self.keywords[i] + "\t" + "\t".join(str(int(v)) for v in self.volume[i]))
+        return "\n".join(lines)
+
+
+def compare_markets(results: MarketResults) -> MarketComparison:
+    """マーケットごとの検索結果を、正規化したキーワードでそろえる（全マーケットの合計ボリューム順）
+
+    同じマーケットに同じキーワードが複数あれば検索ボリュームの大きい方を使う。
+    表示名は最初に出てきた表記。
+    """
+    markets = list(results)
+    seeds = list(dict.fromkeys(seed for by_seed in results.values() for seed in by_seed))
+
+    index: Dict[str, int] = {}
+    labels: List[str] = []
+    rows: List[int] = []
+    columns: List[int] = []
+    volumes: List[int] = []
+    competitions: List[float] = []
+    seed_volume = np.zeros((len(seeds), len(markets)), dtype=np.int64)
+    seed_index = {seed: i for i, seed in enumerate(seeds)}
+
+    for j, market in enumerate(markets):
+        for seed, table in results[market].items():
+            seed_volume[seed_index[seed], j] = sum(table.search_volume)
+        for row in KeywordTable().merge(*results[market].values()):
+            key = normalize_keyword(row["keyword"])
+            if key not in index:
+                index[key] = len(labels)
+                labels.append(row["keyword"])
+            rows.append(index[key])
+            columns.append(j)
+            volumes.append(row["search_volume"])
+            competitions.append(row["competition"])
+
+    volume = np.zeros((len(labels), len(markets)), dtype=np.int64)
+    competition = np.full((len(labels), len(markets)), np.nan)
+    if rows:
+        # 同じセルに複数の候補がある場合は大きい方（merge済みなので通常は1件）
+        np.maximum.at(volume, (np.array(rows), np.array(columns)), np.array(volumes, dtype=np.int64))
+        competition[np.array(rows), np.array(columns)] = competitions
+
+    order = np.argsort(-volume.sum(axis=1), kind="stable")
+    return MarketComparison(
+        markets,
+        [labels[i] for i in order.tolist()],
+        volume[order],
+        competition[order],
+        seeds,
+        seed_volume,
+    )
+
+
+def market_pairs(names: Sequence[str]) -> List[Tuple[str, str, str]]:
+    """表示名から（表示名, 国, 言語）の一覧を作る（未知の表示名は無視）"""
+    return [(name, *MARKETS[name]) for name in dict.fromkeys(names) if name in MARKETS]
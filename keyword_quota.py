@@ -0,0 +1,163 @@
+"""Keyword Tool APIのクォータ管理（日別・利用者別の使用量台帳 + 予算）
+
+APIを実際に呼ぶ直前（キャッシュミス・期限切れの再取得時）にだけ予算を確認する。
+確認はメモリ上のカウンターだけで行い、SQLiteの台帳への書き込みはバックグラウンドで行うので、
+予算チェックで検索が待たされることはない。予算を使い切ると呼び出し側は
+キャッシュのみ（期限切れの結果を再取得せずに使う）か合成データに切り替える。
+予算は0なら無制限（使用量の記録だけ行う）。
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from storage import open_sqlite
+
+# 台帳への書き込み用（1スレッドで順番に書く）
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="keyword-quota")
+
+
+class QuotaExceeded(Exception):
+    """Keyword Tool APIの予算を使い切った"""
+
+
+class KeywordQuota:
+    """全体の日次・月次予算と利用者ごとの日次予算"""
+
+    def __init__(
+        self,
+        filename: str = "keyword_quota.sqlite3",
+        daily_budget: int = 0,
+        monthly_budget: int = 0,
+        user_daily_budget: int = 0,
+    ):
+        self.daily_budget = daily_budget
+        self.monthly_budget = monthly_budget
+        self.user_daily_budget = user_daily_budget
+        # カウンター用と台帳（SQLite）用でロックを分け、書き込み中も予算チェックを待たせない
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._denied = 0
+        self._conn = open_sqlite(filename)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS keyword_quota_usage (
+                day TEXT NOT NULL,
+                user TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                PRIMARY KEY (day, user)
+            )
+            """
+        )
+        self._day = ""
+        self._month_calls = 0
+        self._day_calls = 0
+        self._user_calls: Dict[str, int] = {}
+        self._load(date.today())
+
+    def _load(self, today: date):
+        """本日・今月の使用量を台帳から読み込む（日付が変わった時も呼ぶ）"""
+        day = today.isoformat()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT day, user, calls FROM keyword_quota_usage WHERE day >= ?", (day[:8] + "01",)
+            ).fetchall()
+        self._day = day
+        self._month_calls = sum(calls for _, _, calls in rows)
+        self._user_calls = {user: calls for row_day, user, calls in rows if row_day == day}
+        self._day_calls = sum(self._user_calls.values())
+
+    def _roll_over(self):
+        today = date.today()
+        if today.isoformat() != self._day:
+            self._load(today)
+
+    def _available(self, user: str) -> Optional[int]:
+        """利用者が今使える回数（Noneは無制限）"""
+        limits = []
+        if self.daily_budget:
+            limits.append(self.daily_budget - self._day_calls)
+        if self.monthly_budget:
+            limits.append(self.monthly_budget - self._month_calls)
+        if self.user_daily_budget:
+            limits.append(self.user_daily_budget - self._user_calls.get(user, 0))
+        return max(0, min(limits)) if limits else None
+
+    def try_acquire(self, user: str, calls: int = 1) -> bool:
+        """予算内ならcalls回分を使用済みにしてTrue（待たずに判定する）"""
+        with self._lock:
+            self._roll_over()
+            available = self._available(user)
+            if available is not None and available < calls:
+                self._denied += 1
+                return False
+            self._day_calls += calls
+            self._month_calls += calls
+            self._user_calls[user] = self._user_calls.get(user, 0) + calls
+            day = self._day
+        _writer.submit(self._write, day, user, calls)
+        return True
+
+    def acquire(self, user: str, calls: int = 1):
+        """try_acquireと同じだが、予算切れならQuotaExceededを送出"""
+        if not self.try_acquire(user, calls):
+            raise QuotaExceeded("Keyword Tool APIの予算の上限に達しました")
+
+    def _write(self, day: str, user: str, calls: int):
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT INTO keyword_quota_usage (day, user, calls) VALUES (?, ?, ?) "
+                "ON CONFLICT(day, user) DO UPDATE SET calls = calls + excluded.calls",
+                (day, user, calls),
+            )
+
+    def remaining(self, user: str) -> Optional[int]:
+        """利用者が今使える残り回数（日次・月次・利用者別の予算のうち最も少ないもの。Noneは無制限）"""
+        with self._lock:
+            self._roll_over()
+            return self._available(user)
+
+    def usage(self, days: int = 31) -> List[Tuple[str, str, int]]:
+        """直近の台帳（日付, 利用者, 呼び出し回数）を新しい順に"""
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT day, user, calls FROM keyword_quota_usage ORDER BY day DESC, calls DESC LIMIT ?",
+                (days * 50,),
+            ).fetchall()
+
+    def stats(self, user: Optional[str] = None) -> Dict[str, Any]:
+        """本日・今月の使用量と予算、予算切れで断った回数"""
+        with self._lock:
+            self._roll_over()
+            stats: Dict[str, Any] = {
+                "today": self._day_calls,
+                "month": self._month_calls,
+                "daily_budget": self.daily_budget,
+                "monthly_budget": self.monthly_budget,
+                "user_daily_budget": self.user_daily_budget,
+                "users_today": len(self._user_calls),
+                "denied": self._denied,
+            }
+            if user is not None:
+                stats["user_today"] = self._user_calls.get(user, 0)
+                stats["remaining"] = self._available(user)
+        return stats
+
+
+_quota: Optional[KeywordQuota] = None
+_quota_lock = threading.Lock()
+
+
+def get_keyword_quota() -> KeywordQuota:
+    """プロセス共通のクォータ管理を返す（予算は環境変数で指定、0は無制限）"""
+    global _quota
+    if _quota is None:
+        with _quota_lock:
+            if _quota is None:
+                _quota = KeywordQuota(
+                    daily_budget=int(os.getenv("KEYWORD_API_DAILY_BUDGET", "0")),
+                    monthly_budget=int(os.getenv("KEYWORD_API_MONTHLY_BUDGET", "0")),
+                    user_daily_budget=int(os.getenv("KEYWORD_API_USER_DAILY_BUDGET", "0")),
+                )
+    return _quota
@@ -0,0 +1,129 @@
+"""キーワードの機会スコア（ローカル・ベクトル演算）
+
+検索ボリューム・競合性・CPC・シードキーワードとの類似度を0〜1に正規化し、
+重み付き和を0〜100の機会スコアとして計算する。数千件なら数ミリ秒で順位付けでき、
+結果は常に同じになるため、Geminiには順位付け済みの上位候補の解説だけを依頼する。
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from keyword_table import KeywordTable
+from keyword_utils import normalize_keyword
+
+# 改行以外の空白
+_INNER_SPACE = re.compile(r"[^\S\n]+")
+
+# 各要素の重み（合計で割って使うので、合計が1である必要はない）
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "volume": 0.45,
+    "competition": 0.25,
+    "cpc": 0.10,
+    "relevance": 0.20,
+}
+
+WEIGHT_LABELS: Dict[str, str] = {
+    "volume": "検索ボリューム",
+    "competition": "競合の少なさ",
+    "cpc": "CPC（商業価値）",
+    "relevance": "シードとの関連性",
+}
+
+
+def _bigrams(text: str) -> frozenset:
+    text = normalize_keyword(text).replace(" ", "")
+    if len(text) < 2:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def _normalize_all(keywords: Sequence[str]) -> np.ndarray:
+    """normalize_keywordと同じ正規化（空白は除去）を全件まとめて行う"""
+    text = unicodedata.normalize("NFKC", "\n".join(keywords)).lower()
+    lines = _INNER_SPACE.sub("", text).split("\n")
+    if len(lines) != len(keywords):
+        # 正規化で改行が増減した場合は1件ずつ処理する
+        lines = [normalize_keyword(k).replace(" ", "") for k in keywords]
+    return np.array(lines, dtype=str)
+
+
+def _log_scale(values: np.ndarray) -> np.ndarray:
+    """裾の重い値を対数で0〜1に圧縮"""
+    scaled = np.log1p(np.clip(values, 0, None))
+    peak = scaled.max(initial=0.0)
+    return scaled / peak if peak > 0 else np.zeros_like(scaled)
+
+
+def seed_relevance(keywords: Sequence[str], seeds: Iterable[str]) -> np.ndarray:
+    """各キーワードについて、最も近いシードの文字bigramをどれだけ含むか（0〜1）"""
+    seed_grams = [grams for grams in (_bigrams(seed) for seed in seeds) if grams]
+    relevance = np.zeros(len(keywords))
+    if not seed_grams or not len(keywords):
+        return relevance
+    normalized = _normalize_all(keywords)
+    # bigramごとの部分一致判定をNumPyの文字列演算で全件まとめて行う
+    contains = {gram: np.char.find(normalized, gram) >= 0 for gram in set().union(*seed_grams)}
+    for grams in seed_grams:
+        coverage = np.sum([contains[gram] for gram in grams], axis=0) / len(grams)
+        np.maximum(relevance, coverage, out=relevance)
+    return relevance
+
+
+def score_keywords(
+    table: KeywordTable,
+    seeds: Iterable[str] = (),
+    weights: Optional[Dict[str, float]] = None,
+) -> np.ndarray:
+    """全キーワードの機会スコア（0〜100）を計算"""
+    if not table:
+        return np.zeros(0)
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    total = sum(max(w, 0.0) for w in weights.values()) or 1.0
+
+    volume = _log_scale(np.frombuffer(table.search_volume, dtype=np.int64).astype(np.float64))
+    competition = np.frombuffer(table.competition, dtype=np.float64)
+    # 0〜100で返るAPIと0〜1で返るAPIの両方に対応
+    if competition.max(initial=0.0) > 1.0:
+        competition = competition / 100.0
+    low_competition = 1.0 - np.clip(competition, 0.0, 1.0)
+    cpc = _log_scale(np.frombuffer(table.cpc, dtype=np.float64))
+    relevance = seed_relevance(table.keyword, seeds)
+
+    score = (
+        max(weights["volume"], 0.0) * volume
+        + max(weights["competition"], 0.0) * low_competition
+        + max(weights["cpc"], 0.0) * cpc
+        + max(weights["relevance"], 0.0) * relevance
+    )
+    return np.round(score / total * 100.0, 1)
+
+
+def rank_indices(
+    table: KeywordTable,
+    seeds: Iterable[str] = (),
+    weights: Optional[Dict[str, float]] = None,
+    top_k: int = 30,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """機会スコアの高い順に上位top_k件の行番号とスコアを返す（同点は検索ボリュームの大きい順）"""
+    scores = score_keywords(table, seeds, weights)
+    if scores.size == 0:
+        return np.zeros(0, dtype=np.int64), scores
+    volume = np.frombuffer(table.search_volume, dtype=np.int64)
+    k = min(top_k, scores.size)
+    # 上位k件だけを部分ソートしてから並べ替える
+    candidates = np.argpartition(-scores, k - 1)[:k] if k < scores.size else np.arange(scores.size)
+    order = candidates[np.lexsort((-volume[candidates], -scores[candidates]))]
+    return order, scores[order]
+
+
+def rank_keywords(
+    table: KeywordTable,
+    seeds: Iterable[str] = (),
+    weights: Optional[Dict[str, float]] = None,
+    top_k: int = 30,
+) -> Tuple[KeywordTable, np.ndarray]:
+    """機会スコアの高い順に上位top_k件のテーブルとスコアを返す"""
+    order, scores = rank_indices(table, seeds, weights, top_k)
+    return table.take(order.tolist()), scores
@@ -0,0 +1,250 @@
+"""キーワード収集ソースのアダプター
+
+キーワード戦略の「キーワード収集ソース」の選択肢ごとに1つのアダプターを用意する。
+YouTube検索・Google検索はKeyword Tool APIのサジェストを使い、ソースごとに別のキャッシュを持つ。
+競合分析・トレンド分析・関連キーワードは外部APIがないため、修飾語のテンプレートから候補を作る
+オフラインの代替ソース。選択されたソース×シードは並列に検索し、ソースごとのタイムアウトで打ち切る。
+同時に走らせる検索はワーカー数とHTTPの接続数までに抑え、タイムアウトは各検索が実際に
+始まった時点から数えるので、順番待ちの間に時間切れになることはない。
+"""
+import os
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from http_client import DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_MAXSIZE, get_http_client
+from keyword_cache import KeywordCache, get_keyword_cache
+from keyword_quota import KeywordQuota, QuotaExceeded, get_keyword_quota
+from keyword_table import KeywordTable
+
+YOUTUBE_SOURCE = "YouTube検索"
+GOOGLE_SOURCE = "Google検索"
+COMPETITOR_SOURCE = "競合分析"
+TREND_SOURCE = "トレンド分析"
+RELATED_SOURCE = "関連キーワード"
+SYNTHETIC_SOURCE = "合成データ"
+
+KEYWORD_TOOL_ENDPOINT = "https://api.keywordtool.io/v2/search/suggestions/{service}"
+MAX_RESULTS_PER_SEED = 30
+# APIキーがない場合のモック（合成データ）の1シードあたりの件数
+SYNTHETIC_KEYWORD_COUNT = int(os.getenv("SYNTHETIC_KEYWORD_COUNT", "10"))
+
+# タイムアウトしたソースのスレッドを待たずに戻れるよう、モジュール共通のExecutorを使う
+_WORKERS = int(os.getenv("KEYWORD_SOURCE_WORKERS", "16"))
+_executor = ThreadPoolExecutor(max_workers=_WORKERS, thread_name_prefix="keyword-source")
+# 同時に投入する検索の上限（Keyword Tool APIの検索が接続プールの空きを待って時間切れにならないよう、
+# ワーカー数だけでなくホストごとの接続数も超えない）
+MAX_IN_FLIGHT = max(1, min(_WORKERS, DEFAULT_POOL_MAXSIZE))
+
+
+def _mock_metrics(keyword: str) -> Tuple[int, float, float]:
+    """キーワードから決まる疑似的な検索ボリューム・競合性・CPC（実行ごとに変わらない）"""
+    h = zlib.crc32(keyword.encode("utf-8"))
+    return 100 + h % 5000, round((h >> 8) % 100 / 100, 2), float(20 + (h >> 16) % 300)
+
+
+def mock_keywords(keyword: str, count: Optional[int] = None) -> List[Dict]:
+    """APIキーがない場合・API障害時のモックキーワードデータ（合成データ。件数はSYNTHETIC_KEYWORD_COUNT）"""
+    # NumPyを使うので必要になった時だけ読み込む
+    from synthetic_keywords import synthetic_keywords
+
+    return synthetic_keywords(keyword, count if count is not None else SYNTHETIC_KEYWORD_COUNT)
+
+
+class KeywordSource(ABC):
+    """キーワード収集ソースの基底クラス（lookupを実装しないサブクラスは作成時にTypeError）"""
+
+    name = ""
+    timeout = 10.0
+
+    @abstractmethod
+    def lookup(self, keyword: str, country: str, language: str, user: str = "") -> List[Dict]:
+        """1つのシードの候補を返す（失敗時は例外。ワーカースレッドで呼ばれるのでUI処理はしない）
+
+        userはAPIの使用量を記録する利用者。予算切れで結果がない場合はQuotaExceededを送出する。
+        """
+
+
+class KeywordToolSource(KeywordSource):
+    """Keyword Tool APIのサジェスト（APIキーがなければモックデータ）"""
+
+    def __init__(
+        self,
+        name: str,
+        service: str,
+        api_key: Optional[str],
+        cache: KeywordCache,
+        quota: Optional[KeywordQuota] = None,
+        timeout: float = 10.0,
+    ):
+        self.name = name
+        self.service = service
+        self.api_key = api_key
+        self.cache = cache
+        self.quota = quota
+        self.timeout = timeout
+
+    def lookup(self, keyword: str, country: str, language: str, user: str = "") -> List[Dict]:
+        if not self.api_key:
+            return mock_keywords(keyword)
+        # キャッシュ優先（期限切れの結果は即座に返し、裏で再取得）。APIを呼ぶ時だけ予算を使う
+        quota = self.quota
+        budget = (lambda: quota.try_acquire(user or "anonymous")) if quota is not None else None
+        keywords, _ = self.cache.lookup(keyword, country, language, self.fetch, budget)
+        return keywords
+
+    def fetch(self, keyword: str, country: str, language: str) -> List[Dict]:
+        """Keyword Tool APIを呼び出す（失敗時は例外）"""
+        params = {
+            "apikey": self.api_key,
+            "keyword": keyword,
+            "country": country,
+            "language": language,
+            "metrics": "true",
+            "output": "json"
+        }
+        response = get_http_client().get(
+            KEYWORD_TOOL_ENDPOINT.format(service=self.service),
+            params=params,
+            timeout=(DEFAULT_CONNECT_TIMEOUT, self.timeout),
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return response.json().get("results", [])[:MAX_RESULTS_PER_SEED]
+
+
+class TemplateKeywordSource(KeywordSource):
+    """外部APIのないソースのオフライン代替（修飾語のテンプレートから候補を生成）"""
+
+    def __init__(self, name: str, templates: Sequence[str], timeout: float = 2.0):
+        self.name = name
+        self.templates = list(templates)
+        self.timeout = timeout
+
+    def lookup(self, keyword: str, country: str, language: str, user: str = "") -> List[Dict]:
+        keywords = []
+        for template in self.templates:
+            kw = template.format(keyword=keyword)
+            volume, competition, cpc = _mock_metrics(kw)
+            keywords.append({"keyword": kw, "search_volume": volume, "competition": competition, "cpc": cpc})
+        return keywords
+
+
+class SyntheticKeywordSource(KeywordSource):
+    """負荷試験用の合成データ（シードあたりcount件。APIキーがない環境で選択できる）"""
+
+    def __init__(self, name: str, count: int, seed: int = 0, timeout: float = 30.0):
+        self.name = name
+        self.count = count
+        self.seed = seed
+        self.timeout = timeout
+
+    def lookup(self, keyword: str, country: str, language: str, user: str = "") -> List[Dict]:
+        from synthetic_keywords import synthetic_keywords
+
+        return synthetic_keywords(keyword, self.count, self.seed)
+
+
+def build_keyword_sources(api_key: Optional[str]) -> Dict[str, KeywordSource]:
+    """キーワード戦略の選択肢と同じ順序・名前のソース一覧（APIキーがなければ合成データも選べる）"""
+    sources: List[KeywordSource] = [
+        KeywordToolSource(YOUTUBE_SOURCE, "youtube", api_key, get_keyword_cache(), get_keyword_quota()),
+        KeywordToolSource(GOOGLE_SOURCE, "google", api_key, get_keyword_cache("google"), get_keyword_quota()),
+        TemplateKeywordSource(
+            COMPETITOR_SOURCE,
+            ["{keyword} 比較", "{keyword} レビュー", "{keyword} 口コミ", "{keyword} 評判", "{keyword} vs",
+             "{keyword} 代わり", "{keyword} ランキング", "{keyword} 人気"],
+        ),
+        TemplateKeywordSource(
+            TREND_SOURCE,
+            ["{keyword} 最新", "{keyword} 2025", "{keyword} 話題", "{keyword} 流行り", "{keyword} 新作",
+             "{keyword} トレンド", "{keyword} 今年", "{keyword} バズ"],
+        ),
+        TemplateKeywordSource(
+            RELATED_SOURCE,
+            ["{keyword} とは", "{keyword} 意味", "{keyword} 種類", "{keyword} 選び方", "{keyword} 費用",
+             "{keyword} 効果", "{keyword} 失敗", "{keyword} 例"],
+        ),
+    ]
+    if not api_key:
+        sources.append(SyntheticKeywordSource(SYNTHETIC_SOURCE, SYNTHETIC_KEYWORD_COUNT))
+    return {source.name: source for source in sources}
+
+
+def _timed_lookup(
+    source: KeywordSource, seed: str, country: str, language: str, user: str, started: List[float]
+) -> Tuple[List[Dict], float, bool]:
+    """検索結果・検索時間・予算切れで合成データに切り替えたか（開始時刻をstartedに記録する）"""
+    started.append(time.monotonic())
+    try:
+        records, degraded = source.lookup(seed, country, language, user), False
+    except QuotaExceeded:
+        records, degraded = mock_keywords(seed), True
+    return records, time.monotonic() - started[0], degraded
+
+
+def collect_keywords(
+    sources: Sequence[KeywordSource],
+    seeds: Sequence[str],
+    country: str = "jp",
+    language: str = "ja",
+    user: str = "",
+) -> Tuple[KeywordTable, Dict[str, Dict[str, Any]]]:
+    """全ソース×全シードを並列に検索し、取得元付きで重複を除いて統合する
+
+    同時に走らせる検索はMAX_IN_FLIGHT件までで、残りは空きができ次第投入する。
+    各検索の結果は、その検索がワーカーで始まってからソースのtimeout秒までに返ったものだけを使う。
+    APIの予算切れで結果のないシードは合成データで補う。戻り値は（検索ボリューム順のテーブル,
+    ソースごとの件数・エラー・タイムアウト件数・合成データで補った件数・最長の検索時間）。
+    """
+    # 締め切りの早い（軽い）ソースから投入する
+    ordered = sorted(sources, key=lambda source: source.timeout)
+    queue = deque(enumerate((source, seed) for source in ordered for seed in seeds))
+    running: Dict[Future, Tuple[int, KeywordSource, str, List[float]]] = {}
+    tables: Dict[int, KeywordTable] = {}
+    report: Dict[str, Dict[str, Any]] = {
+        source.name: {"keywords": 0, "errors": [], "timed_out": 0, "degraded": 0, "seconds": 0.0} for source in sources
+    }
+
+    while queue or running:
+        while queue and len(running) < MAX_IN_FLIGHT:
+            index, (source, seed) = queue.popleft()
+            started: List[float] = []
+            future = _executor.submit(_timed_lookup, source, seed, country, language, user, started)
+            running[future] = (index, source, seed, started)
+
+        # まだ始まっていない検索（時間切れで手放したスレッドが空くのを待っている）の締め切りは数えない
+        now = time.monotonic()
+        deadlines = [started[0] + source.timeout for _, source, _, started in running.values() if started]
+        timeout = max(0.0, min(deadlines) - now) if deadlines else None
+        wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+        now = time.monotonic()
+        for future in list(running):
+            index, source, seed, started = running[future]
+            entry = report[source.name]
+            if not future.done():
+                if started and now >= started[0] + source.timeout:
+                    # 実行中のスレッドは止められないので、結果を待たずに手放す
+                    del running[future]
+                    entry["timed_out"] += 1
+                continue
+
+            del running[future]
+            try:
+                records, seconds, degraded = future.result()
+            except Exception as e:
+                entry["errors"].append(f"{seed}: {e}")
+                continue
+            entry["seconds"] = round(max(entry["seconds"], seconds), 3)
+            entry["degraded"] += int(degraded)
+            table = KeywordTable.from_records(records)
+            table.source = [source.name] * len(table)
+            entry["keywords"] += len(table)
+            tables[index] = table
+
+    # 完了順によらず、投入順（ソース×シード順）に統合する
+    return KeywordTable().merge(*(tables[index] for index in sorted(tables))), report
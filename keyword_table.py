@@ -0,0 +1,260 @@
+"""キーワード検索結果の列指向テーブル
+
+Keyword Tool APIの結果（keyword / search_volume / competition / cpc）と取得元（source）を
+辞書のリストではなく列ごとの配列で保持する。数値列はarrayモジュールの型付き配列なので
+1行あたりのメモリが小さく、ソート・絞り込み・上位k件・重複除去はインデックスの操作だけで済む。
+プロンプト用のTSVやグラフ用のDataFrameへの変換もここで行う。
+"""
+import heapq
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from keyword_utils import normalize_keyword
+
+COLUMNS = ("keyword", "search_volume", "competition", "cpc", "source")
+NUMERIC_COLUMNS = ("search_volume", "competition", "cpc")
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _join_sources(labels: Iterable[str]) -> str:
+    """取得元ラベルを重複なく", "区切りで連結"""
+    unique: List[str] = []
+    for label in labels:
+        for part in label.split(", "):
+            if part and part not in unique:
+                unique.append(part)
+    return ", ".join(unique)
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.2f}"
+
+
+class KeywordTable:
+    """キーワード検索結果の列指向テーブル（操作はすべて新しいテーブルを返す）"""
+
+    __slots__ = ("keyword", "search_volume", "competition", "cpc", "source")
+
+    def __init__(
+        self,
+        keyword: Optional[List[str]] = None,
+        search_volume: Optional[array] = None,
+        competition: Optional[array] = None,
+        cpc: Optional[array] = None,
+        source: Optional[List[str]] = None,
+    ):
+        self.keyword: List[str] = keyword if keyword is not None else []
+        self.search_volume: array = search_volume if search_volume is not None else array("q")
+        self.competition: array = competition if competition is not None else array("d")
+        self.cpc: array = cpc if cpc is not None else array("d")
+        # 取得元（複数のソースで見つかったキーワードは", "区切り）
+        self.source: List[str] = source if source is not None else [""] * len(self.keyword)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "KeywordTable":
+        """APIの結果（辞書のリスト）からテーブルを作成（keywordのない行は無視）"""
+        table = cls()
+        for record in records:
+            if isinstance(record, dict) and record.get("keyword"):
+                table.append(
+                    str(record["keyword"]),
+                    record.get("search_volume"),
+                    record.get("competition"),
+                    record.get("cpc"),
+                    record.get("source") or "",
+                )
+        return table
+
+    @classmethod
+    def concat(cls, tables: Iterable["KeywordTable"]) -> "KeywordTable":
+        """複数のテーブルを縦に連結"""
+        result = cls()
+        for table in tables:
+            result.keyword.extend(table.keyword)
+            result.search_volume.extend(table.search_volume)
+            result.competition.extend(table.competition)
+            result.cpc.extend(table.cpc)
+            result.source.extend(table.source)
+        return result
+
+    def append(self, keyword: str, search_volume: Any = 0, competition: Any = 0.0, cpc: Any = 0.0, source: str = ""):
+        """1行追加（数値に変換できない値は0）"""
+        self.keyword.append(keyword)
+        self.search_volume.append(_to_int(search_volume))
+        self.competition.append(_to_float(competition))
+        self.cpc.append(_to_float(cpc))
+        self.source.append(source)
+
+    def __len__(self) -> int:
+        return len(self.keyword)
+
+    def __bool__(self) -> bool:
+        return bool(self.keyword)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], "KeywordTable"]:
+        """整数なら1行の辞書、スライスならテーブルを返す"""
+        if isinstance(index, slice):
+            return KeywordTable(
+                self.keyword[index],
+                self.search_volume[index],
+                self.competition[index],
+                self.cpc[index],
+                self.source[index],
+            )
+        return self.row(index)
+
+    def __repr__(self) -> str:
+        return f"KeywordTable({len(self)} keywords)"
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """i行目を辞書で返す"""
+        return {
+            "keyword": self.keyword[i],
+            "search_volume": self.search_volume[i],
+            "competition": self.competition[i],
+            "cpc": self.cpc[i],
+            "source": self.source[i],
+        }
+
+    def column(self, name: str) -> Sequence:
+        """列を返す（コピーしない）"""
+        if name not in COLUMNS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def take(self, indices: Iterable[int]) -> "KeywordTable":
+        """指定した行番号の行だけを、その順序で取り出す"""
+        indices = list(indices)
+        keyword, search_volume, competition, cpc = self.keyword, self.search_volume, self.competition, self.cpc
+        source = self.source
+        return KeywordTable(
+            [keyword[i] for i in indices],
+            array("q", [search_volume[i] for i in indices]),
+            array("d", [competition[i] for i in indices]),
+            array("d", [cpc[i] for i in indices]),
+            [source[i] for i in indices],
+        )
+
+    def sort_by(self, column: str = "search_volume", descending: bool = True) -> "KeywordTable":
+        """列の値でソート（同値は元の順序を保つ）"""
+        values = self.column(column)
+        return self.take(sorted(range(len(self)), key=values.__getitem__, reverse=descending))
+
+    def top(self, k: int, column: str = "search_volume") -> "KeywordTable":
+        """列の値が大きい順に上位k件（全体をソートしない）"""
+        values = self.column(column)
+        return self.take(heapq.nlargest(k, range(len(self)), key=values.__getitem__))
+
+    def filter(
+        self,
+        min_volume: int = 0,
+        max_competition: Optional[float] = None,
+        contains: Optional[str] = None,
+    ) -> "KeywordTable":
+        """検索ボリューム・競合性・部分一致で絞り込み"""
+        needle = normalize_keyword(contains) if contains else None
+        indices = [
+            i
+            for i in range(len(self))
+            if self.search_volume[i] >= min_volume
+            and (max_competition is None or self.competition[i] <= max_competition)
+            and (needle is None or needle in normalize_keyword(self.keyword[i]))
+        ]
+        return self.take(indices)
+
+    def dedup(self) -> "KeywordTable":
+        """表記揺れを正規化して重複を除去
+
+        検索ボリュームが最大の行を残し、最初の出現順を保つ。取得元は重複した全行の和集合にする。
+        """
+        best: Dict[str, int] = {}
+        sources: Dict[str, List[str]] = {}
+        for i, keyword in enumerate(self.keyword):
+            key = normalize_keyword(keyword)
+            current = best.get(key)
+            if current is None or self.search_volume[i] > self.search_volume[current]:
+                best[key] = i
+            if self.source[i]:
+                sources.setdefault(key, []).append(self.source[i])
+        keys = sorted(best, key=best.__getitem__)
+        result = self.take(best[key] for key in keys)
+        result.source = [_join_sources(sources.get(key, ())) for key in keys]
+        return result
+
+    def merge(self, *others: "KeywordTable") -> "KeywordTable":
+        """他のテーブルと統合し、重複を除いて検索ボリューム順に並べる"""
+        return KeywordTable.concat((self,) + others).dedup().sort_by("search_volume")
+
+    def keywords(self, limit: Optional[int] = None) -> List[str]:
+        """キーワード文字列のリスト"""
+        return self.keyword[:limit]
+
+    def to_records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """辞書のリストに変換"""
+        return [self.row(i) for i in range(min(len(self), limit if limit is not None else len(self)))]
+
+    def to_prompt(self, limit: Optional[int] = None) -> str:
+        """プロンプト用のTSV（ヘッダー1行 + 1キーワード1行。JSONより大幅に短い）
+
+        取得元はいずれかの行に値がある場合だけ列に含める。
+        """
+        n = min(len(self), limit if limit is not None else len(self))
+        with_source = any(self.source[:n])
+        lines = ["\t".join(COLUMNS if with_source else COLUMNS[:-1])]
+        for i in range(n):
+            cells = [
+                self.keyword[i].replace("\t", " "),
+                str(self.search_volume[i]),
+                _format_number(self.competition[i]),
+                _format_number(self.cpc[i]),
+            ]
+            if with_source:
+                cells.append(self.source[i])
+            lines.append("\t".join(cells))
+        return "\n".join(lines)
+
+    def to_columns(self, limit: Optional[int] = None) -> Dict[str, list]:
+        """列名→値のリスト（plotlyにそのまま渡せる）"""
+        return {name: list(self.column(name)[:limit]) for name in COLUMNS}
+
+    def to_dataframe(self, limit: Optional[int] = None):
+        """pandas.DataFrameに変換（pandasはここで初めて読み込む）"""
+        import pandas as pd
+
+        return pd.DataFrame(self.to_columns(limit), columns=list(COLUMNS))
+
+    def nbytes(self) -> int:
+        """テーブルが保持するデータのおおよそのバイト数"""
+        size = sys.getsizeof(self.keyword) + sum(sys.getsizeof(k) for k in self.keyword)
+        # 空文字列はインターンされた1つのオブジェクトを共有する
+        size += sys.getsizeof(self.source) + sum(sys.getsizeof(s) for s in set(self.source))
+        for name in NUMERIC_COLUMNS:
+            size += sys.getsizeof(self.column(name))
+        return size
+
+
+def as_keyword_table(value: Any) -> KeywordTable:
+    """セッションや履歴に残っている値（テーブル・辞書のリスト・None）をテーブルに揃える"""
+    if isinstance(value, KeywordTable):
+        return value
+    if isinstance(value, list):
+        return KeywordTable.from_records(value)
+    return KeywordTable()
@@ -0,0 +1,21 @@
+"""キーワードの正規化ユーティリティ"""
+import re
+import unicodedata
+from typing import Iterable, List
+
+
+def normalize_keyword(keyword: str) -> str:
+    """表記揺れを吸収したキーワード（NFKCで全角/半角を統一、小文字化、空白を1つに）"""
+    text = unicodedata.normalize("NFKC", keyword or "").lower()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+
+def dedupe_keywords(keywords: Iterable[str]) -> List[str]:
+    """正規化して同じになるキーワードを除く（最初の表記を残し、空のものは捨てる）"""
+    unique = {}
+    for keyword in keywords:
+        key = normalize_keyword(keyword)
+        if key and key not in unique:
+            unique[key] = keyword.strip()
+    return list(unique.values())
@@ -0,0 +1,252 @@
+"""取得したサービスページの永続HTTPキャッシュ（Cache-Control + ETag / Last-Modified）
+
+抽出済みの内容（タイトル・メタ説明・本文）を検証子（ETag・Last-Modified）と一緒にSQLiteに保存する。
+Cache-Controlの有効期限内ならHTTP通信も解析もせずに返し、期限切れなら
+If-None-Match / If-Modified-Sinceで再検証して、304なら保存済みの内容をそのまま使う。
+304にはCache-Control・Expiresが付かないことが多いので、元の応答のヘッダーも保存しておき、
+304のヘッダーで上書きしてから有効期限を求め直す（RFC 9111 4.3.4）。
+no-storeのページは保存せず、no-cacheのページは毎回再検証する。
+"""
+import email.utils
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from page_extract import PageContent, extract_response, request_page
+from storage import open_sqlite
+
+# 有効期限の指定がないページは、最終更新からの経過時間の1割（最大この秒数）を新鮮とみなす（RFC 9111 4.2.2）
+MAX_HEURISTIC_SECONDS = int(os.getenv("PAGE_CACHE_MAX_HEURISTIC_SECONDS", str(24 * 60 * 60)))
+# 使われないまま残ったエントリを削除するまでの秒数
+DEFAULT_RETENTION_SECONDS = 30 * 24 * 60 * 60
+
+# 取得結果の状態
+FRESH = "fresh"
+REVALIDATED = "revalidated"
+FETCHED = "fetched"
+
+# 304のヘッダーで上書きするために保存しておく応答ヘッダー
+_STORED_HEADERS = ("cache-control", "expires", "etag", "last-modified")
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+
+
+def _cache_key(url: str) -> str:
+    """フラグメントはサーバーに送られないのでキーから除く"""
+    return url.split("#", 1)[0]
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed.timestamp() if parsed is not None else None
+
+
+def stored_headers(headers) -> Dict[str, str]:
+    """応答ヘッダーのうち、304での再検証後も使うもの（キーは小文字）"""
+    return {name: headers[name] for name in _STORED_HEADERS if headers.get(name) is not None}
+
+
+def merge_not_modified(stored: Dict[str, str], headers) -> Dict[str, str]:
+    """保存済みのヘッダーを304のヘッダーで上書きする（Date・Ageは304のものだけを使う）"""
+    merged = dict(stored)
+    merged.update(stored_headers(headers))
+    for name in ("date", "age"):
+        if headers.get(name) is not None:
+            merged[name] = headers[name]
+    return merged
+
+
+def freshness_lifetime(headers: Dict[str, str], now: float) -> Tuple[Optional[float], bool]:
+    """レスポンスヘッダーから（新鮮でいられる秒数, 保存してよいか）を求める
+
+    秒数は max-age → Expires → Last-Modifiedからのヒューリスティックの順で決め、
+    no-cacheは0（毎回再検証）。Ageヘッダーの分はあらかじめ差し引く。
+    """
+    cache_control = headers.get("cache-control", "").lower()
+    directives = {part.split("=", 1)[0].strip() for part in cache_control.split(",") if part.strip()}
+    if "no-store" in directives:
+        return None, False
+    if "no-cache" in directives:
+        return 0.0, True
+
+    age_header = (headers.get("age") or "").strip()
+    age = float(age_header) if age_header.isdigit() else 0.0
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return max(0.0, int(match.group(1)) - age), True
+
+    date = _parse_http_date(headers.get("date")) or now
+    expires = _parse_http_date(headers.get("expires"))
+    if headers.get("expires") is not None:
+        # 解析できないExpiresは期限切れとして扱う
+        return max(0.0, (expires or 0.0) - date - age), True
+
+    last_modified = _parse_http_date(headers.get("last-modified"))
+    if last_modified is not None:
+        return max(0.0, min((date - last_modified) * 0.1, MAX_HEURISTIC_SECONDS) - age), True
+    return 0.0, True
+
+
+class PageCache:
+    """抽出済みページ内容と検証子のSQLiteキャッシュ"""
+
+    def __init__(self, filename: str = "pages.sqlite3", retention_seconds: int = DEFAULT_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._stats = {"fresh_hits": 0, "revalidated": 0, "fetched": 0, "not_stored": 0}
+        self._conn = open_sqlite(filename)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                headers TEXT
+            )
+            """
+        )
+        # headers列がなかった頃のファイルには列を足す（既存のエントリは検証子だけを引き継ぐ）
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "headers" not in columns:
+            self._conn.execute("ALTER TABLE pages ADD COLUMN headers TEXT")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """保存済みのエントリ（etag, last_modified, page, expires_at, headers）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content, expires_at, headers FROM pages WHERE url = ?",
+                (_cache_key(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        headers = json.loads(row[4]) if row[4] else {}
+        for name, value in (("etag", row[0]), ("last-modified", row[1])):
+            if value:
+                headers.setdefault(name, value)
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "page": PageContent.from_dict(json.loads(row[2])),
+            "expires_at": row[3],
+            "headers": headers,
+        }
+
+    def put(self, url: str, page: PageContent, headers: Dict[str, str], expires_at: float):
+        """内容と応答ヘッダー（検証子を含む）を保存し、保持期間を過ぎたエントリを削除"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content, fetched_at, expires_at, headers) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    _cache_key(url), headers.get("etag"), headers.get("last-modified"),
+                    json.dumps(page.to_dict(), ensure_ascii=False), now, expires_at,
+                    json.dumps(headers, ensure_ascii=False),
+                ),
+            )
+            self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (now - self.retention_seconds,))
+
+    def _revalidated(self, url: str, headers: Dict[str, str], expires_at: float):
+        """304で更新したヘッダー・検証子と有効期限を保存（内容はそのまま）"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET etag = ?, last_modified = ?, headers = ?, fetched_at = ?, expires_at = ? WHERE url = ?",
+                (
+                    headers.get("etag"), headers.get("last-modified"), json.dumps(stored_headers(headers)),
+                    time.time(), expires_at, _cache_key(url),
+                ),
+            )
+
+    def delete(self, url: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (_cache_key(url),))
+
+    def fetch(self, url: str, timeout: Optional[float] = None) -> Tuple[PageContent, str]:
+        """キャッシュを考慮してページ内容を返す（失敗時は例外）。戻り値は（内容, FRESH/REVALIDATED/FETCHED）"""
+        now = time.time()
+        entry = self.get(url)
+        if entry is not None and now < entry["expires_at"]:
+            self._count("fresh_hits")
+            return entry["page"], FRESH
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = request_page(url, timeout, headers=headers or None)
+
+        if response.status_code == 304 and entry is not None:
+            # 本文はないので接続を閉じ、保存済みのヘッダーを304のもので上書きして有効期限を求め直す
+            response.close()
+            merged = merge_not_modified(entry["headers"], response.headers)
+            lifetime, storable = freshness_lifetime(merged, now)
+            if storable:
+                self._revalidated(url, merged, now + (lifetime or 0.0))
+            else:
+                self.delete(url)
+            self._count("revalidated")
+            return entry["page"], REVALIDATED
+
+        page = extract_response(response, url)
+        lifetime, storable = freshness_lifetime(response.headers, now)
+        headers = stored_headers(response.headers)
+        # 新鮮な期間も検証子もないページは次回も全体を取り直すしかないので保存しない
+        if storable and (lifetime or headers.get("etag") or headers.get("last-modified")):
+            self.put(url, page, headers, now + (lifetime or 0.0))
+        else:
+            self._count("not_stored")
+        self._count("fetched")
+        return page, FETCHED
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+
+    def stats(self) -> Dict[str, Any]:
+        """期限内ヒット・304での再検証・取得の回数と保存件数"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return stats
+
+
+_cache: Optional[PageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """プロセス共通のページキャッシュを返す"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PageCache()
+    return _cache
+
+
+def peek_page_cache() -> Optional[PageCache]:
+    """作成済みならキャッシュを返す（統計表示のためだけにSQLiteを開かない）"""
+    return _cache
+
+
+def fetch_page_cached(url: str, timeout: Optional[float] = None) -> PageContent:
+    """get_page_cache().fetchの内容だけを返す"""
+    page, _ = get_page_cache().fetch(url, timeout)
+    return page
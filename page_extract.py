@@ -0,0 +1,257 @@
+"""サービスページ・競合ページの軽量な内容抽出（ストリーミング取得 + 逐次パース + 早期終了）
+
+ページ全体をダウンロードしてBeautifulSoupの木を作る代わりに、本文を一定サイズずつ受け取りながら
+標準ライブラリのHTMLParserで逐次解析する。タイトル・メタ説明・本文の見出し/段落/リストの
+テキストが必要な分だけ集まった時点（またはバイト数の上限）で読み込みをやめるので、
+重いランディングページでもメモリとCPUは上限で抑えられる。
+"""
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from http_client import get_http_client
+
+DEFAULT_MAX_BYTES = int(os.getenv("PAGE_EXTRACT_MAX_BYTES", str(1024 * 1024)))
+DEFAULT_MAX_BLOCKS = 50
+DEFAULT_MAX_TEXT_CHARS = 1000
+MIN_BLOCK_CHARS = 20
+CHUNK_SIZE = 16 * 1024
+
+BLOCK_TAGS = frozenset(["h1", "h2", "h3", "p", "li"])
+# 中身をテキストとして扱わない要素
+SKIP_TAGS = frozenset(["script", "style", "noscript", "template", "svg"])
+
+_WHITESPACE = re.compile(r"\s+")
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_\-]+)""", re.IGNORECASE)
+
+
+class PageContent:
+    """ページから取り出した内容"""
+
+    __slots__ = ("url", "title", "description", "blocks", "text", "bytes_read", "truncated", "stopped_early")
+
+    def __init__(self, url: str = ""):
+        self.url = url
+        self.title = ""
+        self.description = ""
+        # 見出し・段落・リスト項目のうちMIN_BLOCK_CHARS文字を超えるもの（出現順）
+        self.blocks: List[str] = []
+        # ページ先頭からの表示テキスト（空白は1つにまとめる）
+        self.text = ""
+        self.bytes_read = 0
+        # バイト数の上限で打ち切った
+        self.truncated = False
+        # 必要な内容が集まったので残りを読まなかった
+        self.stopped_early = False
+
+    def main_text(self, limit: int = DEFAULT_MAX_BLOCKS) -> str:
+        """本文の主要部分（先頭limit件の見出し・段落・リスト項目）"""
+        return "\n".join(self.blocks[:limit])
+
+    def excerpt(self, chars: int = DEFAULT_MAX_TEXT_CHARS) -> str:
+        """本文テキストの先頭chars文字"""
+        return self.text[:chars]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """保存用の辞書"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PageContent":
+        """to_dictの結果から復元"""
+        page = cls(data.get("url", ""))
+        for name in cls.__slots__:
+            if name in data:
+                setattr(page, name, data[name])
+        return page
+
+
+class _PageParser(HTMLParser):
+    """必要な要素だけを拾う逐次パーサー"""
+
+    def __init__(self, page: PageContent, max_blocks: int, max_text_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.page = page
+        self.max_blocks = max_blocks
+        self.max_text_chars = max_text_chars
+        self._skip_depth = 0
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self._title_done = False
+        self._head_done = False
+        # 開いている見出し・段落・リスト項目（入れ子のテキストは外側にも含める）
+        self._open_blocks: List[List[str]] = []
+        self._open_tags: List[str] = []
+        self._text_parts: List[str] = []
+        self._text_chars = 0
+
+    @property
+    def done(self) -> bool:
+        """タイトル・メタ説明・本文が十分に集まった"""
+        return (
+            self._title_done
+            and (self._head_done or bool(self.page.description))
+            and len(self.page.blocks) >= self.max_blocks
+            and self._text_chars >= self.max_text_chars
+        )
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title" and not self._title_done:
+            self._in_title = True
+        elif tag == "meta" and not self.page.description:
+            values = dict(attrs)
+            if (values.get("name") or "").lower() == "description":
+                self.page.description = (values.get("content") or "").strip()
+        elif tag == "body":
+            self._head_done = True
+        elif tag in BLOCK_TAGS:
+            # 閉じタグのない<p>/<li>は、次の同じ要素の開始で閉じる
+            if tag in ("p", "li") and self._open_tags and self._open_tags[-1] == tag:
+                self._close_block()
+            self._open_tags.append(tag)
+            self._open_blocks.append([])
+
+    def handle_startendtag(self, tag, attrs):
+        # <meta ... />などの空要素だけを扱う（<p/>や<script/>は中身がない）
+        if tag not in SKIP_TAGS and tag not in BLOCK_TAGS:
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title" and self._in_title:
+            self._in_title = False
+            self._title_done = True
+            self.page.title = _WHITESPACE.sub(" ", "".join(self._title_parts)).strip()
+        elif tag == "head":
+            self._head_done = True
+        elif tag in BLOCK_TAGS and tag in self._open_tags:
+            # 閉じ忘れの内側の要素もまとめて閉じる
+            while self._open_tags:
+                closed = self._open_tags[-1]
+                self._close_block()
+                if closed == tag:
+                    break
+
+    def _close_block(self):
+        self._open_tags.pop()
+        text = _WHITESPACE.sub(" ", "".join(self._open_blocks.pop())).strip()
+        if len(text) > MIN_BLOCK_CHARS and len(self.page.blocks) < self.max_blocks:
+            self.page.blocks.append(text)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self._title_parts.append(data)
+        for block in self._open_blocks:
+            block.append(data)
+        if self._text_chars < self.max_text_chars:
+            self._text_parts.append(data)
+            self._text_chars += len(data)
+
+    def finish(self):
+        """開いたままの要素を閉じ、テキストを確定する"""
+        while self._open_tags:
+            self._close_block()
+        if self._in_title and not self.page.title:
+            self.page.title = _WHITESPACE.sub(" ", "".join(self._title_parts)).strip()
+        text = _WHITESPACE.sub(" ", "".join(self._text_parts)).strip()
+        self.page.text = text[: self.max_text_chars]
+
+
+def _sniff_encoding(head: bytes, declared: Optional[str]) -> str:
+    """Content-Typeのcharset、なければ<meta charset>、どちらもなければUTF-8"""
+    if declared:
+        return declared
+    match = _META_CHARSET.search(head)
+    if match:
+        name = match.group(1).decode("ascii", "ignore")
+        try:
+            codecs.lookup(name)
+            return name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def extract_page(
+    chunks: Iterable[Union[bytes, str]],
+    url: str = "",
+    encoding: Optional[str] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    max_blocks: int = DEFAULT_MAX_BLOCKS,
+    max_text_chars: int = DEFAULT_MAX_TEXT_CHARS,
+) -> PageContent:
+    """本文のチャンクを順に解析し、必要な内容が集まるかmax_bytesに達したら読むのをやめる
+
+    文字列のチャンク（保存済みのHTMLなど）も受け付ける（その場合の上限は文字数）。
+    """
+    page = PageContent(url)
+    parser = _PageParser(page, max_blocks, max_text_chars)
+    decoder = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if isinstance(chunk, bytes) and decoder is None:
+            decoder = codecs.getincrementaldecoder(_sniff_encoding(chunk[:2048], encoding))(errors="replace")
+        if page.bytes_read + len(chunk) > max_bytes:
+            chunk = chunk[: max_bytes - page.bytes_read]
+            page.truncated = True
+        page.bytes_read += len(chunk)
+        parser.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        if page.truncated:
+            break
+        if parser.done:
+            page.stopped_early = True
+            break
+    parser.finish()
+    return page
+
+
+def extract_response(
+    response,
+    url: str = "",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    max_blocks: int = DEFAULT_MAX_BLOCKS,
+    max_text_chars: int = DEFAULT_MAX_TEXT_CHARS,
+) -> PageContent:
+    """stream=Trueで取得したレスポンスから内容を抽出し、接続を閉じる（4xx/5xxは例外）"""
+    try:
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        # Content-Typeにcharsetがない場合、requestsはtext/*をISO-8859-1とみなすので使わない
+        declared = response.encoding if "charset" in response.headers.get("content-type", "").lower() else None
+        return extract_page(
+            response.iter_content(chunk_size=CHUNK_SIZE),
+            url=url,
+            encoding=declared,
+            max_bytes=max_bytes,
+            max_blocks=max_blocks,
+            max_text_chars=max_text_chars,
+        )
+    finally:
+        # 読み残しがあれば接続ごと破棄する
+        response.close()
+
+
+def request_page(url: str, timeout: Optional[float] = None, headers: Optional[Dict[str, str]] = None):
+    """本文を読まずにレスポンスを返す（timeoutは読み取りの上限秒数）"""
+    client = get_http_client()
+    read_timeout = min(client.timeout[1], timeout) if timeout else client.timeout[1]
+    return client.get(url, timeout=(client.timeout[0], read_timeout), headers=headers, stream=True)
+
+
+def fetch_page(
+    url: str,
+    timeout: Optional[float] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    max_blocks: int = DEFAULT_MAX_BLOCKS,
+    max_text_chars: int = DEFAULT_MAX_TEXT_CHARS,
+) -> PageContent:
+    """URLの本文をストリーミングで取得して内容を抽出（失敗時は例外。timeoutは読み取りの上限秒数）"""
+    return extract_response(request_page(url, timeout), url, max_bytes, max_blocks, max_text_chars)
@@ -0,0 +1,246 @@
+"""Gemini APIのプロセス共通レート制限（RPM/TPMトークンバケット + リトライ）
+
+全Streamlitセッションの呼び出しを1つのリミッターで順番待ちさせ、
+429/5xxはRetry-Afterのヒントを優先しつつ指数バックオフ（ジッター付き）で再試行する。
+"""
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_RPM = int(os.getenv("GEMINI_RPM", "60"))
+DEFAULT_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "GatewayTimeout",
+    "BadGateway",
+}
+
+
+class RateLimitTimeout(Exception):
+    """クォータ待ちが上限時間を超えた"""
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（日本語は1文字≒1トークン、英数字は3〜4文字≒1トークン）"""
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """再試行で回復が見込めるエラーか判定"""
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+        return True
+    message = str(error)
+    return bool(re.search(r"\b(429|500|502|503|504)\b", message)) or "Resource has been exhausted" in message
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """エラーに含まれる再試行待ち時間のヒントを取り出す"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        value = headers.get("Retry-After")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    message = str(error)
+    # 例: "retry_delay { seconds: 27 }" / "retryDelay": "27s" / "Retry after 27 seconds"
+    patterns = [
+        r"retry_delay\s*\{\s*seconds:\s*(\d+(?:\.\d+)?)",
+        r"retryDelay\"?\s*:\s*\"?(\d+(?:\.\d+)?)s",
+        r"[Rr]etry[- ]after[:\s]+(\d+(?:\.\d+)?)",
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """1分あたりの補充量を持つトークンバケット（ロックは呼び出し側で取る）"""
+
+    def __init__(self, per_minute: int, capacity: Optional[int] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or per_minute)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amountを消費できるまでの待ち時間"""
+        self._refill(now)
+        # バケット容量を超える要求は満杯になった時点で通す
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        # 実使用量が見積もりを超えた分は負債として次回以降に繰り越す
+        self.tokens -= amount
+
+
+class GeminiRateLimiter:
+    """RPM/TPMの制限・順番待ち・リトライをまとめたリミッター"""
+
+    def __init__(
+        self,
+        requests_per_minute: int = DEFAULT_RPM,
+        tokens_per_minute: int = DEFAULT_TPM,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        max_queue_wait: float = 300.0,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_queue_wait = max_queue_wait
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned = set()
+        self._paused_until = 0.0
+        self._stats = {"calls": 0, "retries": 0, "failures": 0, "queued": 0, "wait_seconds": 0.0}
+
+    def acquire(self, tokens: int = 1):
+        """クォータが空くまで先着順で待機してから消費する"""
+        deadline = time.monotonic() + self.max_queue_wait
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            started = time.monotonic()
+            waited = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    if ticket == self._serving:
+                        wait = max(
+                            self._paused_until - now,
+                            self.request_bucket.wait_time(1, now),
+                            self.token_bucket.wait_time(tokens, now),
+                        )
+                        if wait <= 0:
+                            self.request_bucket.consume(1)
+                            self.token_bucket.consume(tokens)
+                            return
+                    else:
+                        # 前の順番の呼び出しが消費するまで待つ
+                        wait = 0.5
+                    if now + wait > deadline:
+                        raise RateLimitTimeout(f"Gemini APIのクォータ待ちが{self.max_queue_wait:.0f}秒を超えました")
+                    if not waited:
+                        self._stats["queued"] += 1
+                        waited = True
+                    self._cond.wait(wait)
+            finally:
+                self._release_ticket(ticket)
+                self._stats["wait_seconds"] += time.monotonic() - started
+                self._cond.notify_all()
+
+    def _release_ticket(self, ticket: int):
+        """順番を次へ進める。待ちを諦めた順番は先頭に来た時点で読み飛ばす（ロック内で呼ぶ）"""
+        if ticket == self._serving:
+            self._serving += 1
+        else:
+            self._abandoned.add(ticket)
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """実際のトークン使用量との差分をバケットに反映"""
+        if actual_tokens > estimated_tokens:
+            with self._cond:
+                self.token_bucket.consume(actual_tokens - estimated_tokens)
+
+    def pause(self, seconds: float):
+        """全呼び出しを一定時間停止（サーバーからのRetry-After）"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def call(self, fn: Callable[[], Any], tokens: int = 1) -> Any:
+        """クォータを確保してfnを呼び出し、一時的なエラーは再試行する"""
+        attempt = 0
+        while True:
+            self.acquire(tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_retryable_error(e) or attempt >= self.max_retries:
+                    with self._cond:
+                        self._stats["failures"] += 1
+                    raise
+                hint = retry_after_seconds(e)
+                backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+                delay = hint if hint is not None else random.uniform(0, backoff)
+                if hint is not None:
+                    # サーバー指定の待ち時間は全セッションで共有する
+                    self.pause(hint)
+                with self._cond:
+                    self._stats["retries"] += 1
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            with self._cond:
+                self._stats["calls"] += 1
+            self._reconcile_usage(result, tokens)
+            return result
+
+    def _reconcile_usage(self, result: Any, estimated_tokens: int):
+        """応答のusage_metadataがあれば実使用トークン数で補正"""
+        try:
+            usage = getattr(result, "usage_metadata", None)
+            actual = getattr(usage, "total_token_count", None)
+        except Exception:
+            # ストリーミング応答は読み終わるまで使用量が確定しない
+            return
+        if isinstance(actual, int):
+            self.record_usage(estimated_tokens, actual)
+
+    def stats(self) -> Dict[str, Any]:
+        """呼び出し・リトライ・待機の統計"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["waiting"] = self._next_ticket - self._serving
+        stats["wait_seconds"] = round(stats["wait_seconds"], 2)
+        return stats
+
+
+_limiter: Optional[GeminiRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> GeminiRateLimiter:
+    """プロセス共通のGeminiリミッターを返す"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = GeminiRateLimiter()
+    return _limiter
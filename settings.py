@@ -0,0 +1,25 @@
+"""APIキーなどの設定値の読み込み（Streamlit Secrets → 環境変数の順）"""
+import hashlib
+import os
+from typing import Optional, Sequence
+
+import streamlit as st
+
+API_KEY_NAMES = ("GEMINI_API_KEY", "KEYWORD_TOOL_API_KEY")
+
+
+def get_secret(name: str) -> Optional[str]:
+    """Streamlit CloudのSecrets、なければ環境変数から値を取得"""
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        # secrets.tomlが存在しないローカル環境
+        pass
+    return os.getenv(name)
+
+
+def secrets_fingerprint(names: Sequence[str] = API_KEY_NAMES) -> str:
+    """設定値のハッシュ（値が変わればキャッシュ済みのアプリオブジェクトを作り直す）"""
+    payload = "\n".join(f"{name}={get_secret(name) or ''}" for name in names)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,78 @@
+"""同一キーの同時呼び出しを1回の上流リクエストにまとめるシングルフライト
+
+同じプロンプトが複数セッション（またはダブルクリックによる再実行）から同時に送られたとき、
+最初の呼び出しだけが実際にAPIを呼び、残りはその結果（または例外）を受け取る。
+"""
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """キー単位で実行中の呼び出しを共有する"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats = {"upstream_calls": 0, "coalesced_calls": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """keyの呼び出しが実行中なら完了を待って結果を共有し、なければfnを実行する"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced_calls"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["upstream_calls"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """上流呼び出し数と、まとめられて節約できた呼び出し数"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        total = stats["upstream_calls"] + stats["coalesced_calls"]
+        stats["saved_ratio"] = round(stats["coalesced_calls"] / total, 3) if total else 0.0
+        return stats
+
+
+_singleflight: Optional[SingleFlight] = None
+_singleflight_lock = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    """プロセス共通のシングルフライトを返す"""
+    global _singleflight
+    if _singleflight is None:
+        with _singleflight_lock:
+            if _singleflight is None:
+                _singleflight = SingleFlight()
+    return _singleflight
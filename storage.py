@@ -0,0 +1,33 @@
+"""キャッシュ・履歴データ用のローカルストレージ共通ヘルパー"""
+import os
+import sqlite3
+from pathlib import Path
+
+# キャッシュ保存先（Streamlit Cloudでも書き込み可能な作業ディレクトリ配下）
+CACHE_DIR_ENV = "APP_CACHE_DIR"
+DEFAULT_CACHE_DIR = ".cache"
+
+
+def get_cache_dir() -> Path:
+    """キャッシュディレクトリを返す（存在しなければ作成）"""
+    path = Path(os.getenv(CACHE_DIR_ENV, DEFAULT_CACHE_DIR))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def open_sqlite(filename: str) -> sqlite3.Connection:
+    """スレッド間で共有できるSQLite接続を開く
+
+    ファイル名のみの場合はキャッシュディレクトリ配下に作成する。
+    呼び出し側はロックで書き込みを直列化すること。
+    """
+    if filename == ":memory:" or os.path.isabs(filename) or os.path.dirname(filename):
+        path = filename
+    else:
+        path = str(get_cache_dir() / filename)
+
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,125 @@
+"""負荷試験用の合成キーワードデータ
+
+APIキーがない環境でも、実データに近い規模と分布でキーワードを扱う処理（グラフ・プロンプト組み立て・
+順位付け・クラスタリング）を試せるようにする。シードキーワードに日本語の修飾語を1〜3語つなげて
+任意の件数の候補を作り、検索ボリュームは裾の重い分布（修飾語が増えるほど小さいZipf型 × 対数正規の揺らぎ）、
+競合性はベータ分布、CPCは対数正規分布で生成する。購買意図の修飾語は競合性とCPCを押し上げる。
+同じシードキーワード・件数・seedからは常に同じ結果になる。
+"""
+import math
+import zlib
+from array import array
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from keyword_table import KeywordTable
+from keyword_utils import normalize_keyword
+
+DEFAULT_COUNT = 10
+MAX_COUNT = 1_000_000
+
+# （修飾語, 購買意図か）
+SUFFIXES: Tuple[Tuple[str, bool], ...] = (
+    ("やり方", False), ("方法", False), ("初心者", False), ("おすすめ", True), ("比較", True),
+    ("ランキング", True), ("始め方", False), ("コツ", False), ("注意点", False), ("メリット", False),
+    ("デメリット", False), ("口コミ", True), ("評判", True), ("値段", True), ("安い", True),
+    ("人気", True), ("簡単", False), ("失敗", False), ("道具", True), ("資格", True),
+    ("独学", False), ("効果", False), ("とは", False), ("意味", False), ("種類", False),
+    ("選び方", True), ("費用", True), ("相場", True), ("通販", True), ("セール", True),
+    ("東京", False), ("大阪", False), ("近く", False), ("子供", False), ("女性", False),
+    ("男性", False), ("40代", False), ("大人", False), ("一人", False), ("自宅", False),
+    ("副業", True), ("無料", False), ("アプリ", True), ("本", True), ("動画", False),
+    ("英語", False), ("上達", False), ("練習", False), ("毎日", False), ("時間", False),
+    ("2025", False), ("最新", False), ("ブログ", False), ("体験", False), ("プロ", False),
+    ("レベル", False), ("目安", False), ("期間", False), ("おしゃれ", True), ("まとめ", False),
+)
+_COMMERCIAL = np.array([commercial for _, commercial in SUFFIXES], dtype=bool)
+
+
+def _rng(keyword: str, seed: int) -> np.random.Generator:
+    return np.random.default_rng([zlib.crc32(normalize_keyword(keyword).encode("utf-8")), seed])
+
+
+def _decode(indices: np.ndarray, depth: int, n: int) -> np.ndarray:
+    """0 <= index < n*(n-1)*…（depth個）を重複のない修飾語番号の並び（件数 x depth）に変換"""
+    picks = np.empty((indices.size, depth), dtype=np.int64)
+    rest = indices.astype(np.int64)
+    for level in range(depth):
+        size = math.prod(range(n - level - 1, n - depth, -1))
+        position, rest = np.divmod(rest, size)
+        # 残りの修飾語の中での位置を、選択済みの番号を小さい順に飛ばして全体の番号にする
+        taken = np.sort(picks[:, :level], axis=1)
+        for column in range(level):
+            position = position + (position >= taken[:, column])
+        picks[:, level] = position
+    return picks
+
+
+def _phrases(keyword: str, count: int, rng: np.random.Generator) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """候補キーワードと、それぞれの修飾語数・購買意図の修飾語数
+
+    修飾語の少ない（検索されやすい）候補から順に、各段の組み合わせを乱数の順序で使う。
+    組み合わせを使い切ったら番号付きの候補で埋める。
+    """
+    n = len(SUFFIXES)
+    words = [suffix for suffix, _ in SUFFIXES]
+    keywords: List[str] = []
+    depths: List[np.ndarray] = []
+    commercial: List[np.ndarray] = []
+    for depth in (1, 2, 3):
+        if len(keywords) >= count:
+            break
+        total = math.prod(range(n, n - depth, -1))
+        needed = min(count - len(keywords), total)
+        picks = _decode(rng.permutation(total)[:needed], depth, n)
+        if depth == 1:
+            # 1語の候補の一部は「の」でつなぐ（表記揺れのあるデータにする）
+            use_no = rng.random(needed) < 0.2
+            keywords.extend(
+                f"{keyword}の{words[i]}" if no else f"{keyword} {words[i]}"
+                for i, no in zip(picks[:, 0].tolist(), use_no.tolist())
+            )
+        else:
+            keywords.extend(" ".join([keyword, *(words[i] for i in row)]) for row in picks.tolist())
+        depths.append(np.full(needed, depth, dtype=np.int64))
+        commercial.append(_COMMERCIAL[picks].sum(axis=1))
+    extra = count - len(keywords)
+    keywords.extend(f"{keyword} パート{i + 1}" for i in range(extra))
+    depths.append(np.full(extra, 4, dtype=np.int64))
+    commercial.append(np.zeros(extra, dtype=np.int64))
+    return keywords, np.concatenate(depths), np.concatenate(commercial)
+
+
+def synthetic_table(keyword: str, count: int = DEFAULT_COUNT, seed: int = 0) -> KeywordTable:
+    """シードキーワードの合成候補（count件、生成順）"""
+    count = max(0, min(int(count), MAX_COUNT))
+    if not keyword or count == 0:
+        return KeywordTable()
+    rng = _rng(keyword, seed)
+    # シード自体の需要（数千〜数十万。件数によらず同じ）を生成順のZipf型で減衰させ、対数正規の揺らぎを掛ける
+    base = rng.lognormal(mean=math.log(20_000), sigma=1.0)
+    keywords, depths, commercial = _phrases(keyword.strip(), count, rng)
+
+    rank = np.arange(1, count + 1, dtype=np.float64)
+    volume = base * rank ** -0.9 * 0.5 ** (depths - 1) * rng.lognormal(0.0, 0.6, count)
+    # Keyword Toolと同じく小さい値は10刻み、それ以上は有効数字2桁程度に丸める
+    digits = np.maximum(np.floor(np.log10(np.maximum(volume, 10.0))) - 1, 1)
+    volume = np.maximum(np.round(volume / 10 ** digits) * 10 ** digits, 10).astype(np.int64)
+
+    is_commercial = commercial > 0
+    competition = np.clip(rng.beta(2.0, 3.0, count) + 0.25 * is_commercial, 0.0, 1.0).round(2)
+    cpc = (rng.lognormal(math.log(60.0), 0.7, count) * (1.0 + 1.5 * is_commercial)).round(0)
+
+    return KeywordTable(
+        keywords,
+        array("q", volume.tolist()),
+        array("d", competition.tolist()),
+        array("d", cpc.tolist()),
+    )
+
+
+def synthetic_keywords(keyword: str, count: int = DEFAULT_COUNT, seed: int = 0) -> List[Dict]:
+    """synthetic_tableをKeyword Tool APIの結果と同じ形（辞書のリスト）で返す"""
+    return synthetic_table(keyword, count, seed).to_records()
+
@@ -0,0 +1,51 @@
+"""意図分析の結果からワークフローを実行するかの判定と、ローカル判定時の不足情報の検出"""
+from agent_intent import LLM_CONFIDENCE_THRESHOLD, SOURCE_LLM, SOURCE_LOCAL, fallback_intent, should_run_workflow
+from agent_workflows import AGENT_WORKFLOWS, required_inputs
+from intent_classifier import LOCAL_CONFIDENCE_THRESHOLD, LocalIntentClassifier
+
+
+def _result(workflow, confidence, source):
+    return {
+        "workflow": workflow,
+        "confidence": confidence,
+        "extracted_info": {},
+        "missing_info": [],
+        "clarification": "",
+        "source": source,
+    }
+
+
+def test_local_route_below_llm_gate_runs_workflow():
+    local = LocalIntentClassifier().classify("ショート動画の企画をお願いします")
+    assert local["workflow"] == "shorts_planning"
+    assert LOCAL_CONFIDENCE_THRESHOLD <= local["confidence"] <= LLM_CONFIDENCE_THRESHOLD
+
+    assert should_run_workflow(_result(local["workflow"], local["confidence"], SOURCE_LOCAL))
+
+
+def test_llm_route_needs_llm_gate():
+    assert not should_run_workflow(_result("shorts_planning", LLM_CONFIDENCE_THRESHOLD, SOURCE_LLM))
+    assert should_run_workflow(_result("shorts_planning", 0.9, SOURCE_LLM))
+
+
+def test_no_workflow_never_runs():
+    assert not should_run_workflow(fallback_intent())
+    assert not should_run_workflow(_result(None, 1.0, SOURCE_LLM))
+
+
+def test_required_inputs_come_from_first_prompt():
+    assert required_inputs(AGENT_WORKFLOWS["channel_concept"]) == {
+        "product_info": "商品情報", "service_url": "サービスURL",
+    }
+    assert all(required_inputs(workflow) for workflow in AGENT_WORKFLOWS.values())
+
+
+def test_quick_start_requests_carry_no_details():
+    classifier = LocalIntentClassifier()
+    for key, workflow in AGENT_WORKFLOWS.items():
+        text = f"{workflow['name']}を実行してください"
+        assert classifier.classify(text)["workflow"] == key
+        assert classifier.request_details(text, key) == ""
+
+    assert classifier.request_details("https://example.com チャンネルコンセプト設計を実行してください。", "channel_concept") == ""
+    assert classifier.request_details("学習塾のYouTubeチャンネルを始めたいです", "channel_concept")
@@ -0,0 +1,85 @@
+"""チャンネルコンセプトStep 1のパイプライン（ページ取得・分析・キーワード統合の段階と待ち合わせ）"""
+import time
+
+from analysis_cache import AnalysisCache
+from concept_pipeline import ANALYSIS, BASE_KEYWORDS, KEYWORDS, PAGE, ConceptPipeline, merge_keywords
+from page_extract import PageContent
+
+ANALYSIS_TEXT = "1. サービスの種類: 個別指導塾\n5. 関連するキーワード候補20個\n- 高校受験 勉強法\n- 個別指導 塾\n"
+KEYWORD_TEXT = "1. 主要キーワード\n- 個別指導 塾\n"
+
+
+def make_fetch(seconds: float = 0.0, error: Exception = None):
+    def fetch(url):
+        time.sleep(seconds)
+        if error is not None:
+            raise error
+        page = PageContent(url)
+        page.title = "個別指導の学習塾"
+        page.text = "講師が一人ひとりに合わせたカリキュラムを作成します。"
+        return page
+    return fetch
+
+
+def generate(prompt):
+    return ANALYSIS_TEXT if "キーワード候補" in prompt else KEYWORD_TEXT
+
+
+def make_pipeline(fetch, cache=None, refine_wait_seconds=5.0):
+    return ConceptPipeline(
+        "個別指導塾", "中高生向け", "保護者", "https://example.com/juku",
+        generate_fn=generate, fetch_fn=fetch, cache=cache, model="mock",
+        refine_wait_seconds=refine_wait_seconds,
+    )
+
+
+def test_merge_adds_only_new_page_keywords():
+    merged = merge_keywords(KEYWORD_TEXT, ANALYSIS_TEXT)
+
+    assert "6. ページ由来キーワード" in merged
+    assert "- 高校受験 勉強法" in merged
+    assert merged.count("個別指導 塾") == 1
+
+
+def test_run_merges_analysis_and_reuses_cache(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "analyses.sqlite3"))
+
+    pipeline = make_pipeline(make_fetch(), cache)
+    stages = [event.stage for event in pipeline.run()]
+    assert set(stages) == {PAGE, ANALYSIS, BASE_KEYWORDS, KEYWORDS}
+    assert stages[-1] == KEYWORDS
+    assert "高校受験 勉強法" in pipeline.results[KEYWORDS].value
+    assert not pipeline.analysis_pending
+
+    # 同じページ・同じ商品情報なら保存済みの分析と統合済みキーワードを使う
+    again = make_pipeline(make_fetch(), cache)
+    events = {event.stage: event for event in again.run()}
+    assert events[ANALYSIS].cached and events[KEYWORDS].cached
+    assert events[KEYWORDS].value == pipeline.results[KEYWORDS].value
+
+
+def test_slow_page_fetch_is_analysed_after_run():
+    pipeline = make_pipeline(make_fetch(seconds=0.5), refine_wait_seconds=0.05)
+
+    stages = [event.stage for event in pipeline.run()]
+    assert PAGE not in stages and ANALYSIS not in stages
+    assert pipeline.results[KEYWORDS].value == KEYWORD_TEXT
+    assert pipeline.analysis_pending
+
+    keywords = pipeline.finish(timeout=5)
+    assert keywords is not None and keywords.ok
+    assert pipeline.results[PAGE].ok
+    assert pipeline.results[ANALYSIS].value == ANALYSIS_TEXT
+    assert "高校受験 勉強法" in keywords.value
+    assert not pipeline.analysis_pending
+
+
+def test_slow_failed_page_fetch_falls_back_to_product_analysis():
+    pipeline = make_pipeline(make_fetch(seconds=0.3, error=RuntimeError("HTTP 500")), refine_wait_seconds=0.05)
+    list(pipeline.run())
+    assert pipeline.analysis_pending
+
+    keywords = pipeline.finish(timeout=5)
+    assert keywords is not None
+    assert not pipeline.results[PAGE].ok
+    assert pipeline.results[ANALYSIS].ok
@@ -0,0 +1,40 @@
+"""ローカル意図分類器（閾値の選定用サンプルと、ルール調整にも閾値選定にも使っていない評価用サンプル）"""
+from intent_classifier import (
+    HELD_OUT_SAMPLES, LABELLED_SAMPLES, LOCAL_CONFIDENCE_THRESHOLD, MIN_THRESHOLD_PRECISION, THRESHOLD_SAMPLES,
+    LocalIntentClassifier, evaluate, select_threshold, threshold_sweep,
+)
+
+
+def test_sample_sets_do_not_overlap():
+    labelled = {text for text, _ in LABELLED_SAMPLES}
+    threshold = {text for text, _ in THRESHOLD_SAMPLES}
+    held_out = {text for text, _ in HELD_OUT_SAMPLES}
+
+    assert not labelled & threshold
+    assert not labelled & held_out
+    assert not threshold & held_out
+
+
+def test_threshold_matches_selection():
+    sweep = threshold_sweep(LocalIntentClassifier(), THRESHOLD_SAMPLES)
+
+    assert select_threshold(sweep) == LOCAL_CONFIDENCE_THRESHOLD
+
+
+def test_held_out_precision_at_threshold():
+    report = evaluate(LocalIntentClassifier(), HELD_OUT_SAMPLES)
+
+    assert report["precision"] >= MIN_THRESHOLD_PRECISION
+    # 曖昧な入力はすべてLLMに委ねる
+    ambiguous = sum(1 for _, label in HELD_OUT_SAMPLES if label is None)
+    assert report["ambiguous_escalated"] == ambiguous
+
+
+def test_select_threshold_requires_margin_below():
+    sweep = [
+        {"threshold": 0.5, "precision": 0.9},
+        {"threshold": 0.6, "precision": 1.0},
+        {"threshold": 0.7, "precision": 1.0},
+    ]
+
+    assert select_threshold(sweep) == 0.7
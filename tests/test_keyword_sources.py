@@ -0,0 +1,45 @@
+"""ソース×シードの並列検索（締め切りは各検索が始まった時点から数える）"""
+import time
+
+import keyword_sources
+from keyword_sources import KeywordSource, collect_keywords
+
+
+class SleepySource(KeywordSource):
+    """指定したシードだけ遅い、固定結果のソース"""
+
+    def __init__(self, name, seconds, timeout, slow_seeds=()):
+        self.name = name
+        self.seconds = seconds
+        self.timeout = timeout
+        self.slow_seeds = set(slow_seeds)
+
+    def lookup(self, keyword, country, language, user=""):
+        time.sleep(self.seconds * (10 if keyword in self.slow_seeds else 1))
+        return [{"keyword": f"{keyword} {self.name}", "search_volume": 100, "competition": 0.5, "cpc": 10.0}]
+
+
+def test_queued_lookups_get_their_full_timeout(monkeypatch):
+    monkeypatch.setattr(keyword_sources, "MAX_IN_FLIGHT", 2)
+    source = SleepySource("a", seconds=0.1, timeout=0.3)
+    seeds = [f"seed{i}" for i in range(8)]
+
+    started = time.monotonic()
+    table, report = collect_keywords([source], seeds)
+
+    # 2件ずつ4巡するので全体ではtimeoutを超えるが、どの検索も時間切れにならない
+    assert time.monotonic() - started >= 0.4
+    assert report["a"]["timed_out"] == 0
+    assert report["a"]["keywords"] == len(seeds)
+    assert table.keywords() and len(table) == len(seeds)
+
+
+def test_slow_lookup_times_out_without_blocking_others(monkeypatch):
+    monkeypatch.setattr(keyword_sources, "MAX_IN_FLIGHT", 2)
+    source = SleepySource("a", seconds=0.05, timeout=0.2, slow_seeds={"slow"})
+
+    table, report = collect_keywords([source], ["slow", "x", "y", "z"])
+
+    assert report["a"]["timed_out"] == 1
+    assert report["a"]["keywords"] == 3
+    assert "slow a" not in table.keywords()
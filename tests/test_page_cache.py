@@ -0,0 +1,195 @@
+"""ページキャッシュのHTTPキャッシュ動作（ローカルHTTPサーバーのフィクスチャで検証）"""
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from page_cache import FETCHED, FRESH, REVALIDATED, PageCache
+
+LAST_MODIFIED = formatdate(time.time() - 7 * 24 * 60 * 60, usegmt=True)
+
+
+def make_body(title: str) -> bytes:
+    paragraph = "<p>講師が一人ひとりに合わせたカリキュラムを作成します。</p>"
+    return f"<html><head><title>{title}</title></head><body>{paragraph * 5}</body></html>".encode("utf-8")
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        # パス → {"cache_control", "etag", "last_modified", "body", "not_modified"}
+        # not_modifiedは304だけに付けるヘッダー（指定すればCache-Control・ETagの代わりに送る）
+        self.pages = {}
+        self.responses = Counter()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_port}{path}"
+
+    def handle_error(self, request, client_address):
+        # 抽出が早期終了すると、クライアントは本文を読み切らずに接続を切る
+        pass
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        page = self.server.pages.get(self.path)
+        if page is None:
+            self.send_error(404)
+            return
+        etag = page.get("etag")
+        last_modified = page.get("last_modified")
+        if etag:
+            not_modified = self.headers.get("If-None-Match") == etag
+        else:
+            not_modified = last_modified is not None and self.headers.get("If-Modified-Since") == last_modified
+        status = 304 if not_modified else 200
+        self.server.responses[(self.path, status)] += 1
+
+        self.send_response(status)
+        if status == 304 and "not_modified" in page:
+            for name, value in page["not_modified"].items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        self.send_header("Cache-Control", page["cache_control"])
+        if etag:
+            self.send_header("ETag", etag)
+        if last_modified:
+            self.send_header("Last-Modified", last_modified)
+        if status == 304:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page["body"])))
+        self.end_headers()
+        try:
+            self.wfile.write(page["body"])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = FixtureServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PageCache(str(tmp_path / "pages.sqlite3"))
+
+
+def requests_for(server, path):
+    return server.responses[(path, 200)], server.responses[(path, 304)]
+
+
+def test_fresh_hit_makes_no_request(server, cache):
+    server.pages["/fresh"] = {"cache_control": "max-age=60", "etag": '"v1"', "body": make_body("新鮮")}
+
+    page, state = cache.fetch(server.url("/fresh"))
+    assert state == FETCHED
+    page, state = cache.fetch(server.url("/fresh"))
+
+    assert state == FRESH
+    assert page.title == "新鮮"
+    assert requests_for(server, "/fresh") == (1, 0)
+
+
+def test_etag_revalidation_returns_304_and_keeps_body(server, cache):
+    server.pages["/etag"] = {"cache_control": "no-cache", "etag": '"v1"', "body": make_body("ETag版")}
+
+    first, _ = cache.fetch(server.url("/etag"))
+    page, state = cache.fetch(server.url("/etag"))
+
+    assert state == REVALIDATED
+    assert page.title == "ETag版"
+    assert page.blocks == first.blocks
+    assert requests_for(server, "/etag") == (1, 1)
+
+
+def test_last_modified_revalidation_returns_304(server, cache):
+    server.pages["/lm"] = {"cache_control": "no-cache", "last_modified": LAST_MODIFIED, "body": make_body("更新日版")}
+
+    cache.fetch(server.url("/lm"))
+    page, state = cache.fetch(server.url("/lm"))
+
+    assert state == REVALIDATED
+    assert page.title == "更新日版"
+    assert requests_for(server, "/lm") == (1, 1)
+
+
+def test_no_store_always_fetches(server, cache):
+    server.pages["/private"] = {"cache_control": "no-store", "etag": '"v1"', "body": make_body("保存しない")}
+
+    states = [cache.fetch(server.url("/private"))[1] for _ in range(3)]
+
+    assert states == [FETCHED] * 3
+    assert requests_for(server, "/private") == (3, 0)
+    assert cache.stats()["entries"] == 0
+
+
+def test_changed_etag_replaces_entry(server, cache):
+    server.pages["/page"] = {"cache_control": "no-cache", "etag": '"v1"', "body": make_body("旧版")}
+    cache.fetch(server.url("/page"))
+
+    server.pages["/page"] = {"cache_control": "no-cache", "etag": '"v2"', "body": make_body("新版")}
+    page, state = cache.fetch(server.url("/page"))
+    assert state == FETCHED
+    assert page.title == "新版"
+
+    # 保存されたのは新しい版（次は新しいETagで再検証される）
+    page, state = cache.fetch(server.url("/page"))
+    assert state == REVALIDATED
+    assert page.title == "新版"
+    assert cache.get(server.url("/page"))["etag"] == '"v2"'
+    assert requests_for(server, "/page") == (2, 1)
+
+
+def test_304_without_cache_control_keeps_stored_lifetime(server, cache):
+    server.pages["/bare304"] = {
+        "cache_control": "max-age=60", "etag": '"v1"', "body": make_body("期限あり"), "not_modified": {},
+    }
+    url = server.url("/bare304")
+    cache.fetch(url)
+    # 期限切れにして再検証させる
+    cache._revalidated(url, cache.get(url)["headers"], 0.0)
+
+    page, state = cache.fetch(url)
+    assert state == REVALIDATED
+    assert page.title == "期限あり"
+
+    # 304にCache-Controlがなくても、元の応答のmax-ageで新鮮な期間が続く
+    page, state = cache.fetch(url)
+    assert state == FRESH
+    assert cache.get(url)["expires_at"] > time.time() + 50
+    assert requests_for(server, "/bare304") == (1, 1)
+
+
+def test_304_updates_etag(server, cache):
+    server.pages["/rotate"] = {
+        "cache_control": "no-cache", "etag": '"v1"', "body": make_body("同じ内容"), "not_modified": {"ETag": '"v2"'},
+    }
+    url = server.url("/rotate")
+    cache.fetch(url)
+
+    page, state = cache.fetch(url)
+
+    assert state == REVALIDATED
+    entry = cache.get(url)
+    assert entry["etag"] == '"v2"'
+    # Cache-Controlは元の応答のものが残る
+    assert entry["headers"]["cache-control"] == "no-cache"
@@ -0,0 +1,114 @@
+"""メッセージに含まれる複数URLの並列取得（ドメインごとの同時接続上限 + 全体の締め切り）
+
+URLごとの取得は共通のExecutorで並列に実行し、同じドメインへの同時接続は全セッション合計で
+URL_INGEST_DOMAIN_LIMIT件までにする。
+全体の締め切りまでに読み込めたURLの内容だけを返し、間に合わなかったURLはタイムアウトとして報告する
+（実行中の取得は待たずに戻る）。
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List
+from urllib.parse import urlparse
+
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("URL_INGEST_DEADLINE", "8"))
+DEFAULT_DOMAIN_LIMIT = int(os.getenv("URL_INGEST_DOMAIN_LIMIT", "2"))
+MAX_URLS = 10
+
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+
+# 取得結果の状態
+OK = "ok"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+# URLと、そのURLに使える残り秒数を受け取って本文を返す（失敗時は例外）
+ExtractFn = Callable[[str, float], str]
+
+# 締め切りを過ぎた取得を待たずに戻れるよう、モジュール共通のExecutorを使う
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("URL_INGEST_WORKERS", "8")), thread_name_prefix="url-ingest"
+)
+_domain_slots: Dict[str, threading.BoundedSemaphore] = {}
+_domain_lock = threading.Lock()
+
+
+class UrlResult:
+    """1つのURLの取得結果"""
+
+    __slots__ = ("url", "status", "content", "error", "seconds")
+
+    def __init__(self, url: str, status: str, content: str = "", error: str = "", seconds: float = 0.0):
+        self.url = url
+        self.status = status
+        self.content = content
+        self.error = error
+        self.seconds = seconds
+
+    def describe(self) -> str:
+        """報告用の1行（URLと失敗理由）"""
+        if self.status == TIMEOUT:
+            return f"{self.url}（時間内に読み込めませんでした）"
+        if self.status == ERROR:
+            return f"{self.url}（{self.error}）"
+        return f"{self.url}（{self.seconds:.1f}秒）"
+
+
+def find_urls(text: str, limit: int = MAX_URLS) -> List[str]:
+    """テキスト中のURL（出現順・重複なし・最大limit件。文末の句読点は除く）"""
+    urls = (url.rstrip(".,;:!?)") for url in URL_PATTERN.findall(text or ""))
+    return list(dict.fromkeys(urls))[:limit]
+
+
+def _domain_slot(url: str) -> threading.BoundedSemaphore:
+    """ドメインごとの同時接続数の枠（全セッション共通）"""
+    domain = urlparse(url).netloc.lower()
+    slot = _domain_slots.get(domain)
+    if slot is None:
+        with _domain_lock:
+            slot = _domain_slots.get(domain)
+            if slot is None:
+                slot = _domain_slots[domain] = threading.BoundedSemaphore(DEFAULT_DOMAIN_LIMIT)
+    return slot
+
+
+def _fetch_one(url: str, extract_fn: ExtractFn, deadline: float) -> UrlResult:
+    started = time.monotonic()
+    slot = _domain_slot(url)
+    # 同じドメインの取得が詰まっている間に締め切りを過ぎたら、接続せずに諦める
+    if not slot.acquire(timeout=max(0.0, deadline - time.monotonic())):
+        return UrlResult(url, TIMEOUT, seconds=time.monotonic() - started)
+    try:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return UrlResult(url, TIMEOUT, seconds=time.monotonic() - started)
+        content = extract_fn(url, remaining)
+        return UrlResult(url, OK, content=content, seconds=time.monotonic() - started)
+    except Exception as e:
+        return UrlResult(url, ERROR, error=str(e), seconds=time.monotonic() - started)
+    finally:
+        slot.release()
+
+
+def fetch_urls(
+    urls: List[str],
+    extract_fn: ExtractFn,
+    deadline_seconds: float = DEFAULT_DEADLINE_SECONDS,
+) -> List[UrlResult]:
+    """URLを並列に取得し、締め切りまでの結果をURLの順で返す（間に合わなかったものはTIMEOUT）"""
+    if not urls:
+        return []
+    deadline = time.monotonic() + deadline_seconds
+    futures = [_executor.submit(_fetch_one, url, extract_fn, deadline) for url in urls]
+    wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+
+    results = []
+    for url, future in zip(urls, futures):
+        if future.done():
+            results.append(future.result())
+        else:
+            future.cancel()
+            results.append(UrlResult(url, TIMEOUT, seconds=deadline_seconds))
+    return results